@@ -420,6 +420,7 @@ class GroupMasterDeleteView(mixins.HybridDeleteView):
 class AccountListView(mixins.HybridListView):
     model = Account
     table_class = tables.AccountTable
+    search_index = "account"
     filterset_fields = {
         "branch": ["exact"],
         "name": ["icontains"],
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admission.models import Admission
+from admission.services.certificate_renderer import (
+    FORMAT_JPEG,
+    FORMAT_PDF,
+    OUTPUT_DIR,
+    certificate_data_from_admission,
+    generate_certificates,
+    iter_spreadsheet_certificates,
+)
+
+
+class Command(BaseCommand):
+    help = "Render course completion certificates in parallel into media storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, help="Batch id")
+        parser.add_argument("--course", type=int, help="Course id")
+        parser.add_argument("--branch", type=int, help="Branch id")
+        parser.add_argument("--students", type=int, nargs="+", help="Admission ids")
+        parser.add_argument("--spreadsheet", help="Read students from an .xlsx file instead of admissions")
+        parser.add_argument("--format", choices=[FORMAT_PDF, FORMAT_JPEG], default=FORMAT_PDF)
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+        parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory inside media storage")
+
+    def handle(self, *args, **options):
+        if options["spreadsheet"]:
+            records = iter_spreadsheet_certificates(options["spreadsheet"])
+        else:
+            filters = {
+                key: options[option]
+                for option, key in (("batch", "batch_id"), ("course", "course_id"), ("branch", "branch_id"), ("students", "id__in"))
+                if options[option]
+            }
+            if not filters:
+                raise CommandError("Pass --batch, --course, --branch, --students or --spreadsheet")
+            students = Admission.objects.filter(is_active=True, course_start_date__isnull=False, **filters).select_related("course")
+            records = (certificate_data_from_admission(student) for student in students.iterator())
+
+        saved = generate_certificates(records, output_format=options["format"], workers=options["workers"], output_dir=options["output_dir"])
+        self.stdout.write(self.style.SUCCESS(f"Generated {len(saved)} certificates in {options['output_dir']}/"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admission.services.enquiry_import import DEFAULT_CHUNK_SIZE, DEFAULT_ENQUIRY_TYPE, import_enquiries, iter_enquiry_rows
+
+
+class Command(BaseCommand):
+    help = "Import admission enquiries (leads) from a .csv or .xlsx file in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .csv or .xlsx lead file")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--enquiry-type", default=DEFAULT_ENQUIRY_TYPE, help="Used for rows without an enquiry type")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and count without inserting")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, "rb") as file:
+                rows = iter_enquiry_rows(file, path)
+                result = import_enquiries(rows, chunk_size=options["chunk_size"], default_enquiry_type=options["enquiry_type"], dry_run=options["dry_run"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for row_number, message in result.errors:
+            self.stdout.write(self.style.WARNING(f"Row {row_number}: {message}"))
+
+        prefix = "Dry run: " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{result.summary()}"))
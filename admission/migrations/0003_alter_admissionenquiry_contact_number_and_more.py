@@ -0,0 +1,13 @@
+# Generated by Django 4.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('admission', '0002_initial')]
+
+    operations = [
+        migrations.AlterField(model_name='admissionenquiry', name='contact_number', field=models.CharField(db_index=True, max_length=100, null=True)),
+        migrations.AlterField(model_name='historicaladmissionenquiry', name='contact_number', field=models.CharField(db_index=True, max_length=100, null=True)),
+    ]
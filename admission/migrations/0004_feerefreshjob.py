@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [migrations.swappable_dependency(settings.AUTH_USER_MODEL), ('admission', '0003_alter_admissionenquiry_contact_number_and_more')]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeRefreshJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=16
+                    ),
+                ),
+                ('student_ids', models.JSONField(blank=True, default=list, help_text='Empty means every admission')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                (
+                    'creator',
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fee_refresh_jobs', to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={'verbose_name': 'Fee Refresh Job', 'verbose_name_plural': 'Fee Refresh Jobs', 'ordering': ('-created',)},
+        ),
+    ]
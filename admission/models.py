@@ -27,7 +27,7 @@ from djmoney.models.fields import MoneyField
 from djmoney.money import Money
 from datetime import datetime
 
-from admission.utils import send_sms
+from admission.utils import absence_message, send_sms
 from masters.models import LeaveRequest, PlacementRequest
 
 phone_validator = RegexValidator(
@@ -153,6 +153,24 @@ class Admission(BaseModel):
         help_text="How the student got placed or internship"
     )
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def statistics_key(self, values=None):
+        """
+        (branch_id, course_id, care_of_id) this admission is counted under on
+        the academic statistics dashboard, or None when it is not an active
+        student. Reads the current attributes or a dict of loaded values.
+        """
+        if values is None:
+            values = {"is_active": self.is_active, "stage_status": self.stage_status, "branch_id": self.branch_id, "course_id": self.course_id, "care_of_id": self.care_of_id}
+        if not values.get("is_active") or values.get("stage_status") != "active":
+            return None
+        return values.get("branch_id"), values.get("course_id"), values.get("care_of_id")
+
     def fullname(self):
         if self.last_name:
             return f"{self.first_name} {self.last_name}"
@@ -447,9 +465,15 @@ class Admission(BaseModel):
         return latest_history.remark if latest_history else ""
     
     def get_placement_status(self):
-        if self.placementhistory_set.filter(joining_status='yes').exists():
+        # Uses the counts from placement_funnel.with_placement_stats when annotated
+        if hasattr(self, "placement_interviews"):
+            interviews, joined = self.placement_interviews, self.placement_joined
+        else:
+            counts = self.placementhistory_set.aggregate(interviews=models.Count("id"), joined=models.Count("id", filter=models.Q(joining_status="true")))
+            interviews, joined = counts["interviews"], counts["joined"]
+        if joined:
             return "Placed"
-        elif self.placementhistory_set.exists():
+        elif interviews:
             return "Interviewed"
         else:
             return "Pending"
@@ -631,54 +655,22 @@ class Attendance(BaseModel):
             
             self.send_absence_sms()
     
-    def send_absence_sms(self):
-        """Send SMS notification for absence"""
+    def send_absence_sms(self, has_leave=None):
+        """Send SMS notification for absence; pass has_leave when the caller already knows it"""
         phone_number = self.student.parent_whatsapp_number
         if not phone_number:
             return False
         
         try:
-            has_leave = LeaveRequest.objects.filter(
-                student=self.student,
-                status='approved',
-                start_date__lte=self.register.date,
-                end_date__gte=self.register.date
-            ).exists()
-
-            if has_leave:
-                message = (
-                    f"*Oxdu Integrated Media School - Leave Notification / അവധി അറിയിപ്പ്*\n\n"
-                    f"*English:*\n"
-                    f"Dear Parent,\n\n"
-                    f"This is to inform you that your child *{self.student.fullname()}* "
-                    f"has an approved leave on *{self.date.strftime('%B %d, %Y')}*.\n"
-                    f"Our records show that the leave request was submitted and approved.\n"
-                    f"This message is just to confirm that you are aware of your child's leave.\n\n"
-                    f"*Malayalam:*\n"
-                    f"പ്രിയപ്പെട്ട രക്ഷിതാവേ,\n\n"
-                    f"താങ്കളുടെ മകന്‍/മകളായ *{self.student.fullname()}* "
-                    f"*{self.date.strftime('%Y-%m-%d')}* തീയതിയില്‍ അവധിയിലാണ്.\n"
-                    f"അവധി അപേക്ഷ സമർപ്പിക്കുകയും അത് അംഗീകരിക്കുകയും ചെയ്തിട്ടുണ്ട്.\n"
-                    f"താങ്കൾ ഈ അവധിയെക്കുറിച്ച് അറിയുന്നുവെന്ന് ഉറപ്പാക്കാനാണ് ഈ സന്ദേശം അയച്ചിരിക്കുന്നത്.\n\n"
-                    f"Regards,\n"
-                    f"*Oxdu Integrated Media School*"
-                )
-            else:
-                message = (
-                    f"*Oxdu Integrated Media School - Attendance Notification / ഹാജര്‍ അറിയിപ്പ്*\n\n"
-                    f"*English:*\n"
-                    f"Dear Parent,\n\n"
-                    f"This is to inform you that your child *{self.student.fullname()}* "
-                    f"was marked absent on *{self.date.strftime('%B %d, %Y')}*.\n"
-                    f"If there is a valid reason for the absence, kindly inform the placement officer and the teacher.\n\n"
-                    f"*Malayalam:*\n"
-                    f"പ്രിയപ്പെട്ട രക്ഷിതാവേ,\n\n"
-                    f"താങ്കളുടെ മകന്‍/മകളായ *{self.student.fullname()}* "
-                    f"*{self.date.strftime('%Y-%m-%d')}* തീയതിയില്‍ ഹാജരായിരുന്നില്ല.\n"
-                    f"ആയതിനാൽ യഥാർത്ഥ കാരണം, ദയവായി പ്ലേസ്മെന്റ് ഓഫീസറേയും അധ്യാപകനേയും അറിയിക്കുക.\n\n"
-                    f"Regards,\n"
-                    f"*Oxdu Integrated Media School*"
-                )
+            if has_leave is None:
+                has_leave = LeaveRequest.objects.filter(
+                    student=self.student,
+                    status='approved',
+                    is_active=True,
+                    start_date__lte=self.register.date,
+                    end_date__gte=self.register.date
+                ).exists()
+            message = absence_message(self.student, self.register.date, on_leave=has_leave)
 
             if send_sms(phone_number, message):
                 self.sms_sent = True
@@ -937,7 +929,7 @@ class AdmissionEnquiry(BaseModel):
     enquiry_type = models.CharField(max_length=80, choices=ENQUIRY_TYPE_CHOICES, default="public_lead")
     tele_caller = models.ForeignKey("employees.Employee", on_delete=models.CASCADE, null=True)
     full_name = models.CharField(max_length=200, null=True)
-    contact_number = models.CharField(max_length=100, null=True)
+    contact_number = models.CharField(max_length=100, null=True, db_index=True)
     city = models.CharField(max_length=180, blank=True, null=True)
     branch = models.ForeignKey("branches.Branch", on_delete=models.CASCADE, limit_choices_to=active_objects, null=True, blank=True)
     course = models.ForeignKey('masters.Course', on_delete=models.CASCADE, limit_choices_to={"is_active": True}, null=True, blank=True)
@@ -970,4 +962,41 @@ class AdmissionEnquiry(BaseModel):
     def get_delete_url(self):
         return reverse_lazy("admission:admission_enquiry_delete", kwargs={"pk": self.pk})
     
-    
\ No newline at end of file
+    
+
+
+class FeeRefreshJob(models.Model):
+    """Progress record of a background fee-structure refresh over many admissions."""
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    creator = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, blank=True, related_name="fee_refresh_jobs")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='pending')
+    student_ids = models.JSONField(default=list, blank=True, help_text="Empty means every admission")
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = "Fee Refresh Job"
+        verbose_name_plural = "Fee Refresh Jobs"
+
+    def __str__(self):
+        return f"Fee refresh #{self.pk} - {self.status} ({self.processed}/{self.total})"
+
+    def get_progress(self):
+        if not self.total:
+            return 100 if self.status == 'completed' else 0
+        return int(self.processed * 100 / self.total)
+
+    def get_status_url(self):
+        return reverse_lazy("admission:fee_refresh_job_status", kwargs={"pk": self.pk})
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from admission.models import Admission
+from admission.utils import get_pusher_client
+from branches.models import Branch
+from employees.models import Employee
+from masters.models import Course
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "academic_statistics_snapshot"
+CACHE_TIMEOUT = 60 * 60
+# Branch, course and telecaller names are not tracked by signals, so the
+# snapshot is rebuilt from scratch at least this often.
+REBUILD_AFTER = 60 * 15
+TOP_TELECALLERS = 6
+
+PUSHER_CHANNEL = "admission-channel"
+PUSHER_EVENT = "academic-stats-delta"
+
+# Cells touched since the last push, per thread; flushed once per commit
+_pending = threading.local()
+
+
+def active_admissions():
+    return Admission.objects.filter(is_active=True, stage_status="active")
+
+
+def eligible_telecallers():
+    """{user_id: display name} of appointed telecallers with an active login."""
+    employees = Employee.objects.filter(user__is_active=True, status="Appointed").filter(Q(user__usertype="tele_caller") | Q(is_also_tele_caller="Yes"))
+    telecallers = {}
+    for user_id, username, first_name, last_name in employees.values_list("user_id", "user__username", "user__first_name", "user__last_name"):
+        telecallers[user_id] = f"{first_name or ''} {last_name or ''}".strip() or username
+    return telecallers
+
+
+def build_snapshot():
+    """
+    Active students per (branch, course) and per telecaller from two grouped
+    queries, with the names needed to render them. Plain values only.
+    """
+    admissions = active_admissions().order_by()
+    cells = Counter({(row["branch"], row["course"]): row["count"] for row in admissions.values("branch", "course").annotate(count=Count("id"))})
+    telecallers = Counter(
+        {row["care_of"]: row["count"] for row in admissions.filter(care_of__isnull=False).values("care_of").annotate(count=Count("id"))}
+    )
+    return {
+        "built": time.time(),
+        "branches": list(Branch.objects.filter(is_active=True).values_list("pk", "name")),
+        "courses": list(Course.objects.filter(is_active=True).order_by("name").values_list("pk", "name")),
+        "telecaller_names": eligible_telecallers(),
+        "cells": cells,
+        "telecallers": telecallers,
+    }
+
+
+def get_snapshot():
+    snapshot = cache.get(CACHE_KEY)
+    if snapshot is None or time.time() - snapshot["built"] > REBUILD_AFTER:
+        snapshot = build_snapshot()
+        cache.set(CACHE_KEY, snapshot, CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_snapshot():
+    cache.delete(CACHE_KEY)
+
+
+def branch_total(snapshot, branch_id):
+    return sum(count for (cell_branch, _course), count in snapshot["cells"].items() if cell_branch == branch_id)
+
+
+def top_telecallers(snapshot):
+    names = snapshot["telecaller_names"]
+    ranked = sorted(((count, user_id) for user_id, count in snapshot["telecallers"].items() if user_id in names and count > 0), key=lambda item: -item[0])
+    return [{"user_id": user_id, "name": names[user_id], "active_count": count} for count, user_id in ranked[:TOP_TELECALLERS]]
+
+
+def dashboard_context(snapshot=None):
+    """AcademicStatisticsReportView context, rendered from the snapshot without touching admissions."""
+    snapshot = snapshot or get_snapshot()
+    branch_stats = []
+    for branch_id, branch_name in snapshot["branches"]:
+        branch_stats.append({
+            "branch_obj": {"id": branch_id, "name": branch_name},
+            "total": branch_total(snapshot, branch_id),
+            "courses": [
+                {"id": course_id, "name": course_name, "branch_course_count": snapshot["cells"].get((branch_id, course_id), 0)}
+                for course_id, course_name in snapshot["courses"]
+            ],
+        })
+    branch_stats.sort(key=lambda item: item["total"], reverse=True)
+    return {
+        "total_students": sum(snapshot["cells"].values()),
+        "telecaller_stats": top_telecallers(snapshot),
+        "branch_stats": branch_stats,
+    }
+
+
+def apply_admission_change(old_key, new_key):
+    """
+    Note the (branch, course) cell and telecaller on both sides of an admission
+    change; once the transaction commits their counts are recomputed from the
+    database into the cached snapshot and pushed. A key of None means "not an
+    active student", so saves that change nothing the dashboard shows are
+    skipped.
+    """
+    if old_key == new_key:
+        return
+    if not hasattr(_pending, "cells"):
+        _pending.cells, _pending.telecallers = set(), set()
+    for key in (old_key, new_key):
+        if key is None:
+            continue
+        branch_id, course_id, care_of_id = key
+        _pending.cells.add((branch_id, course_id))
+        if care_of_id:
+            _pending.telecallers.add(care_of_id)
+    transaction.on_commit(push_pending)
+
+
+def push_pending():
+    """
+    Recount every cell and telecaller noted since the last push and send them
+    in one event. Every change in a transaction registers this, but only the
+    first call after the commit has anything left to do. Counts come from the
+    committed rows, so cells left over from a rolled back transaction are
+    simply recounted. Without a cached snapshot there is nothing to adjust;
+    the next page load builds one.
+    """
+    cells = getattr(_pending, "cells", None)
+    if not cells:
+        return
+    care_of_ids = _pending.telecallers
+    _pending.cells, _pending.telecallers = set(), set()
+
+    snapshot = cache.get(CACHE_KEY)
+    if snapshot is None:
+        return
+
+    before = top_telecallers(snapshot)
+    admissions = active_admissions().order_by()
+    in_cells = Q()
+    for branch_id, course_id in cells:
+        in_cells |= Q(branch=branch_id, course=course_id)
+    counts = {(row["branch"], row["course"]): row["count"] for row in admissions.filter(in_cells).values("branch", "course").annotate(count=Count("id"))}
+    for cell in cells:
+        snapshot["cells"][cell] = counts.get(cell, 0)
+    if care_of_ids:
+        counts = dict(admissions.filter(care_of__in=care_of_ids).values("care_of").annotate(count=Count("id")).values_list("care_of", "count"))
+        for care_of_id in care_of_ids:
+            snapshot["telecallers"][care_of_id] = counts.get(care_of_id, 0)
+    cache.set(CACHE_KEY, snapshot, CACHE_TIMEOUT)
+
+    push_delta({
+        "total_students": sum(snapshot["cells"].values()),
+        "branches": {str(branch_id): branch_total(snapshot, branch_id) for branch_id in {branch_id for branch_id, _course in cells}},
+        "cells": {f"{branch_id}-{course_id}": snapshot["cells"][(branch_id, course_id)] for branch_id, course_id in cells},
+        "telecallers_changed": before != top_telecallers(snapshot),
+    })
+
+
+def push_delta(delta):
+    try:
+        get_pusher_client().trigger(PUSHER_CHANNEL, PUSHER_EVENT, delta)
+    except Exception as e:
+        logger.warning(f"Academic statistics push failed: {e}")
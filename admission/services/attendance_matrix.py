@@ -0,0 +1,190 @@
+import calendar
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from admission.models import Admission, Attendance, StudentStageStatusHistory
+from masters.models import Holiday, LeaveRequest
+
+# One character per day in every row of the matrix.
+STATUS_PRESENT = "P"
+STATUS_ABSENT = "A"
+STATUS_LEAVE = "L"  # Absent, with a leave request on file for the day
+STATUS_HOLIDAY = "H"
+STATUS_EMPTY = "-"
+
+STATUS_CODES = {
+    STATUS_PRESENT: "Present",
+    STATUS_ABSENT: "Absent",
+    STATUS_LEAVE: "Leave",
+    STATUS_HOLIDAY: "Holiday",
+    STATUS_EMPTY: "No Data",
+}
+
+ATTENDANCE_CODE_MAP = {
+    "Present": STATUS_PRESENT,
+    "Absent": STATUS_ABSENT,
+    "Holiday": STATUS_HOLIDAY,
+}
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _version_key(year, month):
+    return f"attendance_matrix_version:{year}-{month:02d}"
+
+
+def _matrix_cache_key(year, month, branch_id=None, batch_id=None, course_id=None):
+    version = cache.get(_version_key(year, month), 0)
+    return f"attendance_matrix:{branch_id or 'all'}:{batch_id or 'all'}:{course_id or 'all'}:{year}-{month:02d}:v{version}"
+
+
+def invalidate_attendance_matrix(year, month):
+    """
+    Drop every cached matrix of the given month by bumping its version key.
+    """
+    key = _version_key(year, month)
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_matrix_students(year, month, branch_id=None, batch_id=None, course_id=None):
+    """
+    Students shown on the month grid: active ones, plus anyone whose stage
+    changed on or after the first of the month.
+    """
+    month_start = date(year, month, 1)
+    changed_this_month = StudentStageStatusHistory.objects.filter(student=OuterRef("pk"), created__gte=month_start)
+
+    students = Admission.objects.filter(is_active=True, batch__status="in_progress").filter(Q(stage_status="active") | Exists(changed_this_month))
+    if course_id:
+        students = students.filter(course_id=course_id)
+    if branch_id:
+        students = students.filter(branch_id=branch_id)
+    if batch_id:
+        students = students.filter(batch_id=batch_id)
+    return students
+
+
+def get_holiday_days(year, month):
+    """
+    Return ({day: None | set(branch_ids)}, {day: name}) for the month; a value
+    of None means the holiday applies to every branch.
+    """
+    days_in_month = calendar.monthrange(year, month)[1]
+    holiday_days = {}
+    holiday_names = {}
+
+    for day in range(1, days_in_month + 1):
+        is_auto_holiday, name = Holiday.is_auto_holiday(date(year, month, day))
+        if is_auto_holiday:
+            holiday_days[day] = None
+            holiday_names[day] = name
+
+    rows = Holiday.objects.filter(is_active=True, date__year=year, date__month=month).values_list("date", "scope", "name", "branch")
+    for holiday_date, scope, name, branch_id in rows:
+        day = holiday_date.day
+        holiday_names.setdefault(day, name)
+        if scope == "all":
+            holiday_days[day] = None
+        elif day not in holiday_days or holiday_days[day] is not None:
+            holiday_days.setdefault(day, set())
+            if branch_id:
+                holiday_days[day].add(branch_id)
+    return holiday_days, holiday_names
+
+
+def build_attendance_matrix(year, month, branch_id=None, batch_id=None, course_id=None):
+    """
+    Build the columnar month payload: parallel student lists plus one packed
+    status string per student (one character per day, see STATUS_CODES).
+    """
+    days_in_month = calendar.monthrange(year, month)[1]
+    month_start = date(year, month, 1)
+    month_end = date(year, month, days_in_month)
+
+    student_qs = get_matrix_students(year, month, branch_id, batch_id, course_id)
+    students = list(
+        student_qs.order_by("batch__batch_name", "first_name", "last_name").values_list(
+            "id", "first_name", "last_name", "admission_number", "branch_id", "batch__batch_name", "stage_status"
+        )
+    )
+
+    marks = {}
+    attendance = Attendance.objects.filter(
+        is_active=True, register__date__range=(month_start, month_end), student_id__in=student_qs.values("id")
+    ).values_list("student_id", "register__date", "status")
+    for student_id, register_date, status in attendance:
+        marks[(student_id, register_date.day)] = ATTENDANCE_CODE_MAP.get(status, STATUS_EMPTY)
+
+    leave_days = set()
+    leaves = LeaveRequest.objects.filter(
+        student_id__in=student_qs.values("id"), start_date__lte=month_end, end_date__gte=month_start
+    ).values_list("student_id", "start_date", "end_date")
+    for student_id, start_date, end_date in leaves:
+        first_day = max(start_date, month_start).day
+        last_day = min(end_date, month_end).day
+        leave_days.update((student_id, day) for day in range(first_day, last_day + 1))
+
+    holiday_days, holiday_names = get_holiday_days(year, month)
+
+    payload = {
+        "year": year,
+        "month": month,
+        "days": days_in_month,
+        "codes": STATUS_CODES,
+        "holidays": {str(day): name for day, name in sorted(holiday_names.items())},
+        "students": [],
+        "names": [],
+        "admission_numbers": [],
+        "batches": [],
+        "stage_statuses": [],
+        "rows": [],
+        "totals": {"present": [], "absent": [], "holiday": []},
+    }
+    for student_id, first_name, last_name, admission_number, student_branch_id, batch_name, stage_status in students:
+        codes = []
+        for day in range(1, days_in_month + 1):
+            holiday_branches = holiday_days.get(day, False)
+            if holiday_branches is None or (holiday_branches and student_branch_id in holiday_branches):
+                codes.append(STATUS_HOLIDAY)
+                continue
+
+            code = marks.get((student_id, day))
+            on_leave = (student_id, day) in leave_days
+            if code == STATUS_ABSENT and on_leave:
+                code = STATUS_LEAVE
+            elif code is None:
+                code = STATUS_LEAVE if on_leave else STATUS_EMPTY
+            codes.append(code)
+
+        row = "".join(codes)
+        payload["students"].append(student_id)
+        payload["names"].append(f"{first_name or ''} {last_name or ''}".strip())
+        payload["admission_numbers"].append(admission_number)
+        payload["batches"].append(batch_name)
+        payload["stage_statuses"].append(stage_status)
+        payload["rows"].append(row)
+        payload["totals"]["present"].append(row.count(STATUS_PRESENT))
+        payload["totals"]["absent"].append(row.count(STATUS_ABSENT) + row.count(STATUS_LEAVE))
+        payload["totals"]["holiday"].append(row.count(STATUS_HOLIDAY))
+
+    return payload
+
+
+def get_attendance_matrix(year, month, branch_id=None, batch_id=None, course_id=None):
+    """
+    Cached wrapper around build_attendance_matrix, keyed per (branch, batch,
+    course, month) and invalidated by invalidate_attendance_matrix.
+    """
+    key = _matrix_cache_key(year, month, branch_id, batch_id, course_id)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = build_attendance_matrix(year, month, branch_id, batch_id, course_id)
+        cache.set(key, matrix, CACHE_TIMEOUT)
+    return matrix
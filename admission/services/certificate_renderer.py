@@ -0,0 +1,249 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+from io import BytesIO
+
+import openpyxl
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+from PIL import Image, ImageDraw, ImageFont
+
+ASSETS_DIR = os.path.join(settings.BASE_DIR, "static", "app", "assets")
+CERTIFICATE_IMAGE = os.path.join(ASSETS_DIR, "images", "certificate_template.jpg")
+FONT_PATH_BOLD = os.path.join(ASSETS_DIR, "font", "Poppins", "Poppins-Bold.ttf")
+FONT_PATH_REGULAR = os.path.join(ASSETS_DIR, "font", "Poppins", "Poppins-Regular.ttf")
+
+FONT_SIZE_LARGE = 45  # For Issue Date, ID Number
+FONT_SIZE_BODY_TEXT = 50  # For the paragraph body text
+TEXT_COLOR = (0, 0, 0)
+
+FIELD_POSITIONS = {
+    "issue_date": (600, 1503),
+    "id_number": (2060, 1500),
+}
+BODY_TEXT_POSITION = (250, 1835)
+BODY_MAX_WIDTH = 1950
+BODY_LINE_SPACING = 80
+
+BODY_TEXT_TEMPLATE = (
+    "This is to proudly certify {full_name} has successfully completed "
+    "the professional course {course} offered by Oxdu Integrated Media School, "
+    "held from {joined_date} to {end_date}. We commend their dedication and effort "
+    "in acquiring advanced knowledge and practical skills in Digital Marketing, "
+    "enhanced by cutting-edge artificial intelligence technologies."
+)
+
+COURSE_DURATION_MONTHS = 4
+OUTPUT_DIR = "certificates"
+FORMAT_PDF = "pdf"
+FORMAT_JPEG = "jpeg"
+SPREADSHEET_HEADERS = {
+    "Full Name": "full_name",
+    "Course": "course",
+    "Joined Date": "joined_date",
+    "End Date": "end_date",
+    "Issue Date": "issue_date",
+    "ID Number": "id_number",
+}
+
+# Per-process state, filled lazily (or by the pool initializer in workers).
+_template = None
+
+
+def get_template_image():
+    """The decoded certificate background; callers draw on a copy."""
+    global _template
+    if _template is None:
+        with Image.open(CERTIFICATE_IMAGE) as image:
+            _template = image.convert("RGB")
+            _template.load()
+    return _template
+
+
+@lru_cache(maxsize=None)
+def load_font(path, size):
+    try:
+        return ImageFont.truetype(path, size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=65536)
+def text_width(font, text):
+    bbox = font.getbbox(text)
+    return bbox[2] - bbox[0]
+
+
+@lru_cache(maxsize=None)
+def line_height(font):
+    bbox = font.getbbox("A")
+    return bbox[3] - bbox[1]
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(str(value), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def format_date_long(value):
+    parsed = _parse_date(value)
+    return f"{parsed:%B} {parsed.day} {parsed.year}" if parsed else str(value or "")
+
+
+def format_date_dmy(value):
+    parsed = _parse_date(value)
+    return f"{parsed.day}/{parsed.month}/{parsed.year}" if parsed else str(value or "")
+
+
+def wrap_words(full_text, bold_parts, font_regular, font_bold, max_width):
+    """Split text into lines of (text, font) tokens, keeping bold phrases whole."""
+    space_width = text_width(font_regular, " ")
+    bold_phrases = [(phrase.split(), phrase) for phrase in bold_parts if phrase]
+    words = full_text.split()
+
+    lines = []
+    current_line = []
+    current_width = 0
+    i = 0
+    while i < len(words):
+        token, font, consumed = words[i], font_regular, 1
+        for phrase_words, phrase in bold_phrases:
+            if words[i:i + len(phrase_words)] == phrase_words:
+                token, font, consumed = phrase, font_bold, len(phrase_words)
+                break
+
+        width = text_width(font, token)
+        if current_line and current_width + width > max_width:
+            lines.append(current_line)
+            current_line = []
+            current_width = 0
+            continue
+
+        current_line.append((token, font))
+        current_width += width + space_width
+        i += consumed
+
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def draw_justified(draw, lines, position, font_regular, fill, max_width, line_spacing):
+    x, y = position
+    space_width = text_width(font_regular, " ")
+    step = line_height(font_regular) + line_spacing
+
+    for line_num, line in enumerate(lines):
+        line_x = x
+        justify = line_num != len(lines) - 1 and len(line) > 1
+        extra_space = 0
+        if justify:
+            extra_space = (max_width - sum(text_width(font, token) for token, font in line)) // (len(line) - 1)
+
+        for token, font in line:
+            draw.text((line_x, y), token, font=font, fill=fill)
+            line_x += text_width(font, token) + (space_width + extra_space if justify else space_width)
+        y += step
+
+
+def render_certificate(data, output_format=FORMAT_PDF):
+    """Draw one certificate from a data dict and return the encoded file bytes."""
+    image = get_template_image().copy()
+    draw = ImageDraw.Draw(image)
+
+    font_bold_large = load_font(FONT_PATH_BOLD, FONT_SIZE_LARGE)
+    font_regular = load_font(FONT_PATH_REGULAR, FONT_SIZE_BODY_TEXT)
+    font_bold = load_font(FONT_PATH_BOLD, FONT_SIZE_BODY_TEXT)
+
+    for field, position in FIELD_POSITIONS.items():
+        text = data.get(field)
+        if text:
+            if field == "issue_date":
+                text = format_date_long(text)
+            draw.text(position, str(text), fill=TEXT_COLOR, font=font_bold_large)
+
+    full_name = str(data.get("full_name") or "")
+    course = str(data.get("course") or "")
+    body_text = BODY_TEXT_TEMPLATE.format(
+        full_name=full_name, course=course, joined_date=format_date_dmy(data.get("joined_date")), end_date=format_date_dmy(data.get("end_date"))
+    )
+    lines = wrap_words(body_text, (full_name, course), font_regular, font_bold, BODY_MAX_WIDTH)
+    draw_justified(draw, lines, BODY_TEXT_POSITION, font_regular, TEXT_COLOR, BODY_MAX_WIDTH, BODY_LINE_SPACING)
+
+    buffer = BytesIO()
+    if output_format == FORMAT_JPEG:
+        image.save(buffer, "JPEG", quality=90)
+    else:
+        image.save(buffer, "PDF", resolution=100.0)
+    return buffer.getvalue()
+
+
+def certificate_data_from_admission(admission, issue_date=None):
+    start_date = admission.course_start_date
+    return {
+        "full_name": admission.fullname(),
+        "course": admission.course.name if admission.course else "",
+        "joined_date": start_date,
+        "end_date": start_date + relativedelta(months=COURSE_DURATION_MONTHS) if start_date else None,
+        "issue_date": issue_date or date.today(),
+        "id_number": admission.admission_number,
+    }
+
+
+def iter_spreadsheet_certificates(path):
+    """Stream certificate rows from a workbook whose first row holds the headers."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [SPREADSHEET_HEADERS.get(header) for header in next(rows, ())]
+        for row in rows:
+            data = {key: value for key, value in zip(headers, row) if key}
+            if data.get("full_name"):
+                yield data
+    finally:
+        workbook.close()
+
+
+def certificate_filename(data, output_format=FORMAT_PDF):
+    extension = "jpg" if output_format == FORMAT_JPEG else "pdf"
+    name = slugify(data.get("full_name") or "certificate")
+    if data.get("id_number"):
+        name = f"{slugify(data['id_number'])}_{name}"
+    return f"{name}.{extension}"
+
+
+def _init_worker():
+    get_template_image()
+
+
+def _render_job(job):
+    data, output_format = job
+    return certificate_filename(data, output_format), render_certificate(data, output_format)
+
+
+def generate_certificates(records, output_format=FORMAT_PDF, workers=None, output_dir=OUTPUT_DIR, chunksize=8):
+    """
+    Render certificates for an iterable of data dicts in a process pool and
+    save them to media storage. Returns the stored file names.
+    """
+    jobs = ((data, output_format) for data in records)
+    saved = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for filename, content in pool.map(_render_job, jobs, chunksize=chunksize):
+            path = f"{output_dir}/{filename}"
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            saved.append(default_storage.save(path, ContentFile(content)))
+    return saved
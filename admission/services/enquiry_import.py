@@ -0,0 +1,175 @@
+import codecs
+import csv
+import re
+from itertools import islice
+
+import openpyxl
+from django.db import transaction
+from simple_history.utils import bulk_create_with_history
+
+from admission.models import AdmissionEnquiry
+from core.choices import ENQUIRY_TYPE_CHOICES
+from core.services.search_index import index_instances
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_ENQUIRY_TYPE = "public_lead"
+VALID_ENQUIRY_TYPES = {value for value, _ in ENQUIRY_TYPE_CHOICES}
+ENQUIRY_TYPE_LABELS = {label.lower(): value for value, label in ENQUIRY_TYPE_CHOICES}
+
+# Column order of the two upload formats (the csv template differs from the xlsx one).
+XLSX_COLUMNS = ("contact_number", "full_name", "city", "enquiry_type")
+XLSX_FIRST_ROW = 3
+CSV_COLUMNS = ("full_name", "city", "contact_number", "enquiry_type")
+
+
+class EnquiryImportResult:
+    """Counters and per-row errors collected while importing a lead file."""
+
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.duplicates = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def summary(self):
+        return f"{self.created} created, {self.duplicates} duplicates skipped, {self.failed} invalid out of {self.total} rows"
+
+
+def _row_to_dict(row, columns):
+    return {name: (row[index] if index < len(row) else None) for index, name in enumerate(columns)}
+
+
+def iter_xlsx_rows(file):
+    """
+    Yield (row_number, row_dict) from the active sheet without loading the
+    whole workbook into memory.
+    """
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        for row_number, row in enumerate(sheet.iter_rows(min_row=XLSX_FIRST_ROW, values_only=True), start=XLSX_FIRST_ROW):
+            yield row_number, _row_to_dict(row, XLSX_COLUMNS)
+    finally:
+        workbook.close()
+
+
+def iter_csv_rows(file):
+    """
+    Yield (row_number, row_dict) from a binary csv stream, skipping the header.
+    """
+    reader = csv.reader(codecs.iterdecode(file, "utf-8-sig"))
+    next(reader, None)
+    for row_number, row in enumerate(reader, start=2):
+        yield row_number, _row_to_dict(row, CSV_COLUMNS)
+
+
+def iter_enquiry_rows(file, filename):
+    name = filename.lower()
+    if name.endswith(".xlsx"):
+        return iter_xlsx_rows(file)
+    if name.endswith(".csv"):
+        return iter_csv_rows(file)
+    raise ValueError("Unsupported file type. Please upload .xlsx or .csv.")
+
+
+def normalize_phone(value):
+    """Return the digits of a phone number cell; Excel hands numbers back as floats."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return re.sub(r"\D", "", str(value))
+
+
+def _clean_text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _clean_enquiry_type(value, default):
+    value = _clean_text(value)
+    if not value:
+        return default
+    key = value.lower()
+    if key in VALID_ENQUIRY_TYPES:
+        return key
+    return ENQUIRY_TYPE_LABELS.get(key)
+
+
+def validate_row(row, default_enquiry_type=DEFAULT_ENQUIRY_TYPE):
+    """Return (cleaned_data, error_message) for one uploaded row."""
+    phone = normalize_phone(row.get("contact_number"))
+    if not phone:
+        return None, "Contact number is missing"
+    if not 10 <= len(phone) <= 15:
+        return None, f"Invalid contact number '{row.get('contact_number')}'"
+
+    enquiry_type = _clean_enquiry_type(row.get("enquiry_type"), default_enquiry_type)
+    if enquiry_type is None:
+        return None, f"Unknown enquiry type '{row.get('enquiry_type')}'"
+
+    return {
+        "contact_number": phone,
+        "full_name": _clean_text(row.get("full_name")),
+        "city": _clean_text(row.get("city")),
+        "enquiry_type": enquiry_type,
+    }, None
+
+
+def _existing_numbers(numbers):
+    """One indexed lookup per chunk; also matches numbers stored without the country code."""
+    candidates = set(numbers) | {number[-10:] for number in numbers}
+    existing = AdmissionEnquiry.objects.filter(contact_number__in=candidates).values_list("contact_number", flat=True)
+    return {normalize_phone(number)[-10:] for number in existing}
+
+
+def _import_chunk(chunk, result, seen, default_enquiry_type, creator, dry_run):
+    valid = []
+    for row_number, row in chunk:
+        result.total += 1
+        data, error = validate_row(row, default_enquiry_type)
+        if error:
+            result.add_error(row_number, error)
+            continue
+        valid.append((row_number, data))
+
+    existing = _existing_numbers([data["contact_number"] for _, data in valid])
+    enquiries = []
+    for _, data in valid:
+        key = data["contact_number"][-10:]
+        if key in existing or key in seen:
+            result.duplicates += 1
+            continue
+        seen.add(key)
+        enquiries.append(AdmissionEnquiry(creator=creator, **data))
+
+    if enquiries and not dry_run:
+        with transaction.atomic():
+            created = bulk_create_with_history(enquiries, AdmissionEnquiry, batch_size=len(enquiries), default_user=creator)
+            index_instances("lead", created)
+    result.created += len(enquiries)
+
+
+def import_enquiries(rows, chunk_size=DEFAULT_CHUNK_SIZE, default_enquiry_type=DEFAULT_ENQUIRY_TYPE, creator=None, dry_run=False):
+    """
+    Import (row_number, row_dict) pairs in chunks: validate, drop numbers that
+    already exist (in the database or earlier in the file) and bulk insert.
+    """
+    result = EnquiryImportResult()
+    seen = set()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        _import_chunk(chunk, result, seen, default_enquiry_type, creator, dry_run)
+    return result
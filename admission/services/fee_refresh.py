@@ -1,5 +1,16 @@
-from django.db import transaction
-from admission.models import Admission
+import logging
+import threading
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from admission.models import Admission, FeeRefreshJob
+
+logger = logging.getLogger(__name__)
+
+FEE_REFRESH_CHUNK_SIZE = 100
+
 
 def refresh_fee_structure_for_student(student: Admission):
     """
@@ -19,3 +30,56 @@ def refresh_fee_structure_queryset(queryset):
         refresh_fee_structure_for_student(student)
         count += 1
     return count
+
+
+def _fee_refresh_queryset(job):
+    queryset = Admission.objects.filter(fee_type__in=["installment", "one_time", "finance"]).select_related("course")
+    if job.student_ids:
+        queryset = queryset.filter(id__in=job.student_ids)
+    return queryset.order_by("id")
+
+
+def run_fee_refresh_job(job_id, chunk_size=FEE_REFRESH_CHUNK_SIZE):
+    """
+    Refresh the job's admissions chunk by chunk, recording progress on the
+    job row after every chunk so the UI can poll it.
+    """
+    job = FeeRefreshJob.objects.get(pk=job_id)
+    queryset = _fee_refresh_queryset(job)
+    ids = list(queryset.values_list("id", flat=True))
+    FeeRefreshJob.objects.filter(pk=job_id).update(status="running", total=len(ids))
+
+    try:
+        for start in range(0, len(ids), chunk_size):
+            failed = 0
+            chunk = queryset.filter(id__in=ids[start:start + chunk_size])
+            for student in chunk:
+                try:
+                    refresh_fee_structure_for_student(student)
+                except Exception:
+                    failed += 1
+                    logger.exception("Fee refresh failed for admission %s", student.pk)
+            FeeRefreshJob.objects.filter(pk=job_id).update(processed=F("processed") + len(ids[start:start + chunk_size]), failed=F("failed") + failed)
+    except Exception as e:
+        logger.exception("Fee refresh job %s failed", job_id)
+        FeeRefreshJob.objects.filter(pk=job_id).update(status="failed", error=str(e), finished_at=timezone.now())
+        return
+
+    FeeRefreshJob.objects.filter(pk=job_id).update(status="completed", finished_at=timezone.now())
+
+
+def _run_in_thread(job_id):
+    try:
+        run_fee_refresh_job(job_id)
+    finally:
+        connection.close()
+
+
+def start_fee_refresh_job(student_ids=None, user=None):
+    """
+    Queue a fee refresh for the given admissions (all when empty) and run it
+    in a background thread once the surrounding transaction commits.
+    """
+    job = FeeRefreshJob.objects.create(creator=user, student_ids=[int(pk) for pk in student_ids or []])
+    transaction.on_commit(lambda: threading.Thread(target=_run_in_thread, args=(job.pk,), daemon=True).start())
+    return job
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from admission.models import Admission, StudentStageStatusHistory
+from admission.services.academic_statistics import invalidate_snapshot
+from admission.services.attendance_matrix import invalidate_attendance_matrix
+from admission.services.student_profile import invalidate_student_profile
+
+BULK_BATCH_SIZE = 500
+
+
+def bulk_change_stage(students, new_status, remark="", user=None):
+    """
+    Move every admission in `students` to `new_status` with set-based writes.
+
+    Only the stage-related side effect of Admission.save (the linked user's
+    active flag) is applied; fee receipts and fee structures do not depend on
+    the stage, so they are left alone. bulk_update skips post_save, so the
+    caches fed by the Admission signals are dropped here instead. Returns the
+    number of admissions changed.
+    """
+    # Full rows: the history records copy every tracked field, and a deferred
+    # field would cost a refresh_from_db per admission
+    admissions = list(students)
+    if not admissions:
+        return 0
+
+    now = timezone.now()
+    history_records = []
+    for admission in admissions:
+        history_records.append(
+            StudentStageStatusHistory(
+                student_id=admission.id,
+                status=new_status,
+                creator=user,
+                remark=f"Bulk update: {remark} (Changed from {admission.stage_status} to {new_status})",
+            )
+        )
+        admission.stage_status = new_status
+        admission.updated = now
+
+    user_ids = [admission.user_id for admission in admissions if admission.user_id]
+
+    with transaction.atomic():
+        bulk_update_with_history(admissions, Admission, ["stage_status", "updated"], batch_size=BULK_BATCH_SIZE, default_user=user)
+        bulk_create_with_history(history_records, StudentStageStatusHistory, batch_size=BULK_BATCH_SIZE, default_user=user)
+        if user_ids:
+            get_user_model().objects.filter(id__in=user_ids).update(is_active=new_status == "active")
+
+    invalidate_attendance_matrix(now.year, now.month)
+    invalidate_snapshot()
+    invalidate_student_profile(*(admission.pk for admission in admissions))
+    return len(admissions)
@@ -0,0 +1,304 @@
+import calendar
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import DecimalField, ExpressionWrapper, F, Prefetch, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from admission.models import Admission, Attendance, FeeReceipt, FeeStructure
+from masters.models import Holiday, LeaveRequest, PlacementHistory
+
+CACHE_TIMEOUT = 60 * 60
+VERSION_KEY = "student_profile_version"
+
+LEAVE_STATUSES = ("approved", "pending", "rejected")
+
+
+def _cache_key(student_id):
+    return f"student_profile:{student_id}:v{cache.get(VERSION_KEY, 0)}"
+
+
+def invalidate_student_profile(*student_ids):
+    cache.delete_many([_cache_key(student_id) for student_id in student_ids if student_id])
+
+
+def invalidate_all_student_profiles():
+    """Holidays shift the approved leave days of every student, so they drop all profiles at once."""
+    if cache.add(VERSION_KEY, 1, None):
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def profile_queryset():
+    """
+    Admissions with every per-student section attached through a fixed set of
+    prefetches, so building a profile costs the same handful of queries no
+    matter how many receipts, attendance rows or leaves a student has.
+    """
+    remaining = ExpressionWrapper(
+        Coalesce(F("amount"), Value(Decimal("0.00"))) - F("paid_amount"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return Admission.objects.select_related("course", "branch", "batch").prefetch_related(
+        Prefetch("feereceipt_set", queryset=FeeReceipt.objects.filter(is_active=True).order_by("-date"), to_attr="profile_receipts"),
+        "profile_receipts__payment_methods",
+        Prefetch("feestructure_set", queryset=FeeStructure.objects.annotate(remaining=remaining).order_by("installment_no"), to_attr="profile_fee_structures"),
+        Prefetch(
+            "attendance_set",
+            queryset=Attendance.objects.filter(is_active=True, register__is_active=True)
+            .annotate(register_date=F("register__date"))
+            .only("student_id", "status")
+            .order_by("-register__date"),
+            to_attr="profile_attendance",
+        ),
+        Prefetch("leaverequest_set", queryset=LeaveRequest.objects.filter(is_active=True).order_by("-start_date"), to_attr="profile_leaves"),
+        Prefetch("placementhistory_set", queryset=PlacementHistory.objects.order_by("-interview_date"), to_attr="profile_placements"),
+    )
+
+
+def branch_holidays(branch_id, start, end):
+    """Holidays between start and end (inclusive) that apply to the branch."""
+    scope = Q(scope="all") | Q(branch=branch_id) if branch_id else Q(scope="all")
+    return Holiday.objects.filter(is_active=True, date__range=(start, end)).filter(scope).distinct()
+
+
+def percentage(part, whole):
+    return round((part / whole) * 100, 1) if whole else 0
+
+
+def fee_section(student):
+    receipts = []
+    payments = []
+    total_paid = Decimal("0.00")
+    for receipt in student.profile_receipts:
+        methods = [{"id": method.pk, "payment_type": method.payment_type, "amount": method.amount, "note": method.note} for method in receipt.payment_methods.all()]
+        amount = sum((method["amount"] for method in methods), Decimal("0.00"))
+        total_paid += amount
+        url = str(receipt.get_absolute_url())
+        receipts.append(
+            {"id": receipt.pk, "receipt_no": receipt.receipt_no, "date": receipt.date, "status": receipt.status, "amount": amount, "url": url, "payment_methods": methods}
+        )
+        payments.extend({"receipt_id": receipt.pk, "receipt_no": receipt.receipt_no, "date": receipt.date, "url": url, **method} for method in methods)
+
+    structures = []
+    for fee in student.profile_fee_structures:
+        amount = fee.amount or Decimal("0.00")
+        structures.append({
+            "id": fee.pk,
+            "installment_no": fee.installment_no,
+            "name": fee.name,
+            "amount": amount,
+            "paid_amount": fee.paid_amount,
+            "remaining": fee.remaining,
+            "payment_percentage": round(fee.paid_amount / amount * 100, 2) if amount > 0 else Decimal("100.00"),
+            "payment_date": fee.payment_date,
+            "due_date": fee.due_date,
+            "is_paid": fee.is_paid,
+        })
+
+    course_fee = student.course.fees if student.course else Decimal("0.00")
+    discount = student.discount_amount or Decimal("0.00")
+    net_fee = course_fee - discount if student.course else Decimal("0.00")
+    return {
+        "course_fee": course_fee,
+        "discount": discount,
+        "net_fee": net_fee,
+        "total_paid": total_paid,
+        "balance_amount": net_fee - total_paid if student.course else Decimal("0.00"),
+        # What is still open on the installment plan (net of discount)
+        "balance_due": sum((fee["remaining"] for fee in structures), Decimal("0.00")),
+        "receipts": receipts,
+        "payments": payments,
+        "structures": structures,
+    }
+
+
+def leave_section(student):
+    counts = Counter(leave.status for leave in student.profile_leaves)
+    approved = [leave for leave in student.profile_leaves if leave.status == "approved"]
+
+    holiday_dates = set()
+    if approved:
+        start = min(leave.start_date for leave in approved)
+        end = max(leave.end_date for leave in approved)
+        holiday_dates = set(branch_holidays(student.branch_id, start, end).values_list("date", flat=True))
+
+    leave_dates = set()
+    approved_days = 0
+    for leave in approved:
+        current = leave.start_date
+        while current <= leave.end_date:
+            if current not in holiday_dates and not Holiday.is_auto_holiday(current)[0]:
+                leave_dates.add(current)
+                approved_days += 1
+            current += timedelta(days=1)
+
+    return {
+        "approved": counts["approved"],
+        "pending": counts["pending"],
+        "rejected": counts["rejected"],
+        "approved_days": approved_days,
+        "approved_dates": sorted(leave_dates),
+        "items": [
+            {"id": leave.pk, "subject": leave.subject, "start_date": leave.start_date, "end_date": leave.end_date, "status": leave.status, "reason": leave.reason}
+            for leave in student.profile_leaves
+        ],
+    }
+
+
+def attendance_section(student, leave_dates):
+    """Attendance on days covered by an approved leave is listed but left out of the totals."""
+    records = []
+    present_dates = []
+    absent_dates = []
+    late = working = 0
+    for record in student.profile_attendance:
+        on_leave = record.register_date in leave_dates
+        records.append({"date": record.register_date, "status": record.status, "on_leave": on_leave})
+        if on_leave:
+            continue
+        working += 1
+        if record.status == "Present":
+            present_dates.append(record.register_date)
+        elif record.status == "Absent":
+            absent_dates.append(record.register_date)
+        elif record.status == "Late":
+            late += 1
+
+    return {
+        "total_working_days": working,
+        "total_present": len(present_dates),
+        "total_absent": len(absent_dates),
+        "total_late": late,
+        "attendance_percentage": percentage(len(present_dates) + late, working),
+        "present_percentage": percentage(len(present_dates), working),
+        "absent_percentage": percentage(len(absent_dates), working),
+        "present_dates": present_dates,
+        "absent_dates": absent_dates,
+        # Days marked both present and absent (duplicate registers)
+        "conflicting_dates": sorted(set(present_dates) & set(absent_dates)),
+        "records": records,
+    }
+
+
+def placement_section(student):
+    items = [
+        {
+            "id": placement.pk,
+            "company_name": placement.company_name,
+            "designation": placement.designation,
+            "interview_type": placement.interview_type,
+            "interview_date": placement.interview_date,
+            "interview_status": placement.interview_status,
+            "attended_status": placement.attended_status,
+            "joining_status": placement.joining_status,
+            "joining_date": placement.joining_date,
+        }
+        for placement in student.profile_placements
+    ]
+    joined = sum(1 for item in items if item["joining_status"] == "true")
+    return {
+        "status": "Placed" if joined else "Interviewed" if items else "Pending",
+        "interviews": len(items),
+        "attended": sum(1 for item in items if item["attended_status"] == "true"),
+        "joined": joined,
+        "items": items,
+    }
+
+
+def build_profile(student_id):
+    """
+    Every per-student section of the profile and fee overview pages as plain
+    values (dates, Decimals, dicts and lists), so the same result can be
+    cached, rendered by templates and returned as JSON.
+    """
+    student = profile_queryset().get(pk=student_id)
+    leaves = leave_section(student)
+    return {
+        "student": {
+            "id": student.pk,
+            "fullname": student.fullname(),
+            "admission_number": student.admission_number,
+            "stage_status": student.stage_status,
+            "branch_id": student.branch_id,
+            "branch": str(student.branch) if student.branch else None,
+            "course": str(student.course) if student.course else None,
+            "batch": str(student.batch) if student.batch else None,
+        },
+        "fees": fee_section(student),
+        "attendance": attendance_section(student, set(leaves["approved_dates"])),
+        "leaves": leaves,
+        "placements": placement_section(student),
+    }
+
+
+def get_profile(student_id):
+    """Cached build_profile; raises Admission.DoesNotExist for unknown students."""
+    key = _cache_key(student_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = build_profile(student_id)
+        cache.set(key, profile, CACHE_TIMEOUT)
+    return profile
+
+
+def calendar_days(profile, year, month):
+    """
+    Month grid for the profile calendar (weeks start on Sunday), built from the
+    cached profile plus one holiday query for the month.
+    """
+    first_day = date(year, month, 1)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+
+    leave_info = {}
+    for leave in profile["leaves"]["items"]:
+        if leave["status"] != "approved" or leave["start_date"] > last_day or leave["end_date"] < first_day:
+            continue
+        current = max(leave["start_date"], first_day)
+        while current <= min(leave["end_date"], last_day):
+            leave_info[current] = {"type": "approved_leave", "reason": leave["reason"]}
+            current += timedelta(days=1)
+
+    attendance = {
+        record["date"]: "approved_leave" if record["date"] in leave_info else record["status"].lower()
+        for record in profile["attendance"]["records"]
+        if record["date"] and first_day <= record["date"] <= last_day
+    }
+
+    holidays = {}
+    for holiday_date, name, is_auto in branch_holidays(profile["student"]["branch_id"], first_day, last_day).values_list("date", "name", "is_auto_holiday"):
+        holidays[holiday_date] = {"name": name, "is_auto": is_auto}
+
+    today = timezone.now().date()
+    days = []
+    for week in calendar.Calendar(firstweekday=6).monthdayscalendar(year, month):
+        for day in week:
+            if not day:
+                days.append({"date": None, "status": "empty", "is_today": False, "is_holiday": False})
+                continue
+            current = date(year, month, day)
+            if current not in holidays:
+                is_auto, name = Holiday.is_auto_holiday(current)
+                if is_auto:
+                    holidays[current] = {"name": name, "is_auto": True}
+            if current in holidays:
+                status = "holiday"
+            elif current in leave_info:
+                status = "approved_leave"
+            else:
+                status = attendance.get(current, "normal")
+            days.append({
+                "date": current,
+                "status": status,
+                "is_today": current == today,
+                "is_holiday": status == "holiday",
+                "is_approved_leave": status == "approved_leave",
+                "holiday_info": holidays.get(current) or leave_info.get(current),
+            })
+    return days
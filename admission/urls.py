@@ -24,11 +24,13 @@ urlpatterns = [
     path('get-batch-students/', views.get_batch_students, name='admission_get_batch_students'),
     path('get_student_fee_structure/', views.get_student_fee_structure, name='get_student_fee_structure'),
     path('api/student/<int:student_id>/calendar/', views.student_calendar_api, name='student_calendar_api'),
+    path('api/student/<int:student_id>/profile/', views.student_profile_api, name='student_profile_api'),
     path('remark/<int:pk>/history/', views.get_admission_history, name='get_admission_history'),
     path('remark-history/<int:pk>/update/', views.update_admission_history, name='update_remark_history'),
     path('ajax/calculate-fee-structure/', views.calculate_fee_structure_preview, name='calculate_fee_structure_preview'),
     path("student/<int:pk>/refresh-fee/", views.refresh_student_fee_structure, name="refresh_student_fee"),
     path("admission/refresh-fee/bulk/", views.bulk_refresh_fee_structure,name="bulk_refresh_fee" ),
+    path("admission/refresh-fee/jobs/<int:pk>/", views.fee_refresh_job_status, name="fee_refresh_job_status"),
 
     # admission
     path("all-admissions/", views.AllAdmissionListView.as_view(), name="all_admission_list"),
@@ -43,6 +45,7 @@ urlpatterns = [
     path("admission/<str:pk>/profile/", views.AdmissionProfileDetailView.as_view(), name="admission_profile_detail"),
     path("due-students/", views.DueStudentsListView.as_view(), name="due_students_list"),
     path("student-certificate/<int:pk>/", views.StudentCertificateView.as_view(), name="student_certificate"),
+    path("batch-certificates/<int:batch_id>/", views.BatchCertificateDownloadView.as_view(), name="batch_certificates"),
     
     # enquiry
     path("leads/", views.LeadList.as_view(), name="lead_list"),
@@ -67,6 +70,7 @@ urlpatterns = [
 
     path('attendance-table/', views.StudentAttendanceTableView.as_view(), name='student_attendance_table'),
     path('api/attendance-data/', views.AttendanceTableDataAPIView.as_view(), name='attendance_data_api'),
+    path('api/attendance-matrix/', views.AttendanceMatrixAPIView.as_view(), name='attendance_matrix_api'),
     
     # Attendance API endpoints
     path("attendance/data/", views.attendance_data_api, name="attendance_data_api"),
@@ -1,4 +1,21 @@
+from functools import lru_cache
+
+import pusher
 import requests
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_pusher_client():
+    """Built on first use, so importing the app never needs Pusher credentials."""
+    return pusher.Pusher(
+        app_id=settings.PUSHER_APP_ID,
+        key=settings.PUSHER_KEY,
+        secret=settings.PUSHER_SECRET,
+        cluster=settings.PUSHER_CLUSTER,
+        ssl=True
+    )
+
 
 def send_sms(phone_number, message):
     """
@@ -48,3 +65,40 @@ def send_sms(phone_number, message):
         print(f"❌ Request Exception: {e}")
 
     return False
+
+
+def absence_message(student, day, on_leave=False):
+    """Parent WhatsApp text (English and Malayalam) for a day the student was absent or on approved leave."""
+    if on_leave:
+        return (
+            f"*Oxdu Integrated Media School - Leave Notification / അവധി അറിയിപ്പ്*\n\n"
+            f"*English:*\n"
+            f"Dear Parent,\n\n"
+            f"This is to inform you that your child *{student.fullname()}* "
+            f"has an approved leave on *{day.strftime('%B %d, %Y')}*.\n"
+            f"Our records show that the leave request was submitted and approved.\n"
+            f"This message is just to confirm that you are aware of your child's leave.\n\n"
+            f"*Malayalam:*\n"
+            f"പ്രിയപ്പെട്ട രക്ഷിതാവേ,\n\n"
+            f"താങ്കളുടെ മകന്‍/മകളായ *{student.fullname()}* "
+            f"*{day.strftime('%Y-%m-%d')}* തീയതിയില്‍ അവധിയിലാണ്.\n"
+            f"അവധി അപേക്ഷ സമർപ്പിക്കുകയും അത് അംഗീകരിക്കുകയും ചെയ്തിട്ടുണ്ട്.\n"
+            f"താങ്കൾ ഈ അവധിയെക്കുറിച്ച് അറിയുന്നുവെന്ന് ഉറപ്പാക്കാനാണ് ഈ സന്ദേശം അയച്ചിരിക്കുന്നത്.\n\n"
+            f"Regards,\n"
+            f"*Oxdu Integrated Media School*"
+        )
+    return (
+        f"*Oxdu Integrated Media School - Attendance Notification / ഹാജര്‍ അറിയിപ്പ്*\n\n"
+        f"*English:*\n"
+        f"Dear Parent,\n\n"
+        f"This is to inform you that your child *{student.fullname()}* "
+        f"was marked absent on *{day.strftime('%B %d, %Y')}*.\n"
+        f"If there is a valid reason for the absence, kindly inform the placement officer and the teacher.\n\n"
+        f"*Malayalam:*\n"
+        f"പ്രിയപ്പെട്ട രക്ഷിതാവേ,\n\n"
+        f"താങ്കളുടെ മകന്‍/മകളായ *{student.fullname()}* "
+        f"*{day.strftime('%Y-%m-%d')}* തീയതിയില്‍ ഹാജരായിരുന്നില്ല.\n"
+        f"ആയതിനാൽ യഥാർത്ഥ കാരണം, ദയവായി പ്ലേസ്മെന്റ് ഓഫീസറേയും അധ്യാപകനേയും അറിയിക്കുക.\n\n"
+        f"Regards,\n"
+        f"*Oxdu Integrated Media School*"
+    )
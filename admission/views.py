@@ -1,10 +1,10 @@
 import calendar
 import csv
-import pusher
 import hashlib
 import hmac
 import json
 import logging
+import zipfile
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
@@ -49,6 +49,7 @@ from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
 from django.utils.dateparse import parse_date
+from django.utils.text import slugify
 from django.utils.timezone import now
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
@@ -67,13 +68,18 @@ from admission.models import (
     Attendance,
     AttendanceRegister,
     FeeReceipt,
+    FeeRefreshJob,
     FeeStructure,
     StudentStageStatusHistory,
     generate_receipt_no,
 )
-from admission.services.fee_refresh import refresh_fee_structure_queryset
+from admission.services.attendance_matrix import get_attendance_matrix, invalidate_attendance_matrix
+from admission.services.enquiry_import import import_enquiries, iter_enquiry_rows
+from admission.services.fee_refresh import refresh_fee_structure_for_student, start_fee_refresh_job
+from admission.services.stage_transitions import bulk_change_stage
+from admission.services import student_profile
 
-from admission.utils import send_sms
+from admission.utils import absence_message, get_pusher_client, send_sms
 
 from core.choices import ENQUIRY_STATUS, ENQUIRY_TYPE_CHOICES
 
@@ -85,6 +91,7 @@ from core.utils import build_url
 from employees.models import Employee
 from masters.forms import BatchForm
 from masters.models import Batch, Course, Holiday, LeaveRequest
+from masters.services.leave_index import LeaveIndex
 
 from . import forms, tables
 
@@ -92,14 +99,6 @@ logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
-pusher_client = pusher.Pusher(
-    app_id=settings.PUSHER_APP_ID,
-    key=settings.PUSHER_KEY,
-    secret=settings.PUSHER_SECRET,
-    cluster=settings.PUSHER_CLUSTER,
-    ssl=True
-)
-
 @login_required
 def create_razorpay_order(request):
     if request.method == 'POST':
@@ -831,48 +830,18 @@ def bulk_update_student_stage(request):
         if new_status not in valid_statuses:
             return JsonResponse({'success': False, 'message': f'Invalid status: {new_status}'})
 
-        with transaction.atomic():
-            # Get students matching the criteria, excluding the specified students
-            students = Admission.objects.filter(
-                branch_id=branch_id,
-                course_id=course_id, 
-                batch_id=batch_id,
-                is_active=True
-            ).exclude(id__in=excluded_students)
+        students = Admission.objects.filter(
+            branch_id=branch_id,
+            course_id=course_id,
+            batch_id=batch_id,
+            is_active=True
+        ).exclude(id__in=excluded_students)
 
-            print(f"Found {students.count()} students to update (excluding {len(excluded_students)} students)")
+        user = request.user if request.user.is_authenticated else None
+        updated_count = bulk_change_stage(students, new_status, remark=remark, user=user)
 
-            if not students.exists():
-                return JsonResponse({'success': False, 'message': 'No students found matching the criteria'})
-
-            updated_count = 0
-            history_records = []
-            
-            # Update each student individually
-            for student in students:
-                print(f"Updating student: {student.fullname()} from {student.stage_status} to {new_status}")
-                
-                # Store old status for history
-                old_status = student.stage_status
-                
-                # Update the student stage status
-                student.stage_status = new_status
-                student.save()
-                
-                # Create history record
-                history_records.append(
-                    StudentStageStatusHistory(
-                        student=student,
-                        status=new_status,
-                        remark=f"Bulk update: {remark} (Changed from {old_status} to {new_status})"
-                    )
-                )
-                updated_count += 1
-
-            # Bulk create history records
-            if history_records:
-                StudentStageStatusHistory.objects.bulk_create(history_records)
-                print(f"Created {len(history_records)} history records")
+        if not updated_count:
+            return JsonResponse({'success': False, 'message': 'No students found matching the criteria'})
 
         return JsonResponse({
             'success': True, 
@@ -933,12 +902,11 @@ def get_student_fee_structure(request):
 @require_GET
 def student_calendar_api(request, student_id):
     try:
-        student = Admission.objects.get(id=student_id)
+        profile = student_profile.get_profile(student_id)
         year = int(request.GET.get('year', timezone.now().year))
         month = int(request.GET.get('month', timezone.now().month))
         
-        view = AdmissionProfileDetailView()
-        calendar_days = view.get_calendar_data(student, year, month)
+        calendar_days = student_profile.calendar_days(profile, year, month)
         
         serialized_days = []
         for day in calendar_days:
@@ -963,6 +931,21 @@ def student_calendar_api(request, student_id):
         return JsonResponse({'error': str(e)}, status=500)
     
 
+@login_required
+@require_GET
+def student_profile_api(request, student_id):
+    """The profile DTO behind the profile and fee overview pages; students only get their own."""
+    if not mixins.check_access(request, StudentFeeOverviewDetailView.permissions):
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+    if request.user.usertype == "student" and not Admission.objects.filter(pk=student_id, user=request.user).exists():
+        return JsonResponse({'success': False, 'message': 'Student not found'}, status=404)
+    try:
+        profile = student_profile.get_profile(student_id)
+    except Admission.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Student not found'}, status=404)
+    return JsonResponse({'success': True, 'profile': profile})
+    
+
 class ImportEnquiryView(View):
     def post(self, request):
         file = request.FILES.get('file')
@@ -971,52 +954,27 @@ class ImportEnquiryView(View):
             return redirect('admission:public_lead_list')
 
         try:
-            if file.name.endswith('.xlsx'):
-                wb = openpyxl.load_workbook(file)
-                sheet = wb.active
-                for row in sheet.iter_rows(min_row=3, values_only=True):
-                    phone = row[0] if len(row) > 0 else None
-                    full_name = row[1] if len(row) > 1 else None
-                    city = row[2] if len(row) > 2 else None
-                    enquiry_type = row[3] if len(row) > 3 else None
-
-                    if phone:
-                        AdmissionEnquiry.objects.create(
-                            contact_number=phone,
-                            full_name=full_name,
-                            city=city,
-                            enquiry_type=enquiry_type
-                        )
-
-            elif file.name.endswith('.csv'):
-                decoded_file = file.read().decode('utf-8').splitlines()
-                reader = csv.reader(decoded_file)
-                next(reader, None)  # Skip header
-                for row in reader:
-                    full_name = row[0] if len(row) > 0 else None
-                    city = row[1] if len(row) > 1 else None
-                    phone = row[2] if len(row) > 2 else None
-                    enquiry_type = row[3] if len(row) > 3 else None
-
-                    if phone:
-                        AdmissionEnquiry.objects.create(
-                            contact_number=phone,
-                            full_name=full_name,
-                            city=city,
-                            enquiry_type=enquiry_type
-                        )
-
-            else:
-                messages.error(request, "Unsupported file type. Please upload .xlsx or .csv.")
-                return redirect('admission:public_lead_list')
+            rows = iter_enquiry_rows(file, file.name)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('admission:public_lead_list')
 
-            messages.success(request, "Leads imported successfully.")
+        try:
+            creator = request.user if request.user.is_authenticated else None
+            result = import_enquiries(rows, creator=creator)
         except Exception as e:
             messages.error(request, f"Import failed: {e}")
+            return redirect('admission:public_lead_list')
+
+        messages.success(request, f"Leads imported: {result.summary()}.")
+        if result.errors:
+            preview = "; ".join(f"row {row_number}: {message}" for row_number, message in result.errors[:10])
+            more = f" (and {result.failed - 10} more)" if result.failed > 10 else ""
+            messages.warning(request, f"Skipped rows - {preview}{more}")
 
         return redirect('admission:public_lead_list')
 
-    
+
 def add_to_me(request, pk):
     enquiry = get_object_or_404(AdmissionEnquiry, pk=pk)
 
@@ -1362,15 +1320,30 @@ def bulk_refresh_fee_structure(request):
     """
     Refresh fee structure for filtered students
     """
-    ids = request.POST.getlist("ids[]")
+    ids = [pk for pk in request.POST.getlist("ids[]") if pk.isdigit()]
 
-    qs = Admission.objects.filter(id__in=ids) if ids else Admission.objects.all()
-    count = refresh_fee_structure_queryset(qs)
+    job = start_fee_refresh_job(ids, user=request.user)
 
     return JsonResponse({
         "success": True,
-        "updated": count,
-        "message": f"{count} students fee structure refreshed"
+        "job_id": job.pk,
+        "status_url": str(job.get_status_url()),
+        "message": "Fee structure refresh started. It will continue in the background."
+    })
+
+
+@login_required
+@require_GET
+def fee_refresh_job_status(request, pk):
+    job = get_object_or_404(FeeRefreshJob, pk=pk)
+    return JsonResponse({
+        "success": True,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "failed": job.failed,
+        "progress": job.get_progress(),
+        "error": job.error,
     })
 
 
@@ -1392,7 +1365,7 @@ def trigger_admission_celebration(admission_instance):
             "course": course_name
         }
 
-        pusher_client.trigger('admission-channel', 'new-admission-event', data)
+        get_pusher_client().trigger('admission-channel', 'new-admission-event', data)
         print(f"Pusher Event Sent: Care Of updated for {admission_instance.fullname()}")
         
     except Exception as e:
@@ -1402,6 +1375,7 @@ def trigger_admission_celebration(admission_instance):
 class AllAdmissionListView(mixins.HybridListView):
     model = Admission
     table_class = tables.AdmissionTable
+    search_index = "student"
     filterset_fields = {
         'course': ['exact'], 
         'branch': ['exact'], 
@@ -1424,6 +1398,7 @@ class AdmissionListView(mixins.HybridListView):
     template_name = "admission/admission_list.html"
     model = Admission
     table_class = tables.AdmissionTable
+    search_index = "student"
     filterset_fields = {
         'course': ['exact'], 
         'branch': ['exact'], 
@@ -1829,221 +1804,36 @@ class AdmissionProfileDetailView(mixins.DetailView):
         context = super().get_context_data(**kwargs)
         context["title"] = "Student Profile"
         context["is_profile"] = True
-        
-        student = self.get_object()
-        
-        # 1. Get Approved Leaves
-        approved_leaves = LeaveRequest.objects.filter(
-            student=student,
-            status='approved',
-            is_active=True
-        )
-        
-        approved_leave_dates = set()
-        total_approved_leave_days = 0
-        
-        for leave in approved_leaves:
-            current_date = leave.start_date
-            while current_date <= leave.end_date:
-                is_auto_holiday, _ = Holiday.is_auto_holiday(current_date)
-                is_holiday = Holiday.objects.filter(
-                    is_active=True, date=current_date
-                ).filter(Q(scope="all") | Q(branch=student.branch)).exists()
-                
-                if not is_auto_holiday and not is_holiday:
-                    approved_leave_dates.add(current_date)
-                    total_approved_leave_days += 1
-                current_date += timedelta(days=1)
-        
-        # 2. Get Valid Attendance Records (Active + Active Register)
-        all_attendance_records = Attendance.objects.filter(
-            student=student, 
-            is_active=True,
-            register__is_active=True
-        ).select_related('register').order_by('-register__date') # Order by newest first
-        
-        valid_attendance_records = []
-        leave_conflicted_records = []
-        
-        # Lists for structural display
-        present_records_list = []
-        absent_records_list = []
-        
-        # Sets for conflict detection
-        dates_marked_present = set()
-        dates_marked_absent = set()
 
-        for record in all_attendance_records:
-            if record.register.date in approved_leave_dates:
-                leave_conflicted_records.append(record)
-            else:
-                valid_attendance_records.append(record)
-                
-                # Categorize for the display lists
-                if record.status == 'Present':
-                    present_records_list.append(record)
-                    dates_marked_present.add(record.register.date)
-                elif record.status == 'Absent':
-                    absent_records_list.append(record)
-                    dates_marked_absent.add(record.register.date)
-
-        # 3. Calculate Statistics
-        total_working_days = len(valid_attendance_records)
-        total_present = len(present_records_list)
-        total_absent = len(absent_records_list)
-        total_late = len([r for r in valid_attendance_records if r.status == 'Late'])
-        
-        # 4. Identify Conflicts (Dates that are in both sets)
-        conflicting_dates = dates_marked_present.intersection(dates_marked_absent)
-        
-        # Calculate percentages
-        attendance_percentage = 0
-        present_percentage = 0
-        absent_percentage = 0
-        
-        if total_working_days > 0:
-            attendance_percentage = round(((total_present + total_late) / total_working_days) * 100, 1)
-            present_percentage = round((total_present / total_working_days) * 100, 1)
-            absent_percentage = round((total_absent / total_working_days) * 100, 1)
-        
-        # Calendar Data
+        profile = student_profile.get_profile(self.object.pk)
+        attendance = profile["attendance"]
+        leaves = profile["leaves"]
+
         year = int(self.request.GET.get('year', timezone.now().year))
         month = int(self.request.GET.get('month', timezone.now().month))
-        calendar_days = self.get_calendar_data(student, year, month)
-        
+
         context.update({
-            'total_working_days': total_working_days,
-            'total_present': total_present,
-            'total_absent': total_absent,
-            'total_late': total_late,
-            'attendance_percentage': attendance_percentage,
-            'present_percentage': present_percentage,
-            'absent_percentage': absent_percentage,
-            # New Context Variables for the Template
-            'present_records_list': present_records_list,
-            'absent_records_list': absent_records_list,
-            'conflicting_dates': list(conflicting_dates), # Convert set to list for template
-            # End New Context
-            'calendar_days': calendar_days,
+            'profile': profile,
+            'total_working_days': attendance["total_working_days"],
+            'total_present': attendance["total_present"],
+            'total_absent': attendance["total_absent"],
+            'total_late': attendance["total_late"],
+            'attendance_percentage': attendance["attendance_percentage"],
+            'present_percentage': attendance["present_percentage"],
+            'absent_percentage': attendance["absent_percentage"],
+            'present_records_list': attendance["present_dates"],
+            'absent_records_list': attendance["absent_dates"],
+            'conflicting_dates': attendance["conflicting_dates"],
+            'calendar_days': student_profile.calendar_days(profile, year, month),
             'current_month': datetime(year, month, 1).strftime('%B'),
             'current_year': year,
-            'total_approved_leaves': approved_leaves.count(),
-            'total_approved_leave_days': total_approved_leave_days,
-            'total_pending_leaves': LeaveRequest.objects.filter(student=student, status='pending', is_active=True).count(),
-            'total_rejected_leaves': LeaveRequest.objects.filter(student=student, status='rejected', is_active=True).count(),
+            'total_approved_leaves': leaves["approved"],
+            'total_approved_leave_days': leaves["approved_days"],
+            'total_pending_leaves': leaves["pending"],
+            'total_rejected_leaves': leaves["rejected"],
         })
-        
         return context
-    
-    def get_calendar_data(self, student, year, month):
-        # (Same as previous solution)
-        approved_leaves = LeaveRequest.objects.filter(
-            student=student,
-            status='approved',
-            is_active=True,
-            start_date__lte=datetime(year, month, monthrange(year, month)[1]).date(),
-            end_date__gte=datetime(year, month, 1).date()
-        )
-        
-        approved_leave_dates = {}
-        for leave in approved_leaves:
-            current_date = leave.start_date
-            while current_date <= leave.end_date:
-                if current_date.year == year and current_date.month == month:
-                    approved_leave_dates[current_date] = {
-                        "type": "approved_leave",
-                        "reason": leave.reason
-                    }
-                current_date += timedelta(days=1)
-        
-        attendance_records = Attendance.objects.filter(
-            student=student,
-            register__date__year=year,
-            register__date__month=month,
-            is_active=True,
-            register__is_active=True
-        ).select_related('register')
-        
-        holidays = Holiday.objects.filter(
-            is_active=True,
-            date__year=year,
-            date__month=month
-        ).filter(
-            Q(scope="all") | Q(branch=student.branch)
-        )
-        
-        attendance_by_date = {}
-        for record in attendance_records:
-            date_key = record.register.date
-            if date_key in approved_leave_dates:
-                attendance_by_date[date_key] = 'approved_leave'
-            else:
-                attendance_by_date[date_key] = record.status.lower()
-        
-        holiday_by_date = {}
-        for holiday in holidays:
-            if holiday.scope == "branch" and not holiday.branch.filter(id=student.branch.id).exists():
-                continue
-            holiday_by_date[holiday.date] = {
-                "name": holiday.name,
-                "is_auto": holiday.is_auto_holiday,
-            }
-        
-        import calendar
-        days_in_month = calendar.monthrange(year, month)[1]
-        for day in range(1, days_in_month + 1):
-            current_date_obj = datetime(year, month, day).date()
-            is_auto_holiday, holiday_name = Holiday.is_auto_holiday(current_date_obj)
-            if is_auto_holiday and current_date_obj not in holiday_by_date:
-                holiday_by_date[current_date_obj] = {
-                    "name": holiday_name, 
-                    "is_auto": True
-                }
-        
-        cal = calendar.Calendar(firstweekday=6)
-        month_days = cal.monthdayscalendar(year, month)
-        today = timezone.now().date()
-        
-        calendar_days = []
-        for week in month_days:
-            for day in week:
-                if day == 0:
-                    calendar_days.append({
-                        'date': None, 
-                        'status': 'empty',
-                        'is_today': False,
-                        'is_holiday': False
-                    })
-                else:
-                    date = datetime(year, month, day).date()
-                    is_today = (date == today)
-                    
-                    if date in holiday_by_date:
-                        status = 'holiday'
-                    elif date in approved_leave_dates:
-                        status = 'approved_leave'
-                    elif date in attendance_by_date:
-                        status = attendance_by_date[date]
-                    else:
-                        status = 'normal'
-                    
-                    additional_info = None
-                    if date in holiday_by_date:
-                        additional_info = holiday_by_date[date]
-                    elif date in approved_leave_dates:
-                        additional_info = approved_leave_dates[date]
-                    
-                    calendar_days.append({
-                        'date': date,
-                        'status': status,
-                        'is_today': is_today,
-                        'is_holiday': (status == 'holiday'),
-                        'is_approved_leave': (status == 'approved_leave'),
-                        'holiday_info': additional_info
-                    })
-        
-        return calendar_days
-    
+
 
 class DueStudentsListView(mixins.HybridListView):
     model = Admission 
@@ -2282,6 +2072,32 @@ class StudentCertificateView(PDFView):
         return f"{instance.first_name}_{instance.last_name}_certificate.pdf"
 
 
+class BatchCertificateDownloadView(mixins.CustomLoginRequiredMixin, StudentCertificateView):
+    """All certificates of a batch, rendered in the PDF worker pool and zipped."""
+
+    def get(self, request, *args, **kwargs):
+        batch = get_object_or_404(Batch, pk=self.kwargs["batch_id"])
+        students = list(
+            Admission.objects.filter(batch=batch, is_active=True, course_start_date__isnull=False, course__isnull=False)
+            .select_related("course")
+            .order_by("first_name", "last_name")
+        )
+        if not students:
+            messages.error(request, "No students with a course start date in this batch.")
+            return redirect(request.META.get("HTTP_REFERER", "/"))
+
+        documents = self.render_batch([{"pk": student.pk} for student in students])
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for student, content in zip(students, documents):
+                archive.writestr(f"{student.admission_number or student.pk}_{slugify(student.fullname())}_certificate.pdf", content)
+
+        response = HttpResponse(buffer.getvalue(), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{slugify(batch.batch_name)}_certificates.zip"'
+        return response
+
+
 class LeadList(mixins.HybridListView):
     model = AdmissionEnquiry
     context_object_name = 'leads'
@@ -2348,6 +2164,7 @@ class PublicLeadListView(mixins.HybridListView):
     template_name = "admission/enquiry/list.html"
     model = AdmissionEnquiry
     table_class = tables.PublicEnquiryListTable
+    search_index = "lead"
     filterset_fields = {'city': ['exact'], 'branch': ['exact'], 'date': ['exact'], 'enquiry_type': ['exact'],}
     permissions = ("branch_staff", "partner", "admin_staff", "is_superuser", "tele_caller", "sales_head", "ceo","cfo","coo","hr","cmo", "mentor")
     branch_filter = False
@@ -2485,6 +2302,7 @@ class MyleadListView(mixins.HybridListView):
 class AdmissionEnquiryView(mixins.HybridListView):
     model = AdmissionEnquiry
     table_class = tables.AdmissionEnquiryTable
+    search_index = "lead"
     filterset_fields = {'course': ['exact'], 'status': ['exact']}
     permissions = ("branch_staff", "partner", "admin_staff", "is_superuser", "tele_caller", "mentor", "sales_head", "ceo","cfo","coo","hr","cmo")
     branch_filter = False
@@ -2797,6 +2615,7 @@ class AttendanceRegisterCreateView(mixins.HybridCreateView):
             form.add_error(None, "Attendance for this batch on this date already exists.")
             return self.form_invalid(form)
 
+        invalidate_attendance_matrix(date.year, date.month)
         return HttpResponseRedirect(self.get_success_url())
     
     def get_form_kwargs(self):
@@ -2864,6 +2683,8 @@ class AttendanceRegisterUpdateView(mixins.HybridUpdateView):
         else:
             print('attendance_formset=',attendance_formset.errors)
             return render(self.request, self.template_name, context)
+        if self.object.date:
+            invalidate_attendance_matrix(self.object.date.year, self.object.date.month)
         return super().form_valid(form)
     
 
@@ -3379,6 +3200,32 @@ class AttendanceTableDataAPIView(View):
         }
 
 
+class AttendanceMatrixAPIView(mixins.HybridView):
+    """Compact month grid: student id list plus one packed status string per student."""
+
+    def get(self, request):
+        today = now().date()
+        try:
+            month = int(request.GET.get('month', today.month))
+            year = int(request.GET.get('year', today.year))
+        except (ValueError, TypeError):
+            month = today.month
+            year = today.year
+
+        if month < 1 or month > 12:
+            month = today.month
+        if year < 2000 or year > today.year + 1:
+            year = today.year
+
+        filters = {}
+        for name in ('branch', 'batch', 'course'):
+            value = request.GET.get(name)
+            filters[f"{name}_id"] = int(value) if value and value.isdigit() else None
+
+        matrix = get_attendance_matrix(year, month, **filters)
+        return JsonResponse({'success': True, **matrix})
+
+
 class FeeReceiptListView(mixins.HybridListView):
     model = FeeReceipt
     table_class = tables.FeeReceiptTable
@@ -3996,54 +3843,15 @@ class StudentFeeOverviewDetailView(mixins.HybridDetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        admission = self.get_object()
-
-        # Get all fee receipts with payment methods
-        fee_receipts = admission.feereceipt_set.filter(
-            is_active=True
-        ).prefetch_related('payment_methods').order_by("-date")
-
-        # Create a list to store all payment methods separately
-        all_payment_methods = []
-        for receipt in fee_receipts:
-            for payment_method in receipt.payment_methods.all():
-                all_payment_methods.append({
-                    'receipt': receipt,
-                    'payment_method': payment_method,
-                    'receipt_no': receipt.receipt_no,
-                    'date': receipt.date,
-                })
-        
-        context["all_payment_methods"] = all_payment_methods
-        context["fee_receipts"] = fee_receipts
-
-        # Fee structures with calculated remaining amount
-        fee_structures = admission.feestructure_set.all().order_by("installment_no")
-        
-        # Annotate remaining amount - simple calculation
-        for fee in fee_structures:
-            fee_amount = Decimal(str(fee.amount))
-            paid_amount = Decimal(str(fee.paid_amount or 0))
-            
-            fee.get_remaining_amount = fee_amount - paid_amount
-            
-            # Calculate payment percentage
-            if fee_amount > 0:
-                fee.get_payment_percentage = (paid_amount / fee_amount * 100)
-            else:
-                fee.get_payment_percentage = Decimal('100.00')
-
-        context["fee_structures"] = fee_structures
-
-        # Calculate totals from fee structures (this reflects the NET amounts after discount)
-        total_installment_amount = sum(Decimal(str(fee.amount)) for fee in fee_structures)
-        total_paid_installments = sum(Decimal(str(fee.paid_amount or 0)) for fee in fee_structures)
-        total_remaining = total_installment_amount - total_paid_installments
-
-        context["total_paid"] = admission.get_total_fee_amount()
-        context["total_amount"] = admission.get_current_fee()  # Course fee - discount
-        context["balance_due"] = total_remaining  # Use the calculated remaining from fee structures
-
+        fees = student_profile.get_profile(self.object.pk)["fees"]
+
+        context["fees"] = fees
+        context["all_payment_methods"] = fees["payments"]
+        context["fee_receipts"] = fees["receipts"]
+        context["fee_structures"] = fees["structures"]
+        context["total_paid"] = fees["total_paid"]
+        context["total_amount"] = fees["net_fee"]  # Course fee - discount
+        context["balance_due"] = fees["balance_due"]  # Remaining on the installment plan
         return context
     
 
@@ -4485,10 +4293,13 @@ def attendance_save_api(request):
                     # Bulk create attendance records
                     if attendance_objects:
                         Attendance.objects.bulk_create(attendance_objects)
+                        student_profile.invalidate_student_profile(*(attendance.student_id for attendance in attendance_objects))
                         total_attendance_created += len(attendance_objects)
         
         except Exception as e:
             return JsonResponse({'error': f'Error creating attendance records: {str(e)}'}, status=500)
+
+        invalidate_attendance_matrix(selected_date.year, selected_date.month)
         
         # Send SMS notifications for absent students (only if WhatsApp is enabled)
         sms_sent_count = 0
@@ -4496,6 +4307,7 @@ def attendance_save_api(request):
         
         if send_whatsapp:
             print(f"📱 Processing {len(students_to_notify)} students for WhatsApp notifications")
+            leave_index = LeaveIndex.load([student for student, _ in students_to_notify], selected_date, selected_date)
             
             for student, date in students_to_notify:
                 try:
@@ -4510,49 +4322,7 @@ def attendance_save_api(request):
                         sms_skipped_count += 1
                         continue
                     
-                    # Check for approved leave
-                    has_leave = LeaveRequest.objects.filter(
-                        student=student,
-                        status='approved',
-                        start_date__lte=date,
-                        end_date__gte=date
-                    ).exists()
-                    
-                    # Prepare message
-                    if has_leave:
-                        message = (
-                            f"*Oxdu Integrated Media School - Leave Notification / അവധി അറിയിപ്പ്*\n\n"
-                            f"*English:*\n"
-                            f"Dear Parent,\n\n"
-                            f"This is to inform you that your child *{student.fullname()}* "
-                            f"has an approved leave on *{date.strftime('%B %d, %Y')}*.\n"
-                            f"Our records show that the leave request was submitted and approved.\n"
-                            f"This message is just to confirm that you are aware of your child's leave.\n\n"
-                            f"*Malayalam:*\n"
-                            f"പ്രിയപ്പെട്ട രക്ഷിതാവേ,\n\n"
-                            f"താങ്കളുടെ മകന്‍/മകളായ *{student.fullname()}* "
-                            f"*{date.strftime('%Y-%m-%d')}* തീയതിയില്‍ അവധിയിലാണ്.\n"
-                            f"അവധി അപേക്ഷ സമർപ്പിക്കുകയും അത് അംഗീകരിക്കുകയും ചെയ്തിട്ടുണ്ട്.\n"
-                            f"താങ്കൾ ഈ അവധിയെക്കുറിച്ച് അറിയുന്നുവെന്ന് ഉറപ്പാക്കാനാണ് ഈ സന്ദേശം അയച്ചിരിക്കുന്നത്.\n\n"
-                            f"Regards,\n"
-                            f"*Oxdu Integrated Media School*"
-                        )
-                    else:
-                        message = (
-                            f"*Oxdu Integrated Media School - Attendance Notification / ഹാജര്‍ അറിയിപ്പ്*\n\n"
-                            f"*English:*\n"
-                            f"Dear Parent,\n\n"
-                            f"This is to inform you that your child *{student.fullname()}* "
-                            f"was marked absent on *{date.strftime('%B %d, %Y')}*.\n"
-                            f"If there is a valid reason for the absence, kindly inform the placement officer and the teacher.\n\n"
-                            f"*Malayalam:*\n"
-                            f"പ്രിയപ്പെട്ട രക്ഷിതാവേ,\n\n"
-                            f"താങ്കളുടെ മകന്‍/മകളായ *{student.fullname()}* "
-                            f"*{date.strftime('%Y-%m-%d')}* തീയതിയില്‍ ഹാജരായിരുന്നില്ല.\n"
-                            f"ആയതിനാൽ യഥാർത്ഥ കാരണം, ദയവായി പ്ലേസ്മെന്റ് ഓഫീസറേയും അധ്യാപകനേയും അറിയിക്കുക.\n\n"
-                            f"Regards,\n"
-                            f"*Oxdu Integrated Media School*"
-                        )
+                    message = absence_message(student, date, on_leave=leave_index.covers(student.pk, date))
                     
                     # Send SMS
                     if send_sms(phone_number, message):
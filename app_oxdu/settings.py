@@ -192,6 +192,20 @@ APP_SETTINGS = {
 }
 
 
+# PDF rendering (core.pdf_service)
+PDF_RENDER_WORKERS = config("PDF_RENDER_WORKERS", default=2, cast=int)
+PDF_RENDER_TIMEOUT = config("PDF_RENDER_TIMEOUT", default=120, cast=int)
+# Rendered PDFs (ID cards, letters, slips) are cached outside MEDIA_ROOT so the web server never serves them
+PDF_CACHE_ROOT = config("PDF_CACHE_ROOT", default=str(BASE_DIR / "private" / "pdf_cache"))
+# clear_pdf_cache removes cached PDFs older than this
+PDF_CACHE_MAX_AGE_DAYS = config("PDF_CACHE_MAX_AGE_DAYS", default=30, cast=int)
+
+# PDF book delivery (masters.services.pdf_delivery)
+# "x-sendfile" (Apache mod_xsendfile) or "x-accel-redirect" (nginx internal location) to offload transfers
+PDF_BOOK_SENDFILE = config("PDF_BOOK_SENDFILE", default="")
+PDF_BOOK_ACCEL_PREFIX = config("PDF_BOOK_ACCEL_PREFIX", default="/protected-media/")
+PDF_THUMBNAIL_DIR = "pdf_thumbnails"
+
 THUMBNAIL_ALIASES = {'': {'avatar': {'size': (50, 50), 'crop': True}}}
 
 GRAPH_MODELS = {'all_applications': True, 'group_models': True}
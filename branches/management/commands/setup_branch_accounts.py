@@ -1,37 +1,34 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
 from branches.models import Branch
-from branches.signals import (
-    validate_branch_accounts,
-    create_missing_accounts_for_branch,
-)
+from branches.services.chart_of_accounts import provision_branch, unprovisioned_branches
 
 
 class Command(BaseCommand):
     help = "Create missing default accounting groups and accounts for branches"
 
     def handle(self, *args, **options):
-        branches = Branch.objects.all()
-        self.stdout.write(f"🏢 Found {branches.count()} branches")
+        branches = list(Branch.objects.all())
+        self.stdout.write(f"🏢 Found {len(branches)} branches")
+
+        missing = {branch.pk for branch in unprovisioned_branches(branches)}
 
         for branch in branches:
             self.stdout.write(f"\nProcessing: {branch.name} (ID {branch.id})")
 
+            if branch.pk not in missing:
+                self.stdout.write(
+                    self.style.SUCCESS("✔ Already configured")
+                )
+                continue
+
             try:
-                with transaction.atomic():
-                    if validate_branch_accounts(branch):
-                        self.stdout.write(
-                            self.style.SUCCESS("✔ Already configured")
-                        )
-                        continue
-
-                    created = create_missing_accounts_for_branch(branch)
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"✔ Created {len(created)} missing accounts"
-                        )
+                created = provision_branch(branch)
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"✔ Created {len(created)} missing accounts"
                     )
+                )
 
             except Exception as e:
                 self.stdout.write(
@@ -0,0 +1,266 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from accounting.constants import (
+    ACCOUNT_CODE_MAPPING,
+    ACCOUNT_GROUP_CHOICES,
+    ACCOUNT_TO_GROUP_MAPPING,
+    CATEGORY_TO_MAIN_GROUP,
+    GROUP_CATEGORIES,
+    GROUP_HIERARCHY,
+    LOCKED_ACCOUNT_CHOICES,
+)
+from accounting.models import Account, GroupMaster
+from core.services.search_index import index_instances
+
+logger = logging.getLogger(__name__)
+
+VALID_CATEGORIES = {'Assets', 'Liabilities', 'Equity', 'Income', 'Expense'}
+
+
+def sort_groups():
+    """
+    Group codes ordered parents-first (depth-first, in ACCOUNT_GROUP_CHOICES
+    order), plus the codes that cannot be placed: invalid category, unknown
+    parent or a cycle. Depends only on the constants, so it is computed once.
+    """
+    names = dict(ACCOUNT_GROUP_CHOICES)
+    ordered = []
+    invalid = set()
+    state = {}
+
+    def visit(code, path):
+        if code in state:
+            if state[code] == "visiting":
+                invalid.update(path[path.index(code):])
+            return code not in invalid
+        category = GROUP_CATEGORIES.get(code)
+        if code not in names or category not in VALID_CATEGORIES or not CATEGORY_TO_MAIN_GROUP.get(category):
+            invalid.add(code)
+            state[code] = "done"
+            return False
+        state[code] = "visiting"
+        parent = GROUP_HIERARCHY.get(code)
+        if parent and not visit(parent, path + [code]):
+            invalid.add(code)
+        state[code] = "done"
+        if code in invalid:
+            return False
+        ordered.append(code)
+        return True
+
+    for code in names:
+        visit(code, [])
+    return ordered, invalid
+
+
+GROUP_ORDER, INVALID_GROUPS = sort_groups()
+
+
+def _tree_attrs():
+    meta = GroupMaster._mptt_meta
+    return meta.left_attr, meta.right_attr, meta.tree_id_attr, meta.level_attr
+
+
+def number_new_trees(roots, children, next_tree_id):
+    """Give brand-new trees their MPTT fields in memory, numbering nodes depth-first."""
+    left_attr, right_attr, tree_attr, level_attr = _tree_attrs()
+
+    def number(node, tree_id, level, counter):
+        setattr(node, tree_attr, tree_id)
+        setattr(node, level_attr, level)
+        setattr(node, left_attr, counter)
+        counter += 1
+        for child in children[node.code]:
+            counter = number(child, tree_id, level + 1, counter)
+        setattr(node, right_attr, counter)
+        return counter + 1
+
+    for tree_id, root in enumerate(roots, start=next_tree_id):
+        number(root, tree_id, 0, 1)
+
+
+def place_grafted_subtree(node, parent, children):
+    """
+    Tree id and level for a new subtree hanging under an existing group, down
+    through its new descendants; lft/rght are placeholders the partial rebuild
+    of that tree replaces.
+    """
+    left_attr, right_attr, tree_attr, level_attr = _tree_attrs()
+    setattr(node, tree_attr, getattr(parent, tree_attr))
+    setattr(node, level_attr, getattr(parent, level_attr) + 1)
+    setattr(node, left_attr, 0)
+    setattr(node, right_attr, 0)
+    for child in children[node.code]:
+        place_grafted_subtree(child, node, children)
+
+
+def provision_groups(branch, creator=None):
+    """
+    Create the branch's missing system groups. Returns {code: group}.
+
+    Existing groups are matched by code, then by name (and renamed to the
+    system code, as before). New groups are inserted with one bulk_create,
+    new trees get their MPTT fields computed in memory, and only trees that
+    gained a node under an existing group are rebuilt afterwards.
+    """
+    names = dict(ACCOUNT_GROUP_CHOICES)
+    existing = list(GroupMaster.objects.filter(branch=branch))
+    by_code = {group.code: group for group in existing}
+    by_name = {group.name: group for group in existing}
+
+    groups = {}
+    renamed = []
+    new_groups = []
+    for code in GROUP_ORDER:
+        group = by_code.get(code) or by_name.get(names[code])
+        if group is not None:
+            if group.code != code:
+                group.code = code
+                group.is_locked = True
+                group.locking_group = code
+                renamed.append(group)
+            groups[code] = group
+            continue
+        category = GROUP_CATEGORIES[code]
+        group = GroupMaster(
+            branch=branch,
+            code=code,
+            name=names[code],
+            nature_of_group=category,
+            main_group=CATEGORY_TO_MAIN_GROUP[category],
+            parent=groups.get(GROUP_HIERARCHY.get(code)),
+            is_locked=True,
+            locking_group=code,
+            description=f"System generated group: {names[code]}",
+            creator=creator,
+        )
+        groups[code] = group
+        new_groups.append(group)
+
+    if INVALID_GROUPS:
+        logger.error(f"Group hierarchy unresolved for branch {branch.id}: {sorted(INVALID_GROUPS)}")
+
+    left_attr, right_attr, tree_attr, level_attr = _tree_attrs()
+    new_codes = {group.code for group in new_groups}
+    children = defaultdict(list)
+    new_roots = []
+    grafted = []
+    for group in new_groups:
+        parent = group.parent
+        if parent is None:
+            new_roots.append(group)
+        elif parent.code in new_codes:
+            children[parent.code].append(group)
+        else:
+            # Hangs under a group that already exists; its tree is rebuilt below
+            grafted.append(group)
+
+    grafted_trees = set()
+    for group in grafted:
+        place_grafted_subtree(group, group.parent, children)
+        grafted_trees.add(getattr(group, tree_attr))
+
+    with transaction.atomic():
+        if renamed:
+            bulk_update_with_history(renamed, GroupMaster, ["code", "is_locked", "locking_group"], default_user=creator)
+        if new_groups:
+            next_tree_id = (GroupMaster.objects.aggregate(top=Max(tree_attr))["top"] or 0) + 1
+            number_new_trees(new_roots, children, next_tree_id)
+            # One insert per tree level, so every new parent has its id before its children go in
+            for depth in sorted({getattr(group, level_attr) for group in new_groups}):
+                level = [group for group in new_groups if getattr(group, level_attr) == depth]
+                for group in level:
+                    if group.parent is not None:
+                        group.parent_id = group.parent.pk
+                bulk_create_with_history(level, GroupMaster, default_user=creator)
+            for tree_id in grafted_trees:
+                GroupMaster.objects.partial_rebuild(tree_id)
+    return groups
+
+
+def branch_code(branch):
+    if hasattr(branch, 'code') and branch.code:
+        return branch.code
+    return f"{branch.id:03d}"
+
+
+def unique_code(desired_code, taken):
+    """desired_code, or desired_code-NN if it is already used in the branch."""
+    if desired_code not in taken:
+        return desired_code
+    for counter in range(1, 51):
+        new_code = f"{desired_code}-{counter:02d}"
+        if new_code not in taken:
+            return new_code
+    raise ValueError(f"Unable to generate unique code for {desired_code}")
+
+
+def provision_accounts(branch, groups, creator=None):
+    """
+    Create the branch's missing locked accounts and claim matching existing
+    ones (by locking key, code or name), reading the branch's accounts once.
+    Returns the accounts created.
+    """
+    existing = list(Account.objects.filter(branch=branch))
+    taken = {account.code for account in existing}
+    prefix = branch_code(branch)
+
+    claimed = []
+    new_accounts = []
+    for account_key, account_name in LOCKED_ACCOUNT_CHOICES:
+        target_code = f"{prefix}-{ACCOUNT_CODE_MAPPING.get(account_key, '99999')}"
+        group_code = ACCOUNT_TO_GROUP_MAPPING.get(account_key)
+        group = groups.get(group_code)
+        if not group:
+            logger.warning(f"Skipping account {account_name} – missing group {group_code}")
+            continue
+
+        account = next(
+            (account for account in existing if account.locking_account == account_key or account.code == target_code or account.name == account_name),
+            None,
+        )
+        if account:
+            if account.locking_account != account_key or not account.is_locked:
+                account.locking_account = account_key
+                account.is_locked = True
+                claimed.append(account)
+            continue
+
+        code = unique_code(target_code, taken)
+        taken.add(code)
+        new_accounts.append(
+            Account(branch=branch, ledger_type='GENERAL', code=code, name=account_name, under=group, is_locked=True, locking_account=account_key, creator=creator)
+        )
+
+    with transaction.atomic():
+        if claimed:
+            bulk_update_with_history(claimed, Account, ["locking_account", "is_locked"], default_user=creator)
+        if new_accounts:
+            new_accounts = bulk_create_with_history(new_accounts, Account, default_user=creator)
+            index_instances("account", new_accounts)
+    return new_accounts
+
+
+def provision_branch(branch, creator=None):
+    """Groups and locked accounts for one branch, in a handful of queries."""
+    with transaction.atomic():
+        groups = provision_groups(branch, creator)
+        return provision_accounts(branch, groups, creator)
+
+
+def unprovisioned_branches(branches):
+    """The branches missing at least one locked account, from one grouped query."""
+    required = [key for key, _ in LOCKED_ACCOUNT_CHOICES]
+    complete = set(
+        Account.objects.filter(branch__in=branches, locking_account__in=required)
+        .values("branch")
+        .annotate(locked=Count("locking_account", distinct=True))
+        .filter(locked=len(required))
+        .values_list("branch", flat=True)
+    )
+    return [branch for branch in branches if branch.pk not in complete]
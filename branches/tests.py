@@ -1 +1,35 @@
-# Create your tests here.
+from django.test import TestCase
+
+from accounting.models import GroupMaster
+from branches.models import Branch
+from branches.services.chart_of_accounts import GROUP_ORDER, provision_groups
+
+
+class ProvisionGroupsTest(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name="Test Branch")
+        provision_groups(self.branch)
+
+    def get_group(self, code):
+        return GroupMaster.objects.get(branch=self.branch, code=code)
+
+    def test_new_branch_gets_every_group(self):
+        self.assertEqual(GroupMaster.objects.filter(branch=self.branch).count(), len(GROUP_ORDER))
+
+    def test_repair_grafts_nested_subtree_under_existing_group(self):
+        # Hard delete cascades to STUDENTS, leaving a two-level gap under CURRENT_ASSETS
+        GroupMaster.objects.filter(branch=self.branch, code="SUNDRY_DEBTORS").delete()
+        self.assertFalse(GroupMaster.objects.filter(branch=self.branch, code="STUDENTS").exists())
+
+        provision_groups(self.branch)
+
+        current_assets = self.get_group("CURRENT_ASSETS")
+        debtors = self.get_group("SUNDRY_DEBTORS")
+        students = self.get_group("STUDENTS")
+        self.assertEqual(debtors.parent_id, current_assets.pk)
+        self.assertEqual(students.parent_id, debtors.pk)
+        self.assertEqual(debtors.level, current_assets.level + 1)
+        self.assertEqual(students.level, debtors.level + 1)
+        self.assertEqual({debtors.tree_id, students.tree_id}, {current_assets.tree_id})
+        self.assertTrue(current_assets.lft < debtors.lft < students.lft < students.rght < debtors.rght < current_assets.rght)
+        self.assertEqual(GroupMaster.objects.filter(branch=self.branch).count(), len(GROUP_ORDER))
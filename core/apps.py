@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "core"
\ No newline at end of file
+    name = "core"
+
+    def ready(self):
+        import core.signals
+
+        post_migrate.connect(core.signals.backfill_search_index, sender=self, dispatch_uid="search_index_backfill")
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.pdf_service import cache_storage, clear_cache
+
+
+class Command(BaseCommand):
+    help = 'Delete cached rendered PDFs older than PDF_CACHE_MAX_AGE_DAYS (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.PDF_CACHE_MAX_AGE_DAYS, help='Maximum age in days of a cached PDF')
+
+    def handle(self, *args, **options):
+        removed = clear_cache(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached PDF(s) older than {options['days']} days from {cache_storage().location}."))
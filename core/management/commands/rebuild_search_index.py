@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.services.search_index import SOURCES, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild SearchDocument rows from students, leads, employees and accounts (after bulk imports or updates)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=sorted(SOURCES), help='Kind to rebuild (repeatable); all kinds by default')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Rebuilding search index..."))
+        counts = rebuild(options['kind'])
+        for kind, count in counts.items():
+            self.stdout.write(f"  {kind}: {count} documents")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(counts)} kind(s)."))
@@ -0,0 +1,116 @@
+# Generated by Django 4.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_searchdocument_body_trgm ON core_searchdocument USING gin (body gin_trgm_ops)",
+]
+POSTGRES_BACKWARD = ["DROP INDEX IF EXISTS core_searchdocument_body_trgm"]
+
+# External-content FTS5 table over SearchDocument.body, kept current by triggers
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5(body, content='core_searchdocument', content_rowid='id')",
+    """CREATE TRIGGER core_searchdocument_fts_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_fts_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_fts_au AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO core_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_ai",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_ad",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_au",
+    "DROP TABLE IF EXISTS core_searchdocument_fts",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if "ENABLE_FTS5" not in {row[0] for row in cursor.fetchall()}:
+                # Without FTS5 the search service falls back to LIKE on body
+                return
+    run_statements({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD})(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('branches', '0001_initial'), ('core', '0001_initial')]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'kind',
+                    models.CharField(
+                        choices=[('student', 'Student'), ('lead', 'Lead'), ('employee', 'Employee'), ('account', 'Account')],
+                        max_length=20,
+                    ),
+                ),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('url', models.CharField(blank=True, max_length=255)),
+                ('normalized_name', models.CharField(blank=True, max_length=255)),
+                ('phone_digits', models.CharField(blank=True, max_length=32)),
+                ('admission_number', models.CharField(blank=True, max_length=50)),
+                ('email', models.CharField(blank=True, max_length=254)),
+                ('account_code', models.CharField(blank=True, max_length=50)),
+                ('body', models.TextField(blank=True, help_text='Every normalized term of the record, space separated')),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                (
+                    'branch',
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='branches.branch'
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['normalized_name'], name='core_search_normali_d05374_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['phone_digits'], name='core_search_phone_d_daf6e2_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['admission_number'], name='core_search_admissi_b53a06_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['email'], name='core_search_email_8c2c00_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['account_code'], name='core_search_account_8ce7c4_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(
+            create_fulltext_index,
+            run_statements({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
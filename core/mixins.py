@@ -3,6 +3,7 @@ import re
 from functools import reduce
 
 from branches.models import Branch
+from core.services import search_index
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -268,6 +269,7 @@ class HybridListView(CustomLoginRequiredMixin, ExportMixin, SingleTableMixin, Fi
     branch_filter = True
     branch_field_name = 'branch'
     search_fields = []  # Set dynamically
+    search_index = None  # SearchDocument kind; when set (and indexed), ?q= is answered from the search index
     
     def setup_search_fields(self):
         """Dynamically sets search_fields to all CharField and TextField in the model."""
@@ -296,10 +298,14 @@ class HybridListView(CustomLoginRequiredMixin, ExportMixin, SingleTableMixin, Fi
                 branch = Branch.objects.get(id=branch_id)
                 queryset = queryset.filter(**{self.branch_field_name: branch})
 
+        query = self.request.GET.get("q")
+        if query and self.search_index and search_index.is_indexed(self.search_index):
+            queryset = queryset.filter(pk__in=search_index.matching_ids(self.search_index, query))
+            query = None
+
         self.setup_search_fields()
         search_fields = getattr(self, "search_fields", None)
         if search_fields:
-            query = self.request.GET.get("q")
             if query:
                 q_list = [Q(**{f"{field}__icontains": query}) for field in search_fields]
                 queryset = queryset.filter(reduce(operator.or_, q_list))
@@ -96,4 +96,47 @@ class CompanyProfile(BaseModel):
         return reverse_lazy("core:company_profile_update", kwargs={"pk": self.pk})
 
     def get_delete_url(self):
-        return reverse_lazy("core:company_profile_delete", kwargs={"pk": self.pk})
\ No newline at end of file
+        return reverse_lazy("core:company_profile_delete", kwargs={"pk": self.pk})
+
+class SearchDocument(models.Model):
+    """
+    One row per searchable record (student, lead, employee, account), holding
+    normalized copies of the fields people search by. Kept in sync by
+    core.signals; rebuilt with the rebuild_search_index command.
+    """
+
+    KIND_CHOICES = (
+        ("student", "Student"),
+        ("lead", "Lead"),
+        ("employee", "Employee"),
+        ("account", "Account"),
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    branch = models.ForeignKey("branches.Branch", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    url = models.CharField(max_length=255, blank=True)
+    normalized_name = models.CharField(max_length=255, blank=True)
+    phone_digits = models.CharField(max_length=32, blank=True)
+    admission_number = models.CharField(max_length=50, blank=True)
+    email = models.CharField(max_length=254, blank=True)
+    account_code = models.CharField(max_length=50, blank=True)
+    body = models.TextField(blank=True, help_text="Every normalized term of the record, space separated")
+    is_active = models.BooleanField(default=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("kind", "object_id")
+        # Pattern opclasses let PostgreSQL serve LIKE 'term%' from the index;
+        # other backends ignore them.
+        indexes = [
+            models.Index(fields=["normalized_name"], name="core_search_normali_d05374_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["phone_digits"], name="core_search_phone_d_daf6e2_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["admission_number"], name="core_search_admissi_b53a06_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["email"], name="core_search_email_8c2c00_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["account_code"], name="core_search_account_8ce7c4_idx", opclasses=["varchar_pattern_ops"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import pdfkit
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from weasyprint import CSS, HTML
+
+ENGINE_WKHTMLTOPDF = "wkhtmltopdf"
+ENGINE_WEASYPRINT = "weasyprint"
+
+ASSET_PATTERN = re.compile(r"""(?:src|href)\s*=\s*["']([^"']+)["']|url\(\s*["']?([^"')]+)["']?\s*\)""", re.IGNORECASE)
+
+_executor = None
+
+
+def get_executor():
+    """Shared pool that bounds how many PDFs render at the same time."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, "PDF_RENDER_WORKERS", 2), thread_name_prefix="pdf-render")
+    return _executor
+
+
+def _asset_path(reference):
+    """Map a src/href/url() reference to a local file, if it is one of ours."""
+    if reference.startswith("data:"):
+        return None
+    path = urlparse(reference).path if "://" in reference else reference
+    if path.startswith(settings.STATIC_URL):
+        relative = path[len(settings.STATIC_URL):]
+        return finders.find(relative) or os.path.join(settings.STATIC_ROOT, relative)
+    if path.startswith(settings.MEDIA_URL):
+        return os.path.join(settings.MEDIA_ROOT, path[len(settings.MEDIA_URL):])
+    if os.path.isabs(path):
+        return path
+    return None
+
+
+def asset_fingerprint(html):
+    """Size and mtime of every local asset the document references."""
+    parts = []
+    for match in ASSET_PATTERN.finditer(html):
+        path = _asset_path(match.group(1) or match.group(2))
+        if not path:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{path}:{stat.st_size}:{int(stat.st_mtime)}")
+    return "|".join(sorted(set(parts)))
+
+
+def pdf_content_hash(html, options=None, engine=ENGINE_WKHTMLTOPDF):
+    digest = hashlib.sha256()
+    digest.update(engine.encode())
+    digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode())
+    digest.update(html.encode("utf-8"))
+    digest.update(asset_fingerprint(html).encode())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def cache_storage():
+    """Private storage for rendered PDFs: outside MEDIA_ROOT and without a URL."""
+    return FileSystemStorage(location=getattr(settings, "PDF_CACHE_ROOT", os.path.join(settings.BASE_DIR, "private", "pdf_cache")), base_url=None)
+
+
+def _cache_path(content_hash):
+    return f"{content_hash[:2]}/{content_hash}.pdf"
+
+
+def render_pdf_bytes(html, options=None, engine=ENGINE_WKHTMLTOPDF, base_url=None):
+    """Render without caching. WeasyPrint takes its stylesheets from options["stylesheets"]."""
+    options = dict(options or {})
+    if engine == ENGINE_WEASYPRINT:
+        stylesheets = [CSS(string=css) for css in options.get("stylesheets", [])]
+        return HTML(string=html, base_url=base_url).write_pdf(stylesheets=stylesheets)
+
+    kwargs = {}
+    wkhtmltopdf_bin = os.environ.get("WKHTMLTOPDF_BIN")
+    if wkhtmltopdf_bin:
+        kwargs["configuration"] = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_bin)
+    return pdfkit.from_string(html, False, options=options, **kwargs)
+
+
+def _render_and_store(html, options, engine, base_url, content_hash):
+    content = render_pdf_bytes(html, options, engine, base_url)
+    path = _cache_path(content_hash)
+    if not cache_storage().exists(path):
+        cache_storage().save(path, ContentFile(content))
+    return content
+
+
+def _submit(html, options, engine, base_url, use_cache):
+    """Return (cached_bytes, None) on a hit, else (None, future)."""
+    content_hash = pdf_content_hash(html, options, engine)
+    if use_cache:
+        path = _cache_path(content_hash)
+        if cache_storage().exists(path):
+            with cache_storage().open(path, "rb") as cached:
+                return cached.read(), None
+        return None, get_executor().submit(_render_and_store, html, options, engine, base_url, content_hash)
+    return None, get_executor().submit(render_pdf_bytes, html, options, engine, base_url)
+
+
+def get_or_render_pdf(html, options=None, engine=ENGINE_WKHTMLTOPDF, base_url=None, use_cache=True):
+    """
+    Serve the PDF for this exact HTML (plus referenced assets) from storage,
+    rendering it through the shared worker pool on a miss.
+    """
+    content, future = _submit(html, options, engine, base_url, use_cache)
+    if future is None:
+        return content
+    return future.result(timeout=getattr(settings, "PDF_RENDER_TIMEOUT", 120))
+
+
+def render_many(documents, engine=ENGINE_WKHTMLTOPDF, base_url=None, use_cache=True):
+    """
+    Render (html, options) pairs concurrently through the pool; results keep
+    the input order.
+    """
+    pending = [_submit(html, options, engine, base_url, use_cache) for html, options in documents]
+    timeout = getattr(settings, "PDF_RENDER_TIMEOUT", 120)
+    return [content if future is None else future.result(timeout=timeout) for content, future in pending]
+
+
+def iter_render(documents, engine=ENGINE_WKHTMLTOPDF, base_url=None, use_cache=True, window=None):
+    """
+    Lazily render an iterable of (html, options) pairs through the pool and
+    yield the PDFs in input order, keeping at most `window` documents in
+    flight so a large batch never sits in memory at once.
+    """
+    window = window or getattr(settings, "PDF_RENDER_WORKERS", 2) * 2
+    timeout = getattr(settings, "PDF_RENDER_TIMEOUT", 120)
+    pending = deque()
+    for html, options in documents:
+        pending.append(_submit(html, options, engine, base_url, use_cache))
+        if len(pending) >= window:
+            content, future = pending.popleft()
+            yield content if future is None else future.result(timeout=timeout)
+    while pending:
+        content, future = pending.popleft()
+        yield content if future is None else future.result(timeout=timeout)
+
+
+def clear_cache(max_age_days):
+    """Delete cached PDFs written more than max_age_days ago; returns how many were removed."""
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    root = cache_storage().location
+    removed = 0
+    for directory, _subdirectories, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
@@ -2,11 +2,10 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import os
 from os.path import basename
 from os.path import splitext
 
-import pdfkit
+from core.pdf_service import ENGINE_WKHTMLTOPDF, get_or_render_pdf, iter_render, render_many
 from django.conf import settings
 from django.http import HttpResponse
 from django.template import loader
@@ -24,6 +23,12 @@ class PDFView(TemplateView):
     #: Set pdfkit options dict.
     pdfkit_options = None
 
+    #: Rendering engine, see core.pdf_service.
+    pdf_engine = ENGINE_WKHTMLTOPDF
+
+    #: Serve identical documents from the content-hash cache.
+    pdf_cache = True
+
     def get(self, request, *args, **kwargs):
         content = self.render_pdf(*args, **kwargs)
         response = HttpResponse(content, content_type="application/pdf")
@@ -35,13 +40,37 @@ class PDFView(TemplateView):
     def render_pdf(self, *args, **kwargs):
         html = self.render_html(*args, **kwargs)
         options = self.get_pdfkit_options()
+        use_cache = self.pdf_cache
         if "debug" in self.request.GET and settings.DEBUG:
-            options["debug-javascript"] = 1
-        kwargs = {}
-        wkhtmltopdf_bin = os.environ.get("WKHTMLTOPDF_BIN")
-        if wkhtmltopdf_bin:
-            kwargs["configuration"] = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_bin)
-        return pdfkit.from_string(html, False, options=options, **kwargs)
+            options = dict(options, **{"debug-javascript": 1})
+            use_cache = False
+        return get_or_render_pdf(html, options, engine=self.pdf_engine, base_url=self.request.build_absolute_uri("/"), use_cache=use_cache)
+
+    def render_batch(self, kwargs_list):
+        """Render one document per kwargs dict (e.g. one per student) in the worker pool."""
+        original_kwargs = self.kwargs
+        documents = []
+        try:
+            for kwargs in kwargs_list:
+                self.kwargs = dict(original_kwargs, **kwargs)
+                documents.append((self.render_html(**kwargs), self.get_pdfkit_options()))
+        finally:
+            self.kwargs = original_kwargs
+        return render_many(documents, engine=self.pdf_engine, base_url=self.request.build_absolute_uri("/"), use_cache=self.pdf_cache)
+
+    def iter_batch(self, kwargs_iter):
+        """Like render_batch, but renders lazily and yields each PDF as soon as it is its turn."""
+
+        def documents():
+            original_kwargs = self.kwargs
+            for kwargs in kwargs_iter:
+                self.kwargs = dict(original_kwargs, **kwargs)
+                try:
+                    yield self.render_html(**kwargs), self.get_pdfkit_options()
+                finally:
+                    self.kwargs = original_kwargs
+
+        return iter_render(documents(), engine=self.pdf_engine, base_url=self.request.build_absolute_uri("/"), use_cache=self.pdf_cache)
 
     def get_pdfkit_options(self):
         if self.pdfkit_options is not None:
@@ -0,0 +1,284 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from core.models import SearchDocument
+
+NON_ALNUM = re.compile(r"[^0-9a-z]+")
+NON_DIGIT = re.compile(r"\D+")
+FTS_TABLE = "core_searchdocument_fts"
+
+# Who may see each kind in the global search (superusers see everything)
+STAFF = ("branch_staff", "admin_staff", "teacher", "mentor", "ceo", "cfo", "coo", "hr", "cmo")
+SALES = ("branch_staff", "partner", "admin_staff", "tele_caller", "mentor", "sales_head", "ceo", "cfo", "coo", "hr", "cmo")
+MANAGEMENT = ("admin_staff", "ceo", "cfo", "coo", "hr", "cmo")
+ACCOUNTING = ("branch_staff", "admin_staff", "ceo", "cfo", "coo")
+
+
+def normalize(value):
+    """Lowercase, strip accents and collapse everything but letters and digits to single spaces."""
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    value = "".join(char for char in value if not unicodedata.combining(char)).lower()
+    return NON_ALNUM.sub(" ", value).strip()
+
+
+def digits(value):
+    return NON_DIGIT.sub("", str(value or ""))
+
+
+def phone_terms(*numbers):
+    """Every number's digits, plus its last ten digits so numbers match with or without the country code."""
+    terms = []
+    for number in numbers:
+        number = digits(number)
+        if number:
+            terms.append(number)
+            if len(number) > 10:
+                terms.append(number[-10:])
+    return terms
+
+
+def branch_scope(user):
+    """Records of the user's own branch; None means unrestricted."""
+    if user.is_superuser or getattr(user, "usertype", None) in MANAGEMENT:
+        return None
+    return Q(branch=user.branch_id)
+
+
+def student_scope(user):
+    """Mirrors AdmissionListView: mentors see every student, teachers their branch and course."""
+    usertype = getattr(user, "usertype", None)
+    if usertype == "mentor":
+        return None
+    if usertype == "teacher":
+        employee = getattr(user, "employee", None)
+        if employee is None:
+            return Q(pk__in=[])
+        return Q(branch=user.branch_id, course=employee.course_id)
+    return branch_scope(user)
+
+
+def lead_scope(user):
+    """Tele-callers see only the leads assigned to them, sales roles every lead."""
+    usertype = getattr(user, "usertype", None)
+    if usertype == "tele_caller":
+        return Q(tele_caller__user=user)
+    if usertype in ("mentor", "sales_head", "partner"):
+        return None
+    return branch_scope(user)
+
+
+@dataclass(frozen=True)
+class Source:
+    model: str
+    permissions: tuple
+    document: Callable
+    related: tuple = ()
+    scope: Callable = branch_scope
+
+
+def student_document(admission):
+    name = " ".join(filter(None, [admission.first_name, admission.last_name]))
+    phones = phone_terms(admission.contact_number, admission.whatsapp_number, admission.parent_contact_number, admission.parent_whatsapp_number)
+    return {
+        "title": name,
+        "subtitle": admission.admission_number or "",
+        "url": str(admission.get_absolute_url()),
+        "normalized_name": normalize(name),
+        "phone_digits": phones[0] if phones else "",
+        "admission_number": (admission.admission_number or "").lower(),
+        "email": (admission.personal_email or "").lower(),
+        "terms": [name, admission.admission_number, admission.personal_email, admission.parent_mail_id, admission.parent_first_name, admission.city, *phones],
+    }
+
+
+def lead_document(enquiry):
+    phones = phone_terms(enquiry.contact_number)
+    return {
+        "title": enquiry.full_name or "",
+        "subtitle": enquiry.contact_number or "",
+        "url": str(enquiry.get_absolute_url()),
+        "normalized_name": normalize(enquiry.full_name),
+        "phone_digits": phones[0] if phones else "",
+        "terms": [enquiry.full_name, enquiry.city, enquiry.district, *phones],
+    }
+
+
+def employee_document(employee):
+    name = " ".join(filter(None, [employee.first_name, employee.last_name]))
+    phones = phone_terms(employee.mobile, employee.whatsapp)
+    return {
+        "title": name,
+        "subtitle": employee.employee_id or "",
+        "url": str(employee.get_absolute_url()),
+        "normalized_name": normalize(name),
+        "phone_digits": phones[0] if phones else "",
+        "email": (employee.official_email or employee.personal_email or "").lower(),
+        "terms": [name, employee.employee_id, employee.personal_email, employee.official_email, employee.user.email if employee.user_id else None, *phones],
+    }
+
+
+def account_document(account):
+    return {
+        "title": str(account),
+        "subtitle": account.code,
+        "url": reverse("accounting:account_detail", kwargs={"pk": account.pk}),
+        "normalized_name": normalize(account.name),
+        "account_code": (account.code or "").lower(),
+        "terms": [account.name, account.alias_name, account.code],
+    }
+
+
+SOURCES = {
+    "student": Source("admission.Admission", STAFF, student_document, scope=student_scope),
+    "lead": Source("admission.AdmissionEnquiry", SALES, lead_document, scope=lead_scope),
+    "employee": Source("employees.Employee", MANAGEMENT, employee_document, related=("user",)),
+    "account": Source("accounting.Account", ACCOUNTING, account_document),
+}
+
+
+def source_model(kind):
+    return apps.get_model(SOURCES[kind].model)
+
+
+def document_values(kind, instance):
+    values = SOURCES[kind].document(instance)
+    terms = values.pop("terms")
+    values["body"] = " ".join(dict.fromkeys(normalize(" ".join(map(str, filter(None, terms)))).split()))
+    values["branch_id"] = instance.branch_id
+    values["is_active"] = getattr(instance, "is_active", True)
+    values["title"] = values["title"][:255]
+    values["normalized_name"] = values["normalized_name"][:255]
+    return values
+
+
+def index_instance(kind, instance):
+    SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=document_values(kind, instance))
+
+
+def index_instances(kind, instances):
+    """Index rows written with bulk_create/bulk_update, which skip post_save."""
+    instances = [instance for instance in instances if instance.pk]
+    SearchDocument.objects.filter(kind=kind, object_id__in=[instance.pk for instance in instances]).delete()
+    SearchDocument.objects.bulk_create([SearchDocument(kind=kind, object_id=instance.pk, **document_values(kind, instance)) for instance in instances])
+
+
+def remove_instance(kind, pk):
+    SearchDocument.objects.filter(kind=kind, object_id=pk).delete()
+
+
+# Kinds seen with documents; an index never goes back to empty outside rebuild()
+_indexed_kinds = set()
+
+
+def is_indexed(kind):
+    """Whether the kind has documents yet; list views search the old way until it does."""
+    if kind not in _indexed_kinds and SearchDocument.objects.filter(kind=kind).exists():
+        _indexed_kinds.add(kind)
+    return kind in _indexed_kinds
+
+
+def backfill(batch_size=500):
+    """Rebuild only the kinds that have records but no documents yet, e.g. right after the index is introduced."""
+    empty = [kind for kind in SOURCES if not is_indexed(kind) and source_model(kind)._base_manager.exists()]
+    return rebuild(empty, batch_size) if empty else {}
+
+
+def rebuild(kinds=None, batch_size=500):
+    """Recreate the documents of the given kinds (all by default); returns {kind: count}."""
+    counts = {}
+    for kind in kinds or SOURCES:
+        with transaction.atomic():
+            SearchDocument.objects.filter(kind=kind).delete()
+            documents = []
+            for instance in source_model(kind)._base_manager.select_related(*SOURCES[kind].related).iterator(chunk_size=batch_size):
+                documents.append(SearchDocument(kind=kind, object_id=instance.pk, **document_values(kind, instance)))
+                if len(documents) >= batch_size:
+                    SearchDocument.objects.bulk_create(documents)
+                    documents = []
+            SearchDocument.objects.bulk_create(documents)
+        counts[kind] = SearchDocument.objects.filter(kind=kind).count()
+    return counts
+
+
+@lru_cache(maxsize=None)
+def fts_available():
+    """Whether the 0002 migration could create the FTS5 table (SQLite built without FTS5 cannot)."""
+    return connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names()
+
+
+def body_match(terms):
+    """
+    Every term must appear in body: FTS5 prefix tokens on SQLite, a substring
+    match (served by the pg_trgm index) on PostgreSQL and other backends.
+    """
+    if fts_available():
+        expression = " ".join('"%s"*' % term for term in terms)
+        return Q(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]))
+    condition = Q()
+    for term in terms:
+        condition &= Q(body__contains=term)
+    return condition
+
+
+def visible_to(user, kinds):
+    """Q limiting each kind's documents to the records the user's list views show."""
+    if not kinds:
+        return Q(pk__in=[])
+    condition = Q()
+    for kind in kinds:
+        scope = SOURCES[kind].scope(user)
+        visible = Q(kind=kind)
+        if scope is not None:
+            visible &= Q(object_id__in=source_model(kind)._base_manager.filter(scope).values("pk"))
+        condition |= visible
+    return condition
+
+
+def search(query, kinds=None, branch=None, active_only=True, user=None):
+    """
+    SearchDocuments matching the query, exact-prefix hits on the indexed
+    columns (name, phone, admission number, email, account code) first.
+    With a user, only documents of records that user may open are returned.
+    """
+    terms = normalize(query).split()
+    if not terms:
+        return SearchDocument.objects.none()
+
+    raw = str(query).strip().lower()
+    phone = digits(query)
+    prefix = Q(normalized_name__startswith=" ".join(terms)) | Q(admission_number__startswith=raw) | Q(email__startswith=raw) | Q(account_code__startswith=raw)
+    if len(phone) >= 4:
+        prefix |= Q(phone_digits__startswith=phone)
+        if len(phone) > 10:
+            prefix |= Q(phone_digits__startswith=phone[-10:])
+
+    documents = SearchDocument.objects.filter(prefix | body_match(terms))
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    if branch:
+        documents = documents.filter(branch=branch)
+    if user is not None:
+        documents = documents.filter(visible_to(user, kinds or allowed_kinds(user)))
+    if active_only:
+        documents = documents.filter(is_active=True)
+    return documents.annotate(
+        prefix_hit=Case(When(prefix, then=Value(0)), default=Value(1), output_field=IntegerField())
+    ).order_by("prefix_hit", "normalized_name")
+
+
+def allowed_kinds(user):
+    return [kind for kind, source in SOURCES.items() if user.is_superuser or getattr(user, "usertype", None) in source.permissions]
+
+
+def matching_ids(kind, query):
+    """Primary keys of the kind's records matching the query, as a subquery for HybridListView."""
+    return search(query, kinds=[kind], active_only=False).values("object_id")
@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.db.models.signals import post_delete, post_save
+
+from core.services.search_index import SOURCES, backfill, index_instance, remove_instance, source_model
+
+
+def update_search_document(kind, sender, instance, **kwargs):
+    index_instance(kind, instance)
+
+
+def remove_search_document(kind, sender, instance, **kwargs):
+    remove_instance(kind, instance.pk)
+
+
+def backfill_search_index(sender, using="default", **kwargs):
+    """
+    Fill the kinds that are still empty once migrate has finished. Runs with
+    the real models after every app is migrated, which a data migration in
+    core could not rely on.
+    """
+    if using == "default":
+        backfill()
+
+
+for kind in SOURCES:
+    model = source_model(kind)
+    post_save.connect(partial(update_search_document, kind), sender=model, weak=False, dispatch_uid=f"search_index_save_{kind}")
+    post_delete.connect(partial(remove_search_document, kind), sender=model, weak=False, dispatch_uid=f"search_index_delete_{kind}")
@@ -11,6 +11,8 @@ urlpatterns = [
     path("id-card/<str:pk>/", views.IDCardView.as_view(), name="id_card"),
     path("id-card/", views.IDCardView.as_view(), name="my_id_card"),
 
+    path("api/search/", views.GlobalSearchView.as_view(), name="global_search"),
+
     path('firebase-messaging-sw.js', views.ServiceWorkerView.as_view(), name='firebase_sw'),
 
     #company profile
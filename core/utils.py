@@ -10,6 +10,40 @@ from django.core.files.storage import default_storage
 from django.urls import reverse_lazy
 from django.utils.http import urlencode
 
+class _ZipStream:
+    """Write-only file object that hands zipfile output back chunk by chunk."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files):
+    """
+    Yield a zip archive built from an iterable of (name, bytes) pairs without
+    keeping more than one member in memory; feed it to StreamingHttpResponse.
+    """
+    import zipfile
+
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+            yield stream.pop()
+    yield stream.pop()
+
+
 def build_url(viewname, kwargs=None, query_params=None):
     """
     Helper function to build a URL with optional path parameters and query parameters.
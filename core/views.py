@@ -10,6 +10,7 @@ from django_tables2 import RequestConfig
 from django.db.models import Count
 from core.pdfview import PDFView
 from datetime import date, datetime, timedelta
+from dateutil.relativedelta import relativedelta
 from django.db.models import Sum, F, Value, DecimalField
 from django.db.models.functions import Coalesce
 from django.conf import settings
@@ -22,7 +23,10 @@ from branches.tables import BranchTable
 from admission.models import Admission, Attendance, FeeReceipt, AdmissionEnquiry, FeeStructure
 from admission.tables import AdmissionEnquiryTable
 from employees.models import Employee, Partner
-from masters.models import Batch, Course, HeroBanner, Holiday, LeaveRequest, RequestSubmission
+from masters.models import Batch, Course, HeroBanner, Holiday, RequestSubmission
+from masters.services import request_inbox
+from masters.services.leave_index import LeaveIndex
+from core.services import search_index
 
 from .forms import HomeForm
 from .models import CompanyProfile
@@ -33,7 +37,7 @@ from django.shortcuts import render
 from django.urls import reverse_lazy
 
 from django.views import View
-from django.http import HttpResponse, HttpResponseNotFound
+from django.http import HttpResponse, HttpResponseNotFound, JsonResponse
 from django.contrib.staticfiles import finders
 
 from core.tables import SettingsTable
@@ -50,12 +54,7 @@ class HomeView(mixins.HybridTemplateView):
         # Define the stages to include in financial calculations
         FINANCIAL_STAGES = ["active", "completed", "placed", "internship"]
 
-        assigned_requests = RequestSubmission.objects.filter(is_active=True)
-
-        if user.usertype == "branch_staff":
-            context["assigned_requests"] = assigned_requests.filter(current_usertype=user.usertype, creator=user).order_by('-created')
-        else:
-            context["assigned_requests"] = assigned_requests.filter(current_usertype=user.usertype).order_by('-created')
+        context["assigned_requests"] = request_inbox.inbox(user)
 
         # --- UPDATED: Main Dashboard Totals Calculation ---
         # Removed is_active=True and filtered by specific stage_statuses
@@ -118,20 +117,6 @@ class HomeView(mixins.HybridTemplateView):
                 
                 attendance_records = Attendance.objects.filter(student=student_admission, is_active=True)
 
-                leave_requests = LeaveRequest.objects.filter(student=student_admission)
-
-                leave_map = {}
-                for leave in leave_requests:
-                    current = leave.start_date
-                    while current <= leave.end_date:
-                        leave_map[current] = {
-                            "status": leave.status.lower(),
-                            "subject": leave.subject,
-                            "reason": leave.reason,
-                            "attachment": leave.attachment.url if leave.attachment else None,
-                        }
-                        current += timedelta(days=1)
-
                 start_year = admission.batch.starting_date.year
                 
                 batch_end_date = getattr(admission.batch, "ending_date", None)
@@ -140,6 +125,17 @@ class HomeView(mixins.HybridTemplateView):
                 else:
                     end_year = date.today().year
 
+                leave_index = LeaveIndex.load([student_admission], date(start_year, 1, 1), date(end_year, 12, 31), statuses=None)
+                leave_map = {
+                    day: {
+                        "status": leave.status.lower(),
+                        "subject": leave.subject,
+                        "reason": leave.reason,
+                        "attachment": leave.attachment.url if leave.attachment else None,
+                    }
+                    for (_, day), leave in leave_index.by_day().items()
+                }
+
                 months = []
                 for year in range(start_year, end_year + 1):
                     for month in range(1, 13):
@@ -363,21 +359,18 @@ class HomeView(mixins.HybridTemplateView):
                     register__date=today
                 )
 
-                student_ids = student_list.values_list('id', flat=True)
-                leave_requests = LeaveRequest.objects.filter(student_id__in=student_ids)
-                
-                leave_map = {}
-                for leave in leave_requests:
-                    current = leave.start_date
-                    while current <= leave.end_date:
-                        key = (leave.student_id, current)
-                        leave_map[key] = {
-                            "status": leave.status.lower(),
-                            "subject": leave.subject,
-                            "reason": leave.reason,
-                            "attachment": leave.attachment if leave.attachment else None,
-                        }
-                        current += timedelta(days=1)
+                month_start = date(selected_year, selected_month, 1)
+                month_end = month_start + relativedelta(months=1, days=-1)
+                leave_index = LeaveIndex.load(student_list, month_start, month_end, statuses=None)
+                leave_map = {
+                    key: {
+                        "status": leave.status.lower(),
+                        "subject": leave.subject,
+                        "reason": leave.reason,
+                        "attachment": leave.attachment if leave.attachment else None,
+                    }
+                    for key, leave in leave_index.by_day().items()
+                }
 
                 holidays = Holiday.objects.filter(
                     is_active=True,
@@ -580,9 +573,10 @@ class HomeView(mixins.HybridTemplateView):
             context["total_course_count"] = Course.objects.count()
             context["demo_leads"] = AdmissionEnquiry.objects.filter(status="demo", is_active=True).count()
             context["incomplete_requests"] = RequestSubmission.objects.filter(is_active=True, is_request_completed="false").order_by('-created')
-            context["total_partners_count"] = Partner.objects.count()
-            context["company_profile"] = CompanyProfile.objects.first()
-            context["partners"] = Partner.objects.all().order_by('-shares_owned')
+            company_profile = CompanyProfile.objects.first()
+            context["company_profile"] = company_profile
+            context["partners"] = list(Partner.objects.with_shares(company_profile).order_by('-shares_owned'))
+            context["total_partners_count"] = len(context["partners"])
             
             branch_infos = Branch.objects.filter(is_active=True).annotate(
                 student_count=Count(
@@ -943,6 +937,37 @@ class ServiceWorkerView(View):
         return response
 
     
+class GlobalSearchView(mixins.CustomLoginRequiredMixin, View):
+    """Students, leads, employees and accounts matching ?q=, limited to the kinds and records the user may see."""
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        kinds = search_index.allowed_kinds(request.user)
+        requested = [kind for kind in request.GET.getlist("kind") if kind in kinds]
+        if requested:
+            kinds = requested
+        if len(query) < 2 or not kinds:
+            return JsonResponse({"success": True, "results": []})
+
+        try:
+            limit = max(1, min(int(request.GET.get("limit", 20)), 50))
+        except ValueError:
+            limit = 20
+
+        branch_id = request.session.get("branch")
+        if request.user.is_superuser or getattr(request.user, "usertype", None) == "admin_staff":
+            branch_id = None
+
+        documents = search_index.search(query, kinds=kinds, branch=branch_id, user=request.user)[:limit]
+        return JsonResponse({
+            "success": True,
+            "results": [
+                {"kind": document.kind, "id": document.object_id, "title": document.title, "subtitle": document.subtitle, "url": document.url}
+                for document in documents
+            ],
+        })
+
+
 class CompanyProfileView(mixins.HybridTemplateView):
     template_name = "core/company/company_profile.html"
     permissions = ['is_superuser']
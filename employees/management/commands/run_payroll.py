@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from branches.models import Branch
+from employees.services.payroll_run import run_payroll
+
+
+class Command(BaseCommand):
+    help = 'Creates the monthly payroll (and salary vouchers) for every active employee of a branch'
+
+    def add_arguments(self, parser):
+        today = date.today()
+        parser.add_argument('--branch', type=int, action='append', help='Branch id (repeatable). Defaults to every branch.')
+        parser.add_argument('--year', type=int, default=today.year)
+        parser.add_argument('--month', type=int, default=today.month)
+        parser.add_argument('--dry-run', action='store_true', help='Calculate and print the payslips without saving anything')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['month'] <= 12:
+            raise CommandError("Month must be between 1 and 12.")
+
+        branches = Branch.objects.all()
+        if options['branch']:
+            branches = branches.filter(pk__in=options['branch'])
+
+        for branch in branches:
+            result = run_payroll(branch, options['year'], options['month'], dry_run=options['dry_run'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{branch}:"))
+            for payroll in result.payrolls:
+                self.stdout.write(f"  {payroll.employee.fullname()}: gross {payroll.gross_salary}, absences {payroll.absences}, net {payroll.net_salary}")
+            for employee, reason in result.skipped:
+                self.stdout.write(self.style.WARNING(f"  - {employee.fullname()} skipped: {reason}"))
+            self.stdout.write(self.style.SUCCESS(f"  {result.summary()}"))
@@ -1,26 +1,16 @@
 from django.core.management.base import BaseCommand
-from employees.models import Employee, EmployeeLeaveBalance
-from datetime import date
+from employees.services.leave_accrual import accrue_leave_balances
 
 class Command(BaseCommand):
     help = 'Updates leave balances for ALL employees for the new month'
 
     def handle(self, *args, **kwargs):
         self.stdout.write("Starting Monthly Leave Accrual...")
-        
-        employees = Employee.objects.all()
-        count = 0
 
-        for employee in employees:
-            # Get or Create ensures we don't crash on missing records
-            balance, created = EmployeeLeaveBalance.objects.get_or_create(
-                employee=employee,
-                defaults={'paid_leave_balance': 1.0, 'wfh_balance': 1.0}
-            )
-            
-            # This function (defined in your models.py) checks the date
-            # and adds the new leaves if a month has passed.
-            balance.accrue_monthly()
-            count += 1
+        # Missing balances are bulk created and every due balance is accrued
+        # with a single UPDATE; running it again in the same month changes nothing.
+        run = accrue_leave_balances()
 
-        self.stdout.write(self.style.SUCCESS(f"Successfully updated balances for {count} employees."))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {run.balances_created} balances and accrued {run.balances_accrued} for {run.accrual_month:%B %Y}."
+        ))
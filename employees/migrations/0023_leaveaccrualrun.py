@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [migrations.swappable_dependency(settings.AUTH_USER_MODEL), ('employees', '0022_alter_employeeattendanceregister_date_and_more')]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveAccrualRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('accrual_month', models.DateField(help_text='First day of the month balances were accrued up to')),
+                ('balances_created', models.PositiveIntegerField(default=0)),
+                ('balances_accrued', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                (
+                    'triggered_by',
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leave_accrual_runs', to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={'verbose_name': 'Leave Accrual Run', 'verbose_name_plural': 'Leave Accrual Runs', 'ordering': ('-created',)},
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2 on 2026-10-18 13:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_ledger(apps, schema_editor):
+    """One opening entry per existing balance so the ledger sums to the summary rows."""
+    EmployeeLeaveBalance = apps.get_model('employees', 'EmployeeLeaveBalance')
+    EmployeeLeaveLedger = apps.get_model('employees', 'EmployeeLeaveLedger')
+    entries = []
+    for employee_id, paid, wfh in EmployeeLeaveBalance.objects.values_list('employee_id', 'paid_leave_balance', 'wfh_balance').iterator():
+        for kind, days in (('paid', paid), ('wfh', wfh)):
+            if days:
+                entries.append(
+                    EmployeeLeaveLedger(
+                        employee_id=employee_id, kind=kind, entry_type='opening', days=days, balance_after=days, note='Balance when the ledger was introduced'
+                    )
+                )
+    EmployeeLeaveLedger.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [migrations.swappable_dependency(settings.AUTH_USER_MODEL), ('employees', '0023_leaveaccrualrun')]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeLeaveLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('paid', 'Paid Leave'), ('wfh', 'Work From Home')], max_length=10)),
+                (
+                    'entry_type',
+                    models.CharField(
+                        choices=[
+                            ('opening', 'Opening Balance'),
+                            ('accrual', 'Monthly Accrual'),
+                            ('carry_cap', 'Carry Forward Cap'),
+                            ('consumption', 'Leave Taken'),
+                            ('refund', 'Leave Refunded'),
+                            ('adjustment', 'Adjustment'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ('days', models.FloatField(help_text='Signed movement: positive adds to the balance, negative takes from it')),
+                ('balance_after', models.FloatField()),
+                ('note', models.CharField(blank=True, max_length=255, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    'creator',
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leave_ledger_entries', to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger', to='employees.employee')),
+                (
+                    'leave_request',
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='employees.employeeleaverequest'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Employee Leave Ledger Entry',
+                'verbose_name_plural': 'Employee Leave Ledger',
+                'ordering': ('-created', '-id'),
+                'indexes': [models.Index(fields=['employee', 'kind', 'created'], name='employees_e_employe_2bfd75_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -18,6 +18,8 @@ from core.choices import RESIDENCE_CHOICES
 from core.choices import YEAR_CHOICES, MONTH_CHOICES, PAYMENT_METHOD_CHOICES, PAYROLL_STATUS
 
 from django.db import models
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
 from django.urls import reverse_lazy
 from django.core.exceptions import ValidationError
 from easy_thumbnails.fields import ThumbnailerImageField
@@ -87,7 +89,69 @@ class Department(BaseModel):
         return self.employee_set.filter(is_active=True).count()
 
 
+class EmployeeQuerySet(models.QuerySet):
+    def with_payroll_totals(self):
+        """
+        Annotates total_due, total_paid, advance_paid and pending_due with one
+        correlated subquery sum per table, instead of three aggregates per employee.
+        """
+        amount = DecimalField(max_digits=15, decimal_places=2)
+
+        def subquery_sum(model, field):
+            totals = (
+                model.objects.filter(employee=OuterRef("pk"), is_active=True)
+                .order_by()
+                .values("employee")
+                .annotate(total=models.Sum(field))
+                .values("total")
+            )
+            return Coalesce(Subquery(totals[:1], output_field=amount), Value(Decimal("0.00")), output_field=amount)
+
+        return self.annotate(
+            total_due=subquery_sum(Payroll, "net_salary"),
+            total_paid=subquery_sum(PayrollPayment, "amount_paid"),
+            advance_paid=subquery_sum(AdvancePayrollPayment, "amount_paid"),
+        ).annotate(
+            payroll_balance=F("total_due") - F("total_paid"),
+            pending_due=Case(
+                When(total_due__gt=F("total_paid"), then=F("total_due") - F("total_paid")),
+                default=Value(Decimal("0.00")),
+                output_field=amount,
+            ),
+        )
+
+    def with_leave_counts(self):
+        """
+        Annotates the numbers behind leave_requests_count, approved_count,
+        pending_count, rejected_count and active_leave_count in one grouped query.
+        """
+        today = timezone.now().date()
+        active = Q(leave_requests__is_active=True)
+        return self.annotate(
+            leave_requests_total=Count("leave_requests", filter=active),
+            approved_leaves_total=Count("leave_requests", filter=active & Q(leave_requests__status="approved")),
+            pending_leaves_total=Count("leave_requests", filter=active & Q(leave_requests__status="pending")),
+            rejected_leaves_total=Count("leave_requests", filter=active & Q(leave_requests__status="rejected")),
+            active_leaves_total=Count(
+                "leave_requests",
+                filter=active & Q(leave_requests__status="approved", leave_requests__start_date__lte=today, leave_requests__end_date__gte=today),
+            ),
+        )
+
+
+class EmployeeManager(models.Manager):
+    def get_queryset(self):
+        return EmployeeQuerySet(self.model, using=self._db)
+
+    def with_leave_counts(self):
+        return self.get_queryset().with_leave_counts()
+
+    def with_payroll_totals(self):
+        return self.get_queryset().with_payroll_totals()
+
+
 class Employee(BaseModel):
+    objects = EmployeeManager()
     branch = models.ForeignKey("branches.Branch", on_delete=models.CASCADE, null=True)
     user = models.OneToOneField("accounts.User", on_delete=models.PROTECT, limit_choices_to={"is_active": True}, related_name="employee", null=True)
     first_name = models.CharField(max_length=100)
@@ -221,21 +285,29 @@ class Employee(BaseModel):
 
     @property
     def leave_requests_count(self):
+        if hasattr(self, "leave_requests_total"):
+            return self.leave_requests_total
         return self.leave_requests.filter(is_active=True).count()
 
 
     @property
     def approved_count(self):
+        if hasattr(self, "approved_leaves_total"):
+            return self.approved_leaves_total
         return self.leave_requests.filter(status="approved", is_active=True).count()
 
 
     @property
     def pending_count(self):
+        if hasattr(self, "pending_leaves_total"):
+            return self.pending_leaves_total
         return self.leave_requests.filter(status="pending", is_active=True).count()
 
 
     @property
     def rejected_count(self):
+        if hasattr(self, "rejected_leaves_total"):
+            return self.rejected_leaves_total
         return self.leave_requests.filter(status="rejected", is_active=True).count()
 
 
@@ -244,6 +316,8 @@ class Employee(BaseModel):
         """
         Leaves currently running (today between start & end and approved)
         """
+        if hasattr(self, "active_leaves_total"):
+            return self.active_leaves_total
         today = timezone.now().date()
         return self.leave_requests.filter(
             is_active=True,
@@ -255,8 +329,12 @@ class Employee(BaseModel):
     @property
     def leave_balance_obj(self):
         """Retrieves balance and handles month-to-month logic."""
-        balance, created = EmployeeLeaveBalance.objects.get_or_create(employee=self)
-        # Ensure we check accrual every time we look at the balance
+        try:
+            # Served from select_related("leave_balance") on list pages
+            balance = self.leave_balance
+        except EmployeeLeaveBalance.DoesNotExist:
+            balance, created = EmployeeLeaveBalance.objects.get_or_create(employee=self)
+        # Ensure we check accrual every time we look at the balance (no-op once accrued this month)
         balance.accrue_monthly()
         return balance
 
@@ -416,31 +494,21 @@ class Payroll(BaseModel):
         if self.net_salary < 0:
             self.net_salary = 0
 
-    def calculate_leaves_and_absences(self):
+    @staticmethod
+    def leave_figures(balance, leaves):
         """
-        Calculates Total Leaves, Paid Leaves, and Unpaid Absences based on
-        EmployeeLeaveBalance logic (Carry Limit + 1).
+        Returns (total_taken, paid_leaves, unpaid_absences) for a month's
+        approved leaves, checked against the limits of an EmployeeLeaveBalance.
         """
-        # 1. Get Balance Info
-        balance, _ = EmployeeLeaveBalance.objects.get_or_create(employee=self.employee)
-        
         # Calculate Limits for THIS month:
         # Limit = min(CarryForward, 6) + 1 (Current Month)
         max_paid_limit = min(balance.paid_carry_forward, balance.CARRY_LIMIT_PAID) + balance.MONTHLY_PAID
         max_wfh_limit = min(balance.wfh_carry_forward, balance.CARRY_LIMIT_WFH) + balance.MONTHLY_WFH
 
-        # 2. Fetch Actual Taken Leaves for this Payroll Month
-        leaves_qs = EmployeeLeaveRequest.objects.filter(
-            employee=self.employee,
-            status='approved',
-            start_date__year=self.payroll_year,
-            start_date__month=self.payroll_month
-        )
-
         taken_paid_leaves = 0.0
         taken_wfh_leaves = 0.0
 
-        for leave in leaves_qs:
+        for leave in leaves:
             # Calculate days for this specific leave
             days = leave.total_days
             if leave.leave_type == 'wfh':
@@ -448,35 +516,43 @@ class Payroll(BaseModel):
             else:
                 taken_paid_leaves += days
 
-        # 3. Calculate Unpaid Absences (Excess)
         # Absences = Taken - Limit. (If Taken < Limit, Absences is 0)
         unpaid_paid_type = max(0.0, taken_paid_leaves - max_paid_limit)
         unpaid_wfh_type = max(0.0, taken_wfh_leaves - max_wfh_limit)
 
         total_absences = unpaid_paid_type + unpaid_wfh_type
-        
-        # 4. Calculate Covered (Paid) Leaves
+
         # Total Taken - Unpaid = Paid
         total_taken = taken_paid_leaves + taken_wfh_leaves
-        total_paid_leaves = total_taken - total_absences
+        return total_taken, total_taken - total_absences, total_absences
+
+    def apply_leave_figures(self, balance, leaves):
+        total_taken, total_paid_leaves, total_absences = self.leave_figures(balance, leaves)
 
-        # 5. Set Values to Model
         self.total_leaves = Decimal(str(total_taken))
         self.paid_leaves = Decimal(str(total_paid_leaves))
-        
+
         # Only overwrite absences if it's 0 (allows manual override by HR if needed)
         # Or you can force overwrite: self.absences = Decimal(str(total_absences))
         if self.absences == 0 and total_absences > 0:
             self.absences = Decimal(str(total_absences))
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
+    def calculate_leaves_and_absences(self):
+        """
+        Calculates Total Leaves, Paid Leaves, and Unpaid Absences based on
+        EmployeeLeaveBalance logic (Carry Limit + 1).
+        """
+        balance, _ = EmployeeLeaveBalance.objects.get_or_create(employee=self.employee)
 
-        # 1. Auto-Calculate Leaves if this is a new record or absences is 0
-        # This ensures we pull data from the Leave System
-        self.calculate_leaves_and_absences()
+        leaves_qs = EmployeeLeaveRequest.objects.filter(
+            employee=self.employee,
+            status='approved',
+            start_date__year=self.payroll_year,
+            start_date__month=self.payroll_month
+        )
+        self.apply_leave_figures(balance, leaves_qs)
 
-        # 2. Salary Calculation Logic
+    def calculate_salary(self):
         working_days = Decimal("30.0")
         per_day_salary = self.basic_salary / working_days
 
@@ -485,80 +561,41 @@ class Payroll(BaseModel):
 
         # Gross = Basic + Allowances + Overtime
         self.gross_salary = self.basic_salary + self.allowances + self.overtime
-        
+
         # Net = Gross - Deductions - Absence Amount
         self.net_salary = self.gross_salary - self.deductions - absence_amount
-        
+
         # Ensure net salary is not negative
         if self.net_salary < 0:
             self.net_salary = 0
 
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        # 1. Auto-Calculate Leaves if this is a new record or absences is 0
+        # This ensures we pull data from the Leave System
+        self.calculate_leaves_and_absences()
+
+        # 2. Salary Calculation Logic
+        self.calculate_salary()
 
-        # 3. CREATE ACCOUNTING ENTRY
-        if is_new and not self.transaction:
-            self.create_accounting_entry()
+        super().save(*args, **kwargs)
+        # 3. The salary voucher is posted by the post_save signal
 
     def create_accounting_entry(self):
         """
         Debit: Salary Expense Account
         Credit: Employee Ledger Account (Liability)
+
+        Idempotent: posts the voucher once and corrects it if the net salary changed.
         """
-        from transactions.models import Transaction, TransactionEntry
-        from accounting.models import Account
+        from employees.services.payroll_accounting import sync_records
 
-        with db_transaction.atomic():
-            # Determine Expense Account based on designation
-            is_teacher = self.employee.designation and "Teacher" in self.employee.designation.name
-            expense_code = '50001' if is_teacher else '50002'
-            
-            try:
-                expense_account = Account.objects.get(code=expense_code, branch=self.employee.branch)
-            except Account.DoesNotExist:
-                expense_account = Account.objects.filter(under__code='STAFF_EXPENSES', branch=self.employee.branch).first()
-
-            if not self.employee.account:
-                return 
-
-            # Create Transaction Header
-            self.transaction = Transaction.objects.create(
-                branch=self.employee.branch,
-                transaction_type='payroll',
-                status='posted',
-                date=timezone.now(),
-                voucher_number=f"PAY/VOUCH/{self.payroll_year}/{self.payroll_month}/{self.employee.pk}",
-                narration=f"Monthly salary for {self.get_payroll_month_display()} {self.payroll_year} - {self.employee.fullname()}",
-                invoice_amount=self.net_salary,
-                total_amount=self.net_salary,
-                balance_amount=self.net_salary
-            )
-            
-            # Debit Salary Expense
-            TransactionEntry.objects.create(
-                transaction=self.transaction,
-                account=expense_account,
-                debit_amount=self.net_salary,
-                credit_amount=0,
-                description=f"Salary Expense - {self.employee.fullname()}"
-            )
-            
-            # Credit Employee Ledger (Liability)
-            TransactionEntry.objects.create(
-                transaction=self.transaction,
-                account=self.employee.account,
-                debit_amount=0,
-                credit_amount=self.net_salary,
-                description="Salary Payable"
-            )
-            
-            # Save the transaction link back to payroll
-            Payroll.objects.filter(pk=self.pk).update(transaction=self.transaction)
+        return sync_records([self])
 
     @property
     def total_paid(self):
         from employees.models import PayrollPayment 
         return PayrollPayment.objects.filter(payroll=self, is_active=True).aggregate(
-            total=Sum("amount_paid")
+            total=models.Sum("amount_paid")
         )["total"] or Decimal("0.00")
 
     @property
@@ -620,56 +657,12 @@ class PayrollPayment(BaseModel):
         Debit: Employee Ledger (Reduces Liability/Payable)
         Credit: Bank/Cash Account (Asset goes down)
         """
-        from transactions.models import Transaction, TransactionEntry
-
-        # 1. PRE-FLIGHT VALIDATION: Prevent NOT NULL errors
-        if not self.employee.account:
-            return False, "Employee has no accounting ledger linked."
-        if not self.paid_from:
-            return False, "Please select the 'Paid From' account (Bank/Cash)."
-
-        with db_transaction.atomic():
-            # 2. Create or Update the Transaction Header
-            if not self.transaction:
-                new_trans = Transaction.objects.create(
-                    branch=self.employee.branch,
-                    transaction_type='payment',
-                    status='posted',
-                    date=timezone.now(),
-                    voucher_number=f"PAY-SLIP/{self.pk}",
-                    narration=f"Salary Payment for {self.payroll} via {self.paid_from.name}",
-                    invoice_amount=self.amount_paid,
-                    total_amount=self.amount_paid
-                )
-                # Link transaction using update() to bypass signals/recursion
-                self.__class__.objects.filter(pk=self.pk).update(transaction=new_trans)
-                self.transaction = new_trans
-            else:
-                self.transaction.invoice_amount = self.amount_paid
-                self.transaction.total_amount = self.amount_paid
-                self.transaction.save(update_fields=['invoice_amount', 'total_amount'])
-
-            # 3. Re-create Entries
-            self.transaction.entries.all().delete()
-
-            # Entry 1: Debit Employee Account
-            TransactionEntry.objects.create(
-                transaction=self.transaction,
-                account=self.employee.account,
-                debit_amount=self.amount_paid,
-                credit_amount=0,
-                description=f"Salary Paid to {self.employee.fullname()}"
-            )
+        from employees.services.payroll_accounting import sync_records
 
-            # Entry 2: Credit Cash/Bank Account
-            TransactionEntry.objects.create(
-                transaction=self.transaction,
-                account=self.paid_from,
-                debit_amount=0,
-                credit_amount=self.amount_paid,
-                description=f"Withdrawal for Employee Salary"
-            )
-            return True, "Success"
+        result = sync_records([self])
+        if result.skipped:
+            return False, result.skipped[0][1]
+        return True, "Success"
 
     def get_absolute_url(self):
         return reverse_lazy("employees:payroll_payment_detail", kwargs={"pk": self.pk})
@@ -729,52 +722,12 @@ class AdvancePayrollPayment(BaseModel):
         Debit: Employee Account (As an Advance/Receivable)
         Credit: Bank/Cash Account
         """
-        from transactions.models import Transaction, TransactionEntry
-
-        if not self.employee.account:
-            return False, "Employee has no accounting ledger linked."
-        if not self.paid_from:
-            return False, "Please select the 'Paid From' account."
-
-        with db_transaction.atomic():
-            if not self.transaction:
-                new_trans = Transaction.objects.create(
-                    branch=self.employee.branch,
-                    transaction_type='payment',
-                    status='posted',
-                    date=timezone.now(),
-                    voucher_number=f"ADV-PAY/{self.pk}",
-                    narration=f"Advance Salary to {self.employee.fullname()}",
-                    invoice_amount=self.amount_paid,
-                    total_amount=self.amount_paid
-                )
-                self.__class__.objects.filter(pk=self.pk).update(transaction=new_trans)
-                self.transaction = new_trans
-            else:
-                self.transaction.invoice_amount = self.amount_paid
-                self.transaction.total_amount = self.amount_paid
-                self.transaction.save()
-
-            self.transaction.entries.all().delete()
-
-            # Debit Employee Account (Advance)
-            TransactionEntry.objects.create(
-                transaction=self.transaction,
-                account=self.employee.account,
-                debit_amount=self.amount_paid,
-                credit_amount=0,
-                description=f"Salary Advance to {self.employee.fullname()}"
-            )
+        from employees.services.payroll_accounting import sync_records
 
-            # Credit Cash/Bank
-            TransactionEntry.objects.create(
-                transaction=self.transaction,
-                account=self.paid_from,
-                debit_amount=0,
-                credit_amount=self.amount_paid,
-                description=f"Advance Payment Withdrawal"
-            )
-            return True, "Success"
+        result = sync_records([self])
+        if result.skipped:
+            return False, result.skipped[0][1]
+        return True, "Success"
 
     def get_absolute_url(self):
         return reverse_lazy("employees:advance_payroll_payment_detail", kwargs={"pk": self.pk})
@@ -794,7 +747,45 @@ class AdvancePayrollPayment(BaseModel):
         return reverse_lazy("employees:advance_payroll_payment_delete", kwargs={"pk": self.pk})
     
 
+class PartnerQuerySet(models.QuerySet):
+    def with_shares(self, company=None):
+        """
+        Annotates share_percentage_value and share_amount_value from a company
+        profile loaded once, instead of a CompanyProfile query per partner.
+        """
+        company = company or CompanyProfile.objects.first()
+        amount = DecimalField(max_digits=15, decimal_places=2)
+        if not company or not company.number_of_shares:
+            zero = Value(Decimal("0.00"), output_field=amount)
+            return self.annotate(share_percentage_value=zero, share_amount_value=zero)
+
+        # SQLite stores whole-number decimals as integers, so the division runs on floats
+        # and the result is cast back to a decimal before rounding.
+        percentage = ExpressionWrapper(
+            Cast("shares_owned", FloatField()) * Value(100.0) / Value(float(company.number_of_shares)), output_field=FloatField()
+        )
+        return self.annotate(share_percentage_value=Round(Cast(percentage, amount), 2, output_field=amount)).annotate(
+            share_amount_value=Round(
+                Cast(
+                    ExpressionWrapper(Value(float(company.total_value)) * Cast("share_percentage_value", FloatField()) / Value(100.0), output_field=FloatField()),
+                    amount,
+                ),
+                2,
+                output_field=amount,
+            )
+        )
+
+
+class PartnerManager(models.Manager):
+    def get_queryset(self):
+        return PartnerQuerySet(self.model, using=self._db)
+
+    def with_shares(self, company=None):
+        return self.get_queryset().with_shares(company)
+
+
 class Partner(BaseModel):
+    objects = PartnerManager()
     user = models.OneToOneField(
         "accounts.User",
         on_delete=models.PROTECT,
@@ -848,63 +839,54 @@ class Partner(BaseModel):
         """
         Partner's share percentage based on total company shares
         """
-        company = CompanyProfile.objects.first()
-        if not company or company.number_of_shares == 0:
-            return Decimal("0.00")
+        if hasattr(self, "share_percentage_value"):
+            return self.share_percentage_value
+        from employees.services.partner_equity import share_percentage
 
-        return round(
-            (self.shares_owned / Decimal(company.number_of_shares)) * 100,
-            2
-        )
+        company = self._cap_table()["company"]
+        return share_percentage(self.shares_owned, company["number_of_shares"] if company else 0)
 
     @property
     def share_amount(self):
         """
         Partner's share value based on company total value
         """
-        company = CompanyProfile.objects.first()
+        if hasattr(self, "share_amount_value"):
+            return self.share_amount_value
+        from employees.services.partner_equity import share_amount
+
+        company = self._cap_table()["company"]
         if not company:
             return Decimal("0.00")
-
-        percentage = self.share_percentage / Decimal("100")
-        return round(company.total_value * percentage, 2)
+        return share_amount(self.share_percentage, company["total_value"])
 
     @property
     def available_shares(self):
         """
         Remaining shares available for allocation
         """
-        company = CompanyProfile.objects.first()
-        if not company:
-            return Decimal("0.00")
+        return self._cap_table()["available_shares"]
 
-        partners_total = Partner.objects.aggregate(
-            total=models.Sum("shares_owned")
-        )["total"] or Decimal("0.00")
+    def _cap_table(self):
+        from employees.services.partner_equity import get_cap_table
 
-        return (
-            Decimal(company.number_of_shares)
-            - Decimal(company.company_hold_shares)
-            - partners_total
-        )
+        return get_cap_table()
 
     # -----------------------------
     # Validation
     # -----------------------------
 
     def clean(self):
+        from employees.services.partner_equity import allocated_shares
+
         company = CompanyProfile.objects.first()
         if not company:
             raise ValidationError("Company profile is not configured.")
 
-        partners_total = Partner.objects.exclude(pk=self.pk).aggregate(
-            total=models.Sum("shares_owned")
-        )["total"] or Decimal("0.00")
-
         remaining = (
             Decimal(company.number_of_shares)
             - Decimal(company.company_hold_shares)
-            - partners_total
+            - allocated_shares(exclude=self.pk)
         )
 
         if self.shares_owned > remaining:
@@ -1088,6 +1070,9 @@ class EmployeeLeaveBalance(BaseModel):
             # --- PAID LEAVE ---
             # 1. Cap the old balance at the Carry Limit (e.g., max 6)
             actual_carry_paid = min(self.paid_leave_balance, self.CARRY_LIMIT_PAID)
+            entries = EmployeeLeaveLedger.accrual_entries(
+                self.employee_id, "paid", self.paid_leave_balance, actual_carry_paid, months_passed * self.MONTHLY_PAID
+            )
             
             # 2. Update the snapshot for the report
             self.paid_carry_forward = actual_carry_paid
@@ -1099,6 +1084,9 @@ class EmployeeLeaveBalance(BaseModel):
             # --- WFH LEAVE ---
             # 1. Cap old balance
             actual_carry_wfh = min(self.wfh_balance, self.CARRY_LIMIT_WFH)
+            entries += EmployeeLeaveLedger.accrual_entries(
+                self.employee_id, "wfh", self.wfh_balance, actual_carry_wfh, months_passed * self.MONTHLY_WFH
+            )
             
             # 2. Update snapshot
             self.wfh_carry_forward = actual_carry_wfh
@@ -1108,11 +1096,98 @@ class EmployeeLeaveBalance(BaseModel):
 
             # Update date to the 1st of current month
             self.last_accrual_month = today.replace(day=1)
-            self.save()
+            with db_transaction.atomic():
+                self.save()
+                EmployeeLeaveLedger.objects.bulk_create(entries)
+
+    def opening_entries(self, creator=None):
+        """Ledger rows that account for the balance a new summary row starts with."""
+        return [
+            EmployeeLeaveLedger(employee_id=self.employee_id, kind=kind, entry_type="opening", days=days, balance_after=days, creator=creator)
+            for kind, days in (("paid", self.paid_leave_balance), ("wfh", self.wfh_balance))
+            if days
+        ]
 
     def __str__(self):
         return f"{self.employee} - Paid: {self.paid_leave_balance}, WFH: {self.wfh_balance}"
 
+
+class EmployeeLeaveLedger(models.Model):
+    """
+    Append-only history of every movement of an employee's leave balance.
+    EmployeeLeaveBalance is the running summary of these rows, so balance reads
+    stay a single row lookup while every change remains traceable.
+    """
+
+    KIND_CHOICES = (
+        ('paid', 'Paid Leave'),
+        ('wfh', 'Work From Home'),
+    )
+
+    ENTRY_TYPE_CHOICES = (
+        ('opening', 'Opening Balance'),
+        ('accrual', 'Monthly Accrual'),
+        ('carry_cap', 'Carry Forward Cap'),
+        ('consumption', 'Leave Taken'),
+        ('refund', 'Leave Refunded'),
+        ('adjustment', 'Adjustment'),
+    )
+
+    employee = models.ForeignKey("employees.Employee", on_delete=models.CASCADE, related_name="leave_ledger")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPE_CHOICES)
+    days = models.FloatField(help_text="Signed movement: positive adds to the balance, negative takes from it")
+    balance_after = models.FloatField()
+    leave_request = models.ForeignKey("employees.EmployeeLeaveRequest", on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+    note = models.CharField(max_length=255, blank=True, null=True)
+    creator = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, blank=True, related_name="leave_ledger_entries")
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ("-created", "-id")
+        verbose_name = "Employee Leave Ledger Entry"
+        verbose_name_plural = "Employee Leave Ledger"
+        indexes = [models.Index(fields=["employee", "kind", "created"])]
+
+    def __str__(self):
+        return f"{self.employee} - {self.get_entry_type_display()} {self.days:+g} {self.get_kind_display()}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Leave ledger entries cannot be changed; post an adjustment instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Leave ledger entries cannot be deleted; post an adjustment instead.")
+
+    @classmethod
+    def accrual_entries(cls, employee_id, kind, old_balance, carried, fresh, creator=None):
+        """Unsaved rows for one month-end: the carry cap (if it bit) and the fresh accrual."""
+        entries = []
+        if carried < old_balance:
+            entries.append(cls(employee_id=employee_id, kind=kind, entry_type="carry_cap", days=carried - old_balance, balance_after=carried, creator=creator))
+        if fresh:
+            entries.append(cls(employee_id=employee_id, kind=kind, entry_type="accrual", days=fresh, balance_after=carried + fresh, creator=creator))
+        return entries
+
+
+class LeaveAccrualRun(models.Model):
+    """Audit row written by every monthly leave accrual run."""
+
+    accrual_month = models.DateField(help_text="First day of the month balances were accrued up to")
+    balances_created = models.PositiveIntegerField(default=0)
+    balances_accrued = models.PositiveIntegerField(default=0)
+    triggered_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, blank=True, related_name="leave_accrual_runs")
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = "Leave Accrual Run"
+        verbose_name_plural = "Leave Accrual Runs"
+
+    def __str__(self):
+        return f"Leave accrual {self.accrual_month:%B %Y} - {self.balances_accrued} accrued, {self.balances_created} created"
+
     
 class EmployeeAttendanceRegister(BaseModel):
     employee = models.ForeignKey(
@@ -0,0 +1,147 @@
+import calendar
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+
+from employees.models import Employee, EmployeeAttendanceRegister, EmployeeLeaveRequest
+
+# One character per day in every row of the matrix.
+STATUS_PRESENT = "P"
+STATUS_ABSENT = "A"
+STATUS_LEAVE = "L"
+STATUS_WFH = "W"
+STATUS_PENDING = "?"
+STATUS_EMPTY = "-"
+
+# code -> (status, label) as the overview template expects them
+STATUS_CELLS = {
+    STATUS_PRESENT: ("present", "P"),
+    STATUS_ABSENT: ("absent", "A"),
+    STATUS_LEAVE: ("leave_approved", "L"),
+    STATUS_WFH: ("leave_approved", "WFH"),
+    STATUS_PENDING: ("leave_pending", "?"),
+    STATUS_EMPTY: ("empty", "-"),
+}
+
+ATTENDANCE_CODE_MAP = {
+    "present": STATUS_PRESENT,
+    "absent": STATUS_ABSENT,
+}
+
+CACHE_TIMEOUT = 60 * 60
+# Bumped when the set of appointed employees changes, which touches every month
+EMPLOYEES_VERSION_KEY = "employee_attendance_overview_version:employees"
+
+
+def _version_key(year, month):
+    return f"employee_attendance_overview_version:{year}-{month:02d}"
+
+
+def _overview_cache_key(year, month, branch_id=None):
+    versions = cache.get_many([_version_key(year, month), EMPLOYEES_VERSION_KEY])
+    version = f"{versions.get(_version_key(year, month), 0)}.{versions.get(EMPLOYEES_VERSION_KEY, 0)}"
+    return f"employee_attendance_overview:{branch_id or 'all'}:{year}-{month:02d}:v{version}"
+
+
+def _bump(key):
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_attendance_overview(year, month):
+    """
+    Drop every cached overview of the given month by bumping its version key.
+    """
+    _bump(_version_key(year, month))
+
+
+def invalidate_all_attendance_overviews():
+    """Drop the overviews of every month, e.g. when an employee is added, appointed or deactivated."""
+    _bump(EMPLOYEES_VERSION_KEY)
+
+
+def invalidate_attendance_overview_range(start_date, end_date):
+    """Invalidate every month touched by a date range (e.g. a leave request)."""
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        invalidate_attendance_overview(month.year, month.month)
+        month += relativedelta(months=1)
+
+
+def _leave_code(status, leave_type):
+    if status == "pending":
+        return STATUS_PENDING
+    return STATUS_WFH if leave_type == "wfh" else STATUS_LEAVE
+
+
+def build_attendance_overview(year, month, branch_id=None):
+    """
+    Encode the month for every appointed employee (of a branch) as one status
+    character per day. Leaves are painted onto the row as clipped day ranges,
+    then the attendance register overrides them day by day.
+    """
+    num_days = calendar.monthrange(year, month)[1]
+    start_date = date(year, month, 1)
+    end_date = date(year, month, num_days)
+
+    employees = Employee.objects.filter(status="Appointed")
+    if branch_id:
+        employees = employees.filter(branch_id=branch_id)
+    employee_ids = list(employees.values_list("pk", flat=True))
+    rows = {pk: [STATUS_EMPTY] * num_days for pk in employee_ids}
+
+    leaves = (
+        EmployeeLeaveRequest.objects.filter(employee_id__in=employee_ids, start_date__lte=end_date, end_date__gte=start_date)
+        .exclude(status="rejected")
+        .order_by("created")
+        .values_list("employee_id", "start_date", "end_date", "status", "leave_type")
+    )
+    for employee_id, leave_start, leave_end, status, leave_type in leaves:
+        first = (max(leave_start, start_date) - start_date).days
+        last = (min(leave_end, end_date) - start_date).days
+        rows[employee_id][first:last + 1] = [_leave_code(status, leave_type)] * (last - first + 1)
+
+    attendance = EmployeeAttendanceRegister.objects.filter(employee_id__in=employee_ids, date__range=(start_date, end_date)).values_list("employee_id", "date", "status")
+    for employee_id, day, status in attendance:
+        code = ATTENDANCE_CODE_MAP.get(status)
+        if code:
+            rows[employee_id][day.day - 1] = code
+
+    return {
+        "year": year,
+        "month": month,
+        "days": num_days,
+        "rows": {pk: "".join(row) for pk, row in rows.items()},
+    }
+
+
+def get_attendance_overview(year, month, branch_id=None, refresh=False):
+    """
+    Cached wrapper around build_attendance_overview, keyed per (branch, month)
+    and invalidated by invalidate_attendance_overview; refresh rebuilds it.
+    """
+    key = _overview_cache_key(year, month, branch_id)
+    overview = None if refresh else cache.get(key)
+    if overview is None:
+        overview = build_attendance_overview(year, month, branch_id)
+        cache.set(key, overview, CACHE_TIMEOUT)
+    return overview
+
+
+def decode_row(row, date_list):
+    """Expand a packed row into the per-day cells and counters the template renders."""
+    days = []
+    for single_date, code in zip(date_list, row):
+        status, label = STATUS_CELLS[code]
+        days.append({"date": single_date, "day_name": single_date.strftime("%a"), "status": status, "label": label})
+    stats = {
+        "present": row.count(STATUS_PRESENT),
+        "absent": row.count(STATUS_ABSENT),
+        "leaves": row.count(STATUS_LEAVE) + row.count(STATUS_WFH),
+    }
+    return days, stats
@@ -0,0 +1,92 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from employees.models import EmployeeAttendanceRegister
+
+VALID_STATUSES = {value for value, _ in EmployeeAttendanceRegister._meta.get_field("status").choices}
+
+
+class AttendanceSaveResult:
+    """What a bulk attendance save changed, per employee."""
+
+    def __init__(self):
+        self.created = {}
+        self.updated = {}
+        self.unchanged = []
+        self.invalid = {}
+
+    def as_dict(self):
+        return {
+            "created": {str(pk): status for pk, status in self.created.items()},
+            "updated": {str(pk): {"from": before, "to": after} for pk, (before, after) in self.updated.items()},
+            "unchanged": [str(pk) for pk in self.unchanged],
+            "invalid": {str(pk): reason for pk, reason in self.invalid.items()},
+        }
+
+    def summary(self):
+        return f"{len(self.created)} marked, {len(self.updated)} changed, {len(self.unchanged)} unchanged"
+
+
+def clean_records(records, result):
+    """{employee_id: status} with ids as ints; bad entries are reported, not saved."""
+    cleaned = {}
+    for employee_id, status in (records or {}).items():
+        try:
+            employee_id = int(employee_id)
+        except (TypeError, ValueError):
+            result.invalid[employee_id] = "Invalid employee"
+            continue
+        if status not in VALID_STATUSES:
+            result.invalid[employee_id] = f"Invalid status '{status}'"
+            continue
+        cleaned[employee_id] = status
+    return cleaned
+
+
+def _apply(attendance_date, records, user, result):
+    existing = {row.employee_id: row for row in EmployeeAttendanceRegister.objects.filter(date=attendance_date, employee_id__in=records)}
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for employee_id, status in records.items():
+        row = existing.get(employee_id)
+        if row is None:
+            to_create.append(EmployeeAttendanceRegister(employee_id=employee_id, date=attendance_date, status=status, creator=user))
+            result.created[employee_id] = status
+        elif row.status != status:
+            result.updated[employee_id] = (row.status, status)
+            row.status = status
+            row.updated = now
+            to_update.append(row)
+        else:
+            result.unchanged.append(employee_id)
+
+    if to_create:
+        bulk_create_with_history(to_create, EmployeeAttendanceRegister, default_user=user)
+    if to_update:
+        bulk_update_with_history(to_update, EmployeeAttendanceRegister, ["status", "updated"], default_user=user)
+
+
+def save_attendance_for_date(attendance_date, records, user=None):
+    """
+    Save {employee_id: status} for one day with a fixed number of queries: one
+    read of the day's rows, one bulk insert and one bulk update, touching
+    only rows whose status actually changes.
+    """
+    result = AttendanceSaveResult()
+    records = clean_records(records, result)
+    if not records:
+        return result
+
+    try:
+        with transaction.atomic():
+            _apply(attendance_date, records, user, result)
+    except IntegrityError:
+        # Someone marked one of these employees for the same day in between; re-read and retry once.
+        invalid = result.invalid
+        result = AttendanceSaveResult()
+        result.invalid = invalid
+        with transaction.atomic():
+            _apply(attendance_date, records, user, result)
+    return result
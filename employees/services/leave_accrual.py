@@ -0,0 +1,68 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, ExtractMonth, ExtractYear, Least
+from simple_history.utils import bulk_create_with_history
+
+from employees.models import Employee, EmployeeLeaveBalance, EmployeeLeaveLedger, LeaveAccrualRun
+
+
+def months_since_accrual(today):
+    """SQL expression for whole months between last_accrual_month and today."""
+    months = (Value(today.year) - ExtractYear("last_accrual_month")) * Value(12) + (Value(today.month) - ExtractMonth("last_accrual_month"))
+    return Cast(months, FloatField())
+
+
+def create_missing_balances(today, creator=None):
+    """Bulk insert a starting balance for every employee that has none yet."""
+    missing = Employee.objects.filter(leave_balance__isnull=True).values_list("pk", flat=True)
+    balances = [EmployeeLeaveBalance(employee_id=pk, last_accrual_month=today, creator=creator) for pk in missing]
+    if balances:
+        bulk_create_with_history(balances, EmployeeLeaveBalance, batch_size=1000, default_user=creator)
+        EmployeeLeaveLedger.objects.bulk_create([entry for balance in balances for entry in balance.opening_entries(creator)], batch_size=1000)
+    return len(balances)
+
+
+def accrual_ledger_entries(due, today, creator=None):
+    """The carry-cap/accrual ledger rows matching what the UPDATE below does to each due balance."""
+    entries = []
+    for employee_id, paid, wfh, last_accrual in due.values_list("employee_id", "paid_leave_balance", "wfh_balance", "last_accrual_month"):
+        months = (today.year - last_accrual.year) * 12 + (today.month - last_accrual.month)
+        entries += EmployeeLeaveLedger.accrual_entries(
+            employee_id, "paid", paid, min(paid, EmployeeLeaveBalance.CARRY_LIMIT_PAID), months * EmployeeLeaveBalance.MONTHLY_PAID, creator
+        )
+        entries += EmployeeLeaveLedger.accrual_entries(
+            employee_id, "wfh", wfh, min(wfh, EmployeeLeaveBalance.CARRY_LIMIT_WFH), months * EmployeeLeaveBalance.MONTHLY_WFH, creator
+        )
+    return entries
+
+
+def accrue_leave_balances(today=None, triggered_by=None):
+    """
+    Set-based version of EmployeeLeaveBalance.accrue_monthly for all employees:
+    NewBalance = min(OldBalance, CarryLimit) + MonthsPassed * MonthlyAccrual,
+    applied with one UPDATE to every balance last accrued before this month.
+    Balances already accrued this month are left alone, so reruns are no-ops.
+    The matching carry-cap/accrual rows go to the leave ledger in one bulk insert.
+    """
+    today = today or date.today()
+    month_start = today.replace(day=1)
+    months = months_since_accrual(today)
+    paid_carry = Least(F("paid_leave_balance"), Value(EmployeeLeaveBalance.CARRY_LIMIT_PAID))
+    wfh_carry = Least(F("wfh_balance"), Value(EmployeeLeaveBalance.CARRY_LIMIT_WFH))
+
+    with transaction.atomic():
+        created = create_missing_balances(today, triggered_by)
+        due = EmployeeLeaveBalance.objects.select_for_update().filter(last_accrual_month__lt=month_start)
+        EmployeeLeaveLedger.objects.bulk_create(accrual_ledger_entries(due, today, triggered_by), batch_size=1000)
+        # Every expression reads the pre-update row; last_accrual_month stays last
+        # because backends that evaluate SET left to right would see the new month.
+        accrued = due.update(
+            paid_carry_forward=paid_carry,
+            wfh_carry_forward=wfh_carry,
+            paid_leave_balance=paid_carry + months * Value(EmployeeLeaveBalance.MONTHLY_PAID),
+            wfh_balance=wfh_carry + months * Value(EmployeeLeaveBalance.MONTHLY_WFH),
+            last_accrual_month=month_start,
+        )
+        return LeaveAccrualRun.objects.create(accrual_month=month_start, balances_created=created, balances_accrued=accrued, triggered_by=triggered_by)
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models import F, Sum
+
+from employees.models import EmployeeLeaveBalance, EmployeeLeaveLedger, EmployeeLeaveRequest
+
+BALANCE_FIELDS = {
+    "paid": "paid_leave_balance",
+    "wfh": "wfh_balance",
+}
+
+
+def leave_kind(leave_type):
+    return "wfh" if leave_type == "wfh" else "paid"
+
+
+def get_balance_for_update(employee_id):
+    """The employee's summary row, locked for the rest of the transaction."""
+    balance, _ = EmployeeLeaveBalance.objects.get_or_create(employee_id=employee_id)
+    return EmployeeLeaveBalance.objects.select_for_update().get(pk=balance.pk)
+
+
+def post_entry(balance, kind, entry_type, days, leave_request=None, note=None, creator=None):
+    """
+    Append a ledger row and move the summary balance by the same amount with
+    an F() update, so concurrent postings cannot overwrite each other.
+    """
+    field = BALANCE_FIELDS[kind]
+    EmployeeLeaveBalance.objects.filter(pk=balance.pk).update(**{field: F(field) + days})
+    setattr(balance, field, getattr(balance, field) + days)
+    return EmployeeLeaveLedger.objects.create(
+        employee_id=balance.employee_id,
+        kind=kind,
+        entry_type=entry_type,
+        days=days,
+        balance_after=getattr(balance, field),
+        leave_request=leave_request,
+        note=note,
+        creator=creator,
+    )
+
+
+# Note on the opening entries written by migration 0024
+LEDGER_INTRODUCED_NOTE = "Balance when the ledger was introduced"
+
+
+def deducted_before_ledger(leave):
+    """Whether the leave was approved (and deducted) by the old signals, before migration 0024 opened the ledger."""
+    introduced = (
+        EmployeeLeaveLedger.objects.filter(entry_type="opening", note=LEDGER_INTRODUCED_NOTE).order_by("created").values_list("created", flat=True).first()
+    )
+    return introduced is not None and (leave.approved_date or leave.created) < introduced
+
+
+def net_consumed(leave):
+    """Days currently held by a leave request (its consumption minus refunds)."""
+    total = leave.ledger_entries.filter(entry_type__in=("consumption", "refund")).aggregate(total=Sum("days"))["total"]
+    if total is None:
+        # The old signals took the full duration; anything newer always has a consumption row
+        return leave.total_days if deducted_before_ledger(leave) else 0
+    return -total
+
+
+def sync_leave_request(leave, creator=None):
+    """
+    Deduct an approved leave from the balance once, and give the days back if
+    it later moves to rejected/pending. Deductions never take the balance
+    below zero; a refund returns exactly what was taken.
+    """
+    if leave.status == "approved" and not leave.is_balance_deducted:
+        deducted = True
+    elif leave.status in ("rejected", "pending") and leave.is_balance_deducted:
+        deducted = False
+    else:
+        return None
+
+    kind = leave_kind(leave.leave_type)
+    with transaction.atomic():
+        balance = get_balance_for_update(leave.employee_id)
+        if deducted:
+            days = min(float(leave.total_days or 0), max(getattr(balance, BALANCE_FIELDS[kind]), 0.0))
+            # Posted even for 0 days, so the refund knows nothing was taken
+            entry = post_entry(balance, kind, "consumption", -days, leave, creator=creator)
+        else:
+            days = net_consumed(leave)
+            entry = post_entry(balance, kind, "refund", days, leave, creator=creator) if days > 0 else None
+        # Queryset update so the post_save handlers do not run again for the flag
+        EmployeeLeaveRequest.objects.filter(pk=leave.pk).update(is_balance_deducted=deducted)
+        leave.is_balance_deducted = deducted
+    return entry
+
+
+def adjust_leave_balance(employee_id, kind, days, note, creator=None):
+    """Manual correction by HR; recorded like any other movement."""
+    with transaction.atomic():
+        balance = get_balance_for_update(employee_id)
+        return post_entry(balance, kind, "adjustment", days, note=note, creator=creator)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+
+from core.models import CompanyProfile
+from employees.models import Partner
+
+CACHE_KEY = "partner_cap_table"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def share_percentage(shares_owned, number_of_shares):
+    if not number_of_shares:
+        return Decimal("0.00")
+    return round((shares_owned / Decimal(number_of_shares)) * 100, 2)
+
+
+def share_amount(percentage, total_value):
+    return round(total_value * (percentage / Decimal("100")), 2)
+
+
+def build_cap_table():
+    """
+    Company share structure and every partner's stake, from the company
+    profile and one partner query. Plain values only, so it can be cached.
+    """
+    company = CompanyProfile.objects.first()
+    if not company:
+        return {"company": None, "partners": [], "partners_total": Decimal("0.00"), "available_shares": Decimal("0.00")}
+
+    partners = []
+    partners_total = Decimal("0.00")
+    for pk, full_name, shares_owned in Partner.objects.order_by("-shares_owned").values_list("pk", "full_name", "shares_owned"):
+        percentage = share_percentage(shares_owned, company.number_of_shares)
+        partners.append(
+            {
+                "id": pk,
+                "full_name": full_name,
+                "shares_owned": shares_owned,
+                "share_percentage": percentage,
+                "share_amount": share_amount(percentage, company.total_value),
+            }
+        )
+        partners_total += shares_owned
+
+    return {
+        "company": {
+            "id": company.pk,
+            "name": company.name,
+            "total_value": company.total_value,
+            "number_of_shares": company.number_of_shares,
+            "company_hold_shares": company.company_hold_shares,
+            "hold_percentage": company.get_hold_percentage(),
+        },
+        "partners": partners,
+        "partners_total": partners_total,
+        "available_shares": Decimal(company.number_of_shares) - Decimal(company.company_hold_shares) - partners_total,
+    }
+
+
+def get_cap_table():
+    """Cached build_cap_table, dropped whenever a Partner or the CompanyProfile changes."""
+    cap_table = cache.get(CACHE_KEY)
+    if cap_table is None:
+        cap_table = build_cap_table()
+        cache.set(CACHE_KEY, cap_table, CACHE_TIMEOUT)
+    return cap_table
+
+
+def invalidate_cap_table():
+    cache.delete(CACHE_KEY)
+
+
+def allocated_shares(exclude=None):
+    """Shares held by partners right now, read from the database (used for validation)."""
+    partners = Partner.objects.all()
+    if exclude is not None:
+        partners = partners.exclude(pk=exclude)
+    return partners.aggregate(total=Sum("shares_owned"))["total"] or Decimal("0.00")
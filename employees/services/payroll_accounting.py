@@ -0,0 +1,409 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from accounting.models import Account
+from employees.models import AdvancePayrollPayment, Payroll, PayrollPayment
+from transactions.models import Transaction, TransactionEntry
+
+TEACHER_EXPENSE_CODE = "50001"
+STAFF_EXPENSE_CODE = "50002"
+CASH_ACCOUNT_CODE = "10001"
+BANK_ACCOUNT_CODE = "11001"
+
+VOUCHER_TYPES = ("payroll", "payment")
+
+logger = logging.getLogger(__name__)
+
+
+def expense_code(employee):
+    is_teacher = employee.designation and "Teacher" in employee.designation.name
+    return TEACHER_EXPENSE_CODE if is_teacher else STAFF_EXPENSE_CODE
+
+
+def get_expense_accounts(branch):
+    """Salary expense ledgers keyed by code, with the STAFF_EXPENSES fallback Payroll uses."""
+    accounts = {account.code: account for account in Account.objects.filter(code__in=(TEACHER_EXPENSE_CODE, STAFF_EXPENSE_CODE), branch=branch)}
+    if len(accounts) < 2:
+        fallback = Account.objects.filter(under__code="STAFF_EXPENSES", branch=branch).first()
+        for code in (TEACHER_EXPENSE_CODE, STAFF_EXPENSE_CODE):
+            accounts.setdefault(code, fallback)
+    return accounts
+
+
+class AccountResolver:
+    """
+    Ledgers a payroll voucher posts to, looked up once per branch and reused
+    for every record of that branch in a sync.
+
+    A payment without a Paid From ledger is skipped with an error, unless
+    default_paid_from is set (sync_payroll_accounting --default-paid-from):
+    then the branch Cash or Bank ledger is picked from the payment method,
+    logged and saved on the record.
+    """
+
+    def __init__(self, default_paid_from=False):
+        self.default_paid_from = default_paid_from
+        self.defaulted = []
+        self._expense = {}
+        self._cash_or_bank = {}
+
+    def expense_account(self, employee):
+        if employee.branch_id not in self._expense:
+            self._expense[employee.branch_id] = get_expense_accounts(employee.branch_id)
+        return self._expense[employee.branch_id][expense_code(employee)]
+
+    def paid_from(self, record):
+        """The record's Bank/Cash ledger; the branch default for its payment method only when enabled."""
+        if record.paid_from_id:
+            return record.paid_from
+        if not self.default_paid_from:
+            return None
+        branch_id = record.employee.branch_id
+        if branch_id not in self._cash_or_bank:
+            self._cash_or_bank[branch_id] = {
+                account.code: account for account in Account.objects.filter(code__in=(CASH_ACCOUNT_CODE, BANK_ACCOUNT_CODE), branch_id=branch_id)
+            }
+        method = str(record.payment_method).lower()
+        code = BANK_ACCOUNT_CODE if "bank" in method or "online" in method else CASH_ACCOUNT_CODE
+        account = self._cash_or_bank[branch_id].get(code)
+        if account:
+            logger.warning(
+                "%s %s has no Paid From ledger; defaulting to %s (%s) from payment method '%s'",
+                record._meta.verbose_name, record.pk, account.code, account.name, record.payment_method,
+            )
+            record.paid_from = account
+            self.defaulted.append(record)
+        return account
+
+
+class VoucherPlan:
+    """The voucher one payroll record should have: its header values and two lines."""
+
+    def __init__(self, record, voucher_number, transaction_type, narration, amount, lines, legacy_numbers=(), balance_amount=None):
+        self.record = record
+        self.voucher_number = voucher_number
+        self.transaction_type = transaction_type
+        self.narration = narration
+        self.amount = amount
+        self.lines = lines
+        self.legacy_numbers = legacy_numbers
+        self.balance_amount = balance_amount
+
+    @property
+    def numbers(self):
+        """Voucher numbers this record may already have been posted under."""
+        return (self.voucher_number,) + tuple(self.legacy_numbers)
+
+    def build_voucher(self, creator=None):
+        voucher = Transaction(
+            branch_id=self.record.employee.branch_id,
+            transaction_type=self.transaction_type,
+            status="posted",
+            date=timezone.now(),
+            voucher_number=self.voucher_number,
+            narration=self.narration,
+            invoice_amount=self.amount,
+            total_amount=self.amount,
+            creator=creator,
+        )
+        if self.balance_amount is not None:
+            voucher.balance_amount = self.balance_amount
+        return voucher
+
+    def build_entries(self, voucher, creator=None):
+        return [
+            TransactionEntry(transaction=voucher, account=account, debit_amount=debit, credit_amount=credit, description=description, creator=creator)
+            for account, debit, credit, description in self.lines
+        ]
+
+    def header_matches(self, voucher):
+        return voucher.invoice_amount == self.amount and voucher.total_amount == self.amount
+
+    def lines_match(self, entries):
+        posted = sorted((entry.account_id, entry.debit_amount, entry.credit_amount) for entry in entries)
+        expected = sorted((account.pk, debit, credit) for account, debit, credit, _ in self.lines)
+        return posted == expected
+
+
+def payroll_plan(payroll, resolver, result):
+    """Debit salary expense, credit the employee ledger (payable)."""
+    employee = payroll.employee
+    expense_account = resolver.expense_account(employee)
+    if not employee.account_id:
+        return result.add_skipped(payroll, "Employee has no accounting ledger linked.")
+    if not expense_account:
+        return result.add_skipped(payroll, "No salary expense ledger for the branch.")
+    if payroll.net_salary <= 0:
+        return result.add_skipped(payroll, "Net salary is zero.")
+    return VoucherPlan(
+        payroll,
+        f"PAY/VOUCH/{payroll.payroll_year}/{payroll.payroll_month}/{employee.pk}",
+        "payroll",
+        f"Monthly salary for {payroll.get_payroll_month_display()} {payroll.payroll_year} - {employee.fullname()}",
+        payroll.net_salary,
+        [
+            (expense_account, payroll.net_salary, 0, f"Salary Expense - {employee.fullname()}"),
+            (employee.account, 0, payroll.net_salary, "Salary Payable"),
+        ],
+        legacy_numbers=(f"PROV-{payroll.pk}",),
+        balance_amount=payroll.net_salary,
+    )
+
+
+def payment_plan(payment, resolver, result):
+    """Debit the employee ledger, credit the Bank/Cash ledger the salary was paid from."""
+    employee = payment.employee
+    paid_from = resolver.paid_from(payment)
+    if not employee.account_id:
+        return result.add_skipped(payment, "Employee has no accounting ledger linked.")
+    if not paid_from:
+        return result.add_skipped(payment, "Please select the 'Paid From' account (Bank/Cash).")
+    if payment.amount_paid <= 0:
+        return result.add_skipped(payment, "Amount paid is zero.")
+    return VoucherPlan(
+        payment,
+        f"PAY-SLIP/{payment.pk}",
+        "payment",
+        f"Salary Payment for {payment.payroll} via {paid_from.name}",
+        payment.amount_paid,
+        [
+            (employee.account, payment.amount_paid, 0, f"Salary Paid to {employee.fullname()}"),
+            (paid_from, 0, payment.amount_paid, "Withdrawal for Employee Salary"),
+        ],
+        legacy_numbers=(f"PMT-{payment.pk}",),
+    )
+
+
+def advance_plan(advance, resolver, result):
+    """Debit the employee ledger (advance receivable), credit Bank/Cash."""
+    employee = advance.employee
+    paid_from = resolver.paid_from(advance)
+    if not employee.account_id:
+        return result.add_skipped(advance, "Employee has no accounting ledger linked.")
+    if not paid_from:
+        return result.add_skipped(advance, "Please select the 'Paid From' account.")
+    if advance.amount_paid <= 0:
+        return result.add_skipped(advance, "Amount paid is zero.")
+    return VoucherPlan(
+        advance,
+        f"ADV-PAY/{advance.pk}",
+        "payment",
+        f"Advance Salary to {employee.fullname()}",
+        advance.amount_paid,
+        [
+            (employee.account, advance.amount_paid, 0, f"Salary Advance to {employee.fullname()}"),
+            (paid_from, 0, advance.amount_paid, "Advance Payment Withdrawal"),
+        ],
+    )
+
+
+PLAN_BUILDERS = {
+    Payroll: payroll_plan,
+    PayrollPayment: payment_plan,
+    AdvancePayrollPayment: advance_plan,
+}
+
+# Record fields written back when a voucher is created or re-linked
+LINK_FIELDS = {
+    Payroll: ["transaction"],
+    PayrollPayment: ["transaction", "paid_from"],
+    AdvancePayrollPayment: ["transaction", "paid_from"],
+}
+
+
+class AccountingSyncResult:
+    """What a payroll accounting sync posted, corrected or left alone."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = []
+        self.updated = []
+        self.relinked = []
+        self.unchanged = []
+        self.duplicates = []
+        self.skipped = []
+        # Payments whose Paid From ledger was defaulted from the payment method
+        self.defaulted = []
+
+    def add_skipped(self, record, reason):
+        self.skipped.append((record, reason))
+
+    def summary(self):
+        prefix = "would be " if self.dry_run else ""
+        return (
+            f"{len(self.created)} vouchers {prefix}created, {len(self.updated)} {prefix}corrected, {len(self.relinked)} {prefix}re-linked, "
+            f"{len(self.duplicates)} duplicates {prefix}cancelled, {len(self.unchanged)} unchanged, {len(self.skipped)} skipped"
+        )
+
+    def as_dict(self):
+        def label(record):
+            return {"model": record._meta.model_name, "id": record.pk}
+
+        return {
+            "dry_run": self.dry_run,
+            "created": [label(record) for record in self.created],
+            "updated": [label(record) for record in self.updated],
+            "relinked": [label(record) for record in self.relinked],
+            "duplicates": [voucher.voucher_number for voucher in self.duplicates],
+            "unchanged": len(self.unchanged),
+            "skipped": [dict(label(record), reason=reason) for record, reason in self.skipped],
+            "defaulted_paid_from": [dict(label(record), account=record.paid_from.code) for record in self.defaulted],
+        }
+
+
+def load_vouchers(plans):
+    """Every voucher the plans could already be posted under, with entries, in two queries."""
+    linked = {plan.record.transaction_id for plan in plans if plan.record.transaction_id}
+    numbers = {number for plan in plans for number in plan.numbers}
+    vouchers = (
+        Transaction.objects.filter(Q(pk__in=linked) | Q(voucher_number__in=numbers, transaction_type__in=VOUCHER_TYPES))
+        .exclude(status="cancelled")
+        .prefetch_related("entries")
+        .order_by("pk")
+    )
+    by_number = defaultdict(list)
+    by_pk = {}
+    for voucher in vouchers:
+        by_pk[voucher.pk] = voucher
+        by_number[voucher.voucher_number].append(voucher)
+    return by_pk, by_number, linked
+
+
+def reconcile(plans, result, creator=None, dry_run=False):
+    """
+    Compare each plan with what is posted and apply only the difference:
+    missing vouchers are bulk created, vouchers with a wrong amount or wrong
+    lines get their header updated and their lines replaced, unlinked
+    vouchers found by number are re-linked, and extra vouchers posted for the
+    same record are cancelled (never deleted).
+    """
+    by_pk, by_number, linked = load_vouchers(plans)
+    claimed = set()
+
+    new_vouchers = []
+    changed_headers = []
+    changed_lines = []
+    relink = defaultdict(list)
+    duplicates = []
+
+    for plan in plans:
+        record = plan.record
+        candidates = [voucher for number in plan.numbers for voucher in by_number[number] if voucher.pk not in claimed]
+        voucher = by_pk.get(record.transaction_id)
+        relinked = voucher is None
+        if relinked:
+            voucher = next((candidate for candidate in candidates if candidate.pk not in linked), None)
+            if voucher is None:
+                new_vouchers.append(plan)
+                result.created.append(record)
+                continue
+            record.transaction = voucher
+            relink[type(record)].append(record)
+            result.relinked.append(record)
+
+        # Anything else posted under this record's numbers and not linked to another record is a duplicate
+        extra = [candidate for candidate in candidates if candidate.pk != voucher.pk and candidate.pk not in linked]
+        duplicates += extra
+        claimed.add(voucher.pk)
+        claimed.update(candidate.pk for candidate in extra)
+
+        header_ok = plan.header_matches(voucher)
+        lines_ok = plan.lines_match(voucher.entries.all())
+        if not header_ok:
+            voucher.invoice_amount = voucher.total_amount = plan.amount
+            if plan.balance_amount is not None:
+                # Keep what was already settled against the voucher
+                voucher.balance_amount = max(plan.balance_amount - (voucher.received_amount or 0), 0)
+            changed_headers.append(voucher)
+        if not lines_ok:
+            changed_lines.append((plan, voucher))
+        if not relinked:
+            (result.unchanged if header_ok and lines_ok else result.updated).append(record)
+
+    result.duplicates = duplicates
+    if dry_run:
+        return result
+
+    with transaction.atomic():
+        if new_vouchers:
+            headers = [plan.build_voucher(creator) for plan in new_vouchers]
+            bulk_create_with_history(headers, Transaction, default_user=creator)
+            entries = []
+            for plan, voucher in zip(new_vouchers, headers):
+                entries += plan.build_entries(voucher, creator)
+                plan.record.transaction = voucher
+                relink[type(plan.record)].append(plan.record)
+            bulk_create_with_history(entries, TransactionEntry, default_user=creator)
+
+        if changed_headers:
+            bulk_update_with_history(changed_headers, Transaction, ["invoice_amount", "total_amount", "balance_amount"], default_user=creator)
+        if changed_lines:
+            TransactionEntry.objects.filter(transaction__in=[voucher for _, voucher in changed_lines]).delete()
+            bulk_create_with_history([entry for plan, voucher in changed_lines for entry in plan.build_entries(voucher, creator)], TransactionEntry, default_user=creator)
+
+        if duplicates:
+            for voucher in duplicates:
+                voucher.status = "cancelled"
+                voucher.remark = "Cancelled: duplicate payroll voucher"
+            bulk_update_with_history(duplicates, Transaction, ["status", "remark"], default_user=creator)
+
+        # Queryset-level writes, so the post_save handlers do not run the sync again
+        for model, records in relink.items():
+            bulk_update_with_history(records, model, LINK_FIELDS[model], default_user=creator)
+    return result
+
+
+def build_plans(records, result, resolver=None):
+    resolver = resolver or AccountResolver()
+    plans = []
+    for record in records:
+        plan = PLAN_BUILDERS[type(record)](record, resolver, result)
+        if plan:
+            plans.append(plan)
+    return plans
+
+
+def sync_records(records, creator=None, dry_run=False):
+    """Reconcile the vouchers of a few records, e.g. the one just saved."""
+    result = AccountingSyncResult(dry_run)
+    return reconcile(build_plans(records, result), result, creator, dry_run)
+
+
+def period_records(year=None, month=None, branch=None):
+    """Active payrolls of the period and the payments/advances made in it."""
+    payrolls = Payroll.objects.filter(is_active=True).select_related("employee__designation", "employee__account")
+    payments = PayrollPayment.objects.filter(is_active=True).select_related("employee__account", "paid_from", "payroll__employee")
+    advances = AdvancePayrollPayment.objects.filter(is_active=True).select_related("employee__account", "paid_from")
+    if year:
+        payrolls = payrolls.filter(payroll_year=str(year))
+        payments = payments.filter(payment_date__year=year)
+        advances = advances.filter(payment_date__year=year)
+    if month:
+        payrolls = payrolls.filter(payroll_month=str(month))
+        payments = payments.filter(payment_date__month=month)
+        advances = advances.filter(payment_date__month=month)
+    if branch:
+        payrolls = payrolls.filter(employee__branch=branch)
+        payments = payments.filter(employee__branch=branch)
+        advances = advances.filter(employee__branch=branch)
+    return list(payrolls) + list(payments) + list(advances)
+
+
+def sync_payroll_accounting(year=None, month=None, branch=None, creator=None, dry_run=False, default_paid_from=False):
+    """
+    Bring the vouchers of every payroll, salary payment and advance of a
+    period (all periods when not given) in line with the records. Records and
+    their posted vouchers are read in bulk, ledgers are resolved once per
+    branch, and only missing or differing vouchers are written, so running it
+    again changes nothing.
+    """
+    result = AccountingSyncResult(dry_run)
+    resolver = AccountResolver(default_paid_from)
+    plans = build_plans(period_records(year, month, branch), result, resolver)
+    result.defaulted = resolver.defaulted
+    return reconcile(plans, result, creator, dry_run)
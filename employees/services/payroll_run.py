@@ -0,0 +1,168 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from simple_history.utils import bulk_create_with_history
+
+from employees.models import Employee, EmployeeLeaveBalance, EmployeeLeaveLedger, EmployeeLeaveRequest, Payroll
+from transactions.models import Transaction, TransactionEntry
+
+from .payroll_accounting import AccountingSyncResult, AccountResolver, payroll_plan
+
+
+class PayrollRunResult:
+    """Payslips computed for one branch/month, plus the employees left out."""
+
+    def __init__(self, branch, year, month, dry_run):
+        self.branch = branch
+        self.year = str(year)
+        self.month = str(month)
+        self.dry_run = dry_run
+        self.payrolls = []
+        self.skipped = []
+        self.without_voucher = set()
+
+    def add_skipped(self, employee, reason):
+        self.skipped.append((employee, reason))
+
+    @property
+    def total_net(self):
+        return sum((payroll.net_salary for payroll in self.payrolls), Decimal("0.00"))
+
+    def summary(self):
+        action = "would be created" if self.dry_run else "created"
+        return f"{len(self.payrolls)} payrolls {action}, {len(self.skipped)} employees skipped, total net {self.total_net}"
+
+    def as_dict(self):
+        return {
+            "year": self.year,
+            "month": self.month,
+            "dry_run": self.dry_run,
+            "total_net": str(self.total_net),
+            "payrolls": [
+                {
+                    "employee_id": payroll.employee_id,
+                    "employee": payroll.employee.fullname(),
+                    "basic_salary": str(payroll.basic_salary),
+                    "allowances": str(payroll.allowances),
+                    "total_leaves": str(payroll.total_leaves),
+                    "paid_leaves": str(payroll.paid_leaves),
+                    "absences": str(payroll.absences),
+                    "gross_salary": str(payroll.gross_salary),
+                    "net_salary": str(payroll.net_salary),
+                    "voucher": payroll.employee_id not in self.without_voucher,
+                    "id": payroll.pk,
+                }
+                for payroll in self.payrolls
+            ],
+            "skipped": [{"employee_id": employee.pk, "employee": employee.fullname(), "reason": reason} for employee, reason in self.skipped],
+        }
+
+
+def get_run_employees(branch, employee_ids=None):
+    queryset = Employee.objects.filter(branch=branch, is_active=True, status="Appointed").select_related("designation", "account").order_by("first_name")
+    if employee_ids:
+        queryset = queryset.filter(pk__in=employee_ids)
+    return list(queryset)
+
+
+def get_approved_leaves(employee_ids, year, month):
+    """Approved leaves starting in the month, grouped by employee (one query)."""
+    leaves = defaultdict(list)
+    queryset = EmployeeLeaveRequest.objects.filter(
+        employee_id__in=employee_ids, status="approved", start_date__year=year, start_date__month=month
+    ).only("employee_id", "leave_type", "leave_day_type", "start_date", "end_date")
+    for leave in queryset:
+        leaves[leave.employee_id].append(leave)
+    return leaves
+
+
+def build_payroll(employee, year, month, balance, leaves, creator=None):
+    """An unsaved Payroll for the employee's salary structure, fully calculated."""
+    payroll = Payroll(
+        employee=employee,
+        payroll_year=str(year),
+        payroll_month=str(month),
+        basic_salary=employee.basic_salary,
+        allowances=sum(
+            (value or Decimal("0.00") for value in (employee.hra, employee.other_allowance, employee.transportation_allowance)),
+            Decimal("0.00"),
+        ),
+        creator=creator,
+    )
+    payroll.apply_leave_figures(balance, leaves)
+    payroll.calculate_salary()
+    payroll.gross_salary = round(payroll.gross_salary, 2)
+    payroll.net_salary = round(Decimal(payroll.net_salary), 2)
+    return payroll
+
+
+def _persist(result, balances_to_create, vouchers, creator):
+    with transaction.atomic():
+        if balances_to_create:
+            bulk_create_with_history(balances_to_create, EmployeeLeaveBalance, default_user=creator)
+            EmployeeLeaveLedger.objects.bulk_create([entry for balance in balances_to_create for entry in balance.opening_entries(creator)])
+
+        if vouchers:
+            headers = [voucher for _, voucher, _ in vouchers]
+            bulk_create_with_history(headers, Transaction, default_user=creator)
+            entries = []
+            for payroll, voucher, voucher_entries in vouchers:
+                payroll.transaction = voucher
+                for entry in voucher_entries:
+                    entry.transaction = voucher
+                entries.extend(voucher_entries)
+            bulk_create_with_history(entries, TransactionEntry, default_user=creator)
+
+        # Payrolls go in last so they are created already linked to their voucher.
+        # bulk_create skips Payroll.save and the post_save signal, so nothing is posted twice.
+        result.payrolls = bulk_create_with_history(result.payrolls, Payroll, default_user=creator)
+
+
+def run_payroll(branch, year, month, creator=None, dry_run=False, employee_ids=None):
+    """
+    Create the month's payroll for every active employee of a branch.
+
+    Employees, leave balances, approved leaves, existing payrolls and expense
+    ledgers are loaded up front; payslips are calculated in memory and the
+    payrolls, their vouchers and voucher lines are bulk inserted in a single
+    transaction. With dry_run nothing is written and the result is a preview.
+    """
+    result = PayrollRunResult(branch, year, month, dry_run)
+    employees = get_run_employees(branch, employee_ids)
+    ids = [employee.pk for employee in employees]
+
+    already_run = set(Payroll.objects.filter(employee_id__in=ids, payroll_year=str(year), payroll_month=str(month)).values_list("employee_id", flat=True))
+    balances = {balance.employee_id: balance for balance in EmployeeLeaveBalance.objects.filter(employee_id__in=ids)}
+    leaves = get_approved_leaves(ids, year, month)
+    resolver = AccountResolver()
+    no_voucher = AccountingSyncResult(dry_run)
+
+    balances_to_create = []
+    vouchers = []
+    for employee in employees:
+        if employee.pk in already_run:
+            result.add_skipped(employee, "Payroll already exists for this month")
+            continue
+        if employee.basic_salary is None:
+            result.add_skipped(employee, "Basic salary is not set")
+            continue
+
+        balance = balances.get(employee.pk)
+        if balance is None:
+            balance = EmployeeLeaveBalance(employee=employee, creator=creator)
+            balances_to_create.append(balance)
+
+        payroll = build_payroll(employee, year, month, balance, leaves.get(employee.pk, ()), creator)
+        result.payrolls.append(payroll)
+
+        plan = payroll_plan(payroll, resolver, no_voucher)
+        if plan is None:
+            result.without_voucher.add(employee.pk)
+            continue
+        voucher = plan.build_voucher(creator)
+        vouchers.append((payroll, voucher, plan.build_entries(voucher, creator)))
+
+    if not dry_run and result.payrolls:
+        _persist(result, balances_to_create, vouchers, creator)
+    return result
@@ -1,10 +1,15 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.db import transaction
 from .models import Employee
 from accounting.models import Account, GroupMaster
 from accounting.constants import ACCOUNT_CODE_MAPPING
-from .models import Employee, Payroll, PayrollPayment, AdvancePayrollPayment, EmployeeLeaveBalance
+from .models import Employee, Payroll, PayrollPayment, AdvancePayrollPayment, EmployeeLeaveBalance, EmployeeAttendanceRegister
+from core.models import CompanyProfile
+from .models import Partner
+from .services.partner_equity import invalidate_cap_table
+from .services.payroll_accounting import sync_records
+from .services.attendance_overview import invalidate_all_attendance_overviews, invalidate_attendance_overview, invalidate_attendance_overview_range
 
 
 @receiver(post_save, sender=Employee)
@@ -49,268 +54,60 @@ def create_account_for_employee(employee):
 
     
 @receiver(post_save, sender=Payroll)
-def update_payroll_accounting(sender, instance, created, **kwargs):
-    # We only create accounting entries if the status is "Approved" or finalized
-    if instance.status == "Approved":
-        instance.create_accounting_entry()
-
 @receiver(post_save, sender=PayrollPayment)
-def update_payment_accounting(sender, instance, created, **kwargs):
-    instance.create_accounting_entry()
-
 @receiver(post_save, sender=AdvancePayrollPayment)
-def update_advance_accounting(sender, instance, created, **kwargs):
-    # Logic for Advance is similar to PayrollPayment:
-    # Debit: Employee Account (Advance Asset)
-    # Credit: Bank/Cash
-    instance.create_accounting_entry()
-
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from employees.models import EmployeeLeaveRequest
-
-@receiver(post_save, sender=EmployeeLeaveRequest)
-def update_employee_balance(sender, instance, created, **kwargs):
-    """
-    Deduct leave only ONCE when status becomes approved
-    """
-
-    if instance.status != 'approved':
-        return
-
-    if instance.is_balance_deducted:
-        return
-
-    balance, _ = EmployeeLeaveBalance.objects.get_or_create(employee=instance.employee)
-
-    days = instance.total_days or 0
-
-    if instance.leave_type == 'wfh':
-        balance.wfh_balance = max(balance.wfh_balance - days, 0)
-    else: 
-        balance.paid_leave_balance = max(balance.paid_leave_balance - days, 0)
-
-    balance.save()
-
-    instance.is_balance_deducted = True
-    instance.save(update_fields=["is_balance_deducted"])
-
-
-@receiver(post_save, sender=EmployeeLeaveRequest)
-def manage_leave_balance(sender, instance, created, **kwargs):
-    """
-    Deducts balance when status changes to 'approved'.
-    Refunds balance if status changes from 'approved' to 'rejected/pending'.
-    """
-    if not instance.pk:
-        return
-
-    # Only process if this is an existing record being updated
-    # We need to fetch the employee balance
-    try:
-        balance = EmployeeLeaveBalance.objects.get(employee=instance.employee)
-    except EmployeeLeaveBalance.DoesNotExist:
-        # Create balance if it doesn't exist (safety net)
-        balance = EmployeeLeaveBalance.objects.create(employee=instance.employee)
-        balance.accrue_monthly() # Initialize with this month's stock
-
-    # Check logic only if status is Approved and we haven't deducted yet
-    if instance.status == 'approved' and not instance.is_balance_deducted:
-        days_to_deduct = instance.total_days
-
-        if instance.leave_type == 'wfh':
-            if balance.wfh_balance >= days_to_deduct:
-                balance.wfh_balance -= days_to_deduct
-                instance.is_balance_deducted = True
-                instance.save(update_fields=['is_balance_deducted'])
-                balance.save()
-            else:
-                # Edge case: Admin approved but balance changed in background
-                # In production, you might want to log this error or force reject
-                pass 
-        
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            if balance.paid_leave_balance >= days_to_deduct:
-                balance.paid_leave_balance -= days_to_deduct
-                instance.is_balance_deducted = True
-                instance.save(update_fields=['is_balance_deducted'])
-                balance.save()
-
-    # Handle Reversal: If it WAS approved/deducted, but now is Rejected/Pending
-    elif instance.status in ['rejected', 'pending'] and instance.is_balance_deducted:
-        days_to_refund = instance.total_days
-        
-        if instance.leave_type == 'wfh':
-            # Refund but do not exceed max limit + refund (optional logic, usually we just refund)
-            balance.wfh_balance = min(balance.wfh_balance + days_to_refund, balance.MAX_WFH_LIMIT)
-        
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            balance.paid_leave_balance = min(balance.paid_leave_balance + days_to_refund, balance.MAX_PAID_LIMIT)
-        
-        instance.is_balance_deducted = False
-        instance.save(update_fields=['is_balance_deducted'])
-        balance.save()
-
-    
-@receiver(post_save, sender=EmployeeLeaveRequest)
-def leave_balance_handler(sender, instance, **kwargs):
+def sync_payroll_voucher(sender, instance, raw=False, **kwargs):
     """
-    Consolidated Signal:
-    1. Deducts balance when Approved.
-    2. Refunds balance if changed from Approved to Rejected/Pending.
+    Post or correct the record's voucher. The sync is idempotent, so saving a
+    payroll/payment again never posts a second voucher.
     """
-    if not instance.pk:
+    if raw or not instance.is_active:
         return
+    sync_records([instance])
 
-    # Use get_or_create to ensure no "Does Not Exist" error
-    balance, created = EmployeeLeaveBalance.objects.get_or_create(
-        employee=instance.employee,
-        defaults={'paid_leave_balance': 1.0, 'wfh_balance': 1.0}
-    )
-    
-    # If we just created the balance in this signal, we don't need to deduct/refund yet
-    # unless specific logic demands it, but usually, we just proceed.
+from employees.models import EmployeeLeaveRequest, EmployeeLeaveLedger
+from .services.leave_ledger import sync_leave_request
 
-    # CASE 1: Leave is APPROVED -> Deduct
-    if instance.status == 'approved' and not instance.is_balance_deducted:
-        days = instance.total_days
-        if instance.leave_type == 'wfh':
-            # Logic: If balance goes below 0, let it (or cap at 0). 
-            # Ideally, form validation prevents this, but this is a safety net.
-            balance.wfh_balance = max(0.0, balance.wfh_balance - days)
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            balance.paid_leave_balance = max(0.0, balance.paid_leave_balance - days)
-        
-        balance.save()
-        # Mark as deducted
-        instance.is_balance_deducted = True
-        instance.save(update_fields=['is_balance_deducted'])
 
-    # CASE 2: Leave was APPROVED, now REJECTED/PENDING -> Refund
-    elif instance.status in ['rejected', 'pending'] and instance.is_balance_deducted:
-        days = instance.total_days
-        if instance.leave_type == 'wfh':
-            balance.wfh_balance = min(balance.wfh_balance + days, balance.MAX_WFH_LIMIT)
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            balance.paid_leave_balance = min(balance.paid_leave_balance + days, balance.MAX_PAID_LIMIT)
-            
-        balance.save()
-        instance.is_balance_deducted = False
-        instance.save(update_fields=['is_balance_deducted'])
-
-    
 @receiver(post_save, sender=EmployeeLeaveRequest)
-def leave_balance_controller(sender, instance, created, **kwargs):
+def leave_balance_ledger(sender, instance, **kwargs):
     """
-    Centralized logic to Deduct or Refund leave balances.
+    Single handler for leave balances: deducts once when a request is
+    approved and refunds what was taken if it goes back to rejected/pending.
+    Every movement is written to the EmployeeLeaveLedger.
     """
-    # 1. Skip if this is a new record (leave starts as 'pending', no deduction yet)
-    #    Unless you auto-approve, which is rare.
-    if created and instance.status != 'approved':
-        return
-
-    # 2. Get the Employee's Balance Board
-    #    We use defaults to ensure we don't crash if it's missing (starts at 1.0)
-    balance, _ = EmployeeLeaveBalance.objects.get_or_create(
-        employee=instance.employee,
-        defaults={'paid_leave_balance': 1.0, 'wfh_balance': 1.0}
-    )
-
-    # ---------------------------------------------------------
-    # SCENARIO A: DEDUCT BALANCE (Status changed to Approved)
-    # ---------------------------------------------------------
-    if instance.status == 'approved' and not instance.is_balance_deducted:
-        days_to_deduct = instance.total_days
-
-        if instance.leave_type == 'wfh':
-            # Deduct WFH
-            new_balance = balance.wfh_balance - days_to_deduct
-            balance.wfh_balance = max(0.0, new_balance) # Prevent negative
-        
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            # Deduct Paid Leave
-            new_balance = balance.paid_leave_balance - days_to_deduct
-            balance.paid_leave_balance = max(0.0, new_balance) # Prevent negative
+    sync_leave_request(instance)
 
-        # Save the Balance
-        balance.save()
 
-        # Mark request as deducted so we don't do it again
-        instance.is_balance_deducted = True
-        # Use update_fields to avoid triggering this signal again recursively
-        instance.save(update_fields=['is_balance_deducted'])
-
-
-    # ---------------------------------------------------------
-    # SCENARIO B: REFUND BALANCE (Approved -> Rejected/Pending)
-    # ---------------------------------------------------------
-    elif instance.status in ['rejected', 'pending'] and instance.is_balance_deducted:
-        days_to_refund = instance.total_days
-
-        if instance.leave_type == 'wfh':
-            # Add back WFH (Check against Max Limit)
-            balance.wfh_balance = min(
-                balance.wfh_balance + days_to_refund, 
-                balance.MAX_WFH_LIMIT
-            )
-        
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            # Add back Paid Leave (Check against Max Limit)
-            balance.paid_leave_balance = min(
-                balance.paid_leave_balance + days_to_refund, 
-                balance.MAX_PAID_LIMIT
-            )
-
-        # Save the Balance
-        balance.save()
-
-        # Unmark the flag
-        instance.is_balance_deducted = False
-        instance.save(update_fields=['is_balance_deducted'])
+@receiver(post_save, sender=EmployeeLeaveBalance)
+def open_leave_ledger(sender, instance, created, **kwargs):
+    if created:
+        EmployeeLeaveLedger.objects.bulk_create(instance.opening_entries(instance.creator))
 
 
 @receiver(post_save, sender=EmployeeLeaveRequest)
-def manage_leave_balance_signal(sender, instance, created, **kwargs):
-    """
-    Single, Clean Signal to Deduct or Refund leaves.
-    """
-    # 1. Initialization: Get or Create Balance (Safe for new employees)
-    balance, _ = EmployeeLeaveBalance.objects.get_or_create(
-        employee=instance.employee,
-        defaults={'paid_leave_balance': 1.0, 'wfh_balance': 1.0}
-    )
+@receiver(post_delete, sender=EmployeeLeaveRequest)
+def invalidate_overview_for_leave(sender, instance, **kwargs):
+    """Leave ranges are painted onto the cached attendance overview."""
+    invalidate_attendance_overview_range(instance.start_date, instance.end_date)
 
-    # 2. Scenario A: Deduct Balance (Status changed to Approved)
-    if instance.status == 'approved' and not instance.is_balance_deducted:
-        days_to_deduct = instance.total_days
 
-        if instance.leave_type == 'wfh':
-            # Deduct WFH
-            balance.wfh_balance = max(0.0, balance.wfh_balance - days_to_deduct)
-        
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            # Deduct Paid Leave
-            balance.paid_leave_balance = max(0.0, balance.paid_leave_balance - days_to_deduct)
+@receiver(post_save, sender=EmployeeAttendanceRegister)
+@receiver(post_delete, sender=EmployeeAttendanceRegister)
+def invalidate_overview_for_attendance(sender, instance, **kwargs):
+    invalidate_attendance_overview(instance.date.year, instance.date.month)
 
-        balance.save()
-        
-        # Mark as deducted
-        instance.is_balance_deducted = True
-        instance.save(update_fields=['is_balance_deducted'])
 
+@receiver(post_save, sender=Partner)
+@receiver(post_delete, sender=Partner)
+@receiver(post_save, sender=CompanyProfile)
+@receiver(post_delete, sender=CompanyProfile)
+def invalidate_partner_cap_table(sender, instance, **kwargs):
+    invalidate_cap_table()
 
-    # 3. Scenario B: Refund Balance (Approved -> Rejected/Pending)
-    elif instance.status in ['rejected', 'pending'] and instance.is_balance_deducted:
-        days_to_refund = instance.total_days
-        
-        if instance.leave_type == 'wfh':
-            # Add back balance. 
-            balance.wfh_balance += days_to_refund
-        
-        elif instance.leave_type in ['sick', 'casual', 'emergency']:
-            balance.paid_leave_balance += days_to_refund
-        
-        balance.save()
 
-        instance.is_balance_deducted = False
-        instance.save(update_fields=['is_balance_deducted'])
\ No newline at end of file
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_overview_for_employee(sender, instance, **kwargs):
+    """New, appointed or deactivated staff change the rows of every cached month."""
+    invalidate_all_attendance_overviews()
@@ -143,7 +143,7 @@ class AdvancePayrollPaymentTable(BaseTable):
 
 
 class PayrollReportTable(BaseTable):
-    employee = tables.Column()
+    employee = tables.Column(accessor="first_name", verbose_name="Employee", order_by=("first_name", "last_name"))
 
     total_due = tables.Column(
         attrs={"td": {"class": "fw-bold"}, "th": {"class": "fw-bold"}}
@@ -158,8 +158,8 @@ class PayrollReportTable(BaseTable):
         attrs={"td": {"class": "fw-bold"}, "th": {"class": "fw-bold"}}
     )
 
-    view_details = tables.Column()
-    view_slip = tables.Column()
+    view_details = tables.Column(accessor="pk", orderable=False, exclude_from_export=True)
+    view_slip = tables.Column(accessor="pk", orderable=False, exclude_from_export=True)
     created = None
     action = None
 
@@ -167,6 +167,32 @@ class PayrollReportTable(BaseTable):
         attrs = {"class": "table key-buttons table-bordered border-bottom table-hover"}
         fields = ("employee", "total_due", "total_paid", "pending_due", "advance_paid")
 
+    def render_employee(self, record):
+        return record.fullname()
+
+    def value_employee(self, record):
+        return record.fullname()
+
+    def render_total_due(self, value):
+        return format_html("<span>{}</span>", float(value))
+
+    def render_total_paid(self, value):
+        return format_html("<span class='text-success'>{}</span>", float(value))
+
+    def render_pending_due(self, value):
+        return format_html("<span class='text-danger'>{}</span>", float(value))
+
+    def render_advance_paid(self, value):
+        return format_html("<span class='text-info'>{}</span>", float(value))
+
+    def render_view_details(self, record):
+        url = reverse_lazy("employees:payroll_report_detail", kwargs={"pk": record.pk})
+        return format_html("<a href='{}' class='btn btn-sm btn-light btn-outline-info'>View Details</a>", url)
+
+    def render_view_slip(self, record):
+        url = reverse_lazy("employees:payroll_report_slip", kwargs={"pk": record.pk})
+        return format_html("<a href='{}' class='btn btn-sm btn-light btn-outline-info'>View Slip</a>", url)
+
     
 class PartnerTable(BaseTable):
     share_percentage = tables.Column(verbose_name="Share %")
@@ -1 +1,53 @@
+from datetime import date
+from decimal import Decimal
 
+from django.test import TestCase
+
+from core.models import CompanyProfile
+from employees.models import Employee, EmployeeLeaveBalance, EmployeeLeaveRequest, Partner
+from employees.services.partner_equity import share_amount, share_percentage
+
+
+class LeaveLedgerTest(TestCase):
+    def setUp(self):
+        self.employee = Employee.objects.create(first_name="Test")
+        self.balance = EmployeeLeaveBalance.objects.create(employee=self.employee, paid_leave_balance=0.0, wfh_balance=0.0)
+        self.leave = EmployeeLeaveRequest.objects.create(
+            employee=self.employee, leave_type="casual", subject="Leave", reason="Leave", start_date=date(2026, 1, 5), end_date=date(2026, 1, 7)
+        )
+
+    def set_status(self, status):
+        self.leave.status = status
+        self.leave.save()
+        self.balance.refresh_from_db()
+
+    def test_reject_after_approving_at_zero_balance_refunds_nothing(self):
+        self.set_status("approved")
+        self.assertEqual(self.balance.paid_leave_balance, 0.0)
+
+        self.set_status("rejected")
+        self.assertEqual(self.balance.paid_leave_balance, 0.0)
+        self.assertEqual(sum(self.leave.ledger_entries.values_list("days", flat=True)), 0.0)
+
+    def test_reject_refunds_what_was_taken(self):
+        EmployeeLeaveBalance.objects.filter(pk=self.balance.pk).update(paid_leave_balance=2.0)
+        self.set_status("approved")
+        self.assertEqual(self.balance.paid_leave_balance, 0.0)
+
+        self.set_status("rejected")
+        self.assertEqual(self.balance.paid_leave_balance, 2.0)
+
+
+class PartnerSharesTest(TestCase):
+    def setUp(self):
+        self.company = CompanyProfile.objects.create(name="Company", total_value=Decimal("1000000.00"), number_of_shares=3, company_hold_shares=0)
+        Partner.objects.create(full_name="Partner", email="partner@example.com", shares_owned=Decimal("1.00"))
+
+    def test_annotations_match_python_calculation(self):
+        partner = Partner.objects.with_shares(self.company).get()
+        percentage = share_percentage(partner.shares_owned, self.company.number_of_shares)
+
+        self.assertEqual(percentage, Decimal("33.33"))
+        self.assertEqual(partner.share_percentage_value, percentage)
+        self.assertEqual(partner.share_amount_value, share_amount(percentage, self.company.total_value))
+        self.assertEqual(partner.share_amount_value, Decimal("333300.00"))
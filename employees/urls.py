@@ -52,6 +52,7 @@ urlpatterns = [
     path("payroll/", views.PayrollListView.as_view(), name="payroll_list"),
     path("payroll/<str:pk>/", views.PayrollDetailView.as_view(), name="payroll_detail"),
     path("new/payroll/", views.PayrollCreateView.as_view(), name="payroll_create"),
+    path("payroll-run/", views.PayrollRunView.as_view(), name="payroll_run"),
     path("payroll/<str:pk>/update/", views.PayrollUpdateView.as_view(), name="payroll_update"),
     path("payroll/<str:pk>/delete/", views.PayrollDeleteView.as_view(), name="payroll_delete"),
 
@@ -74,6 +75,7 @@ urlpatterns = [
     path("inactive/payroll-reports/", views.InactivePayrollReportView.as_view(), name="inactive_payroll_report"),
     path("payroll-report/detail/<str:pk>/", views.PayrollReportDetailView.as_view(), name="payroll_report_detail"),
     path("payroll-report/slip/<str:pk>/", views.PayrollReportSlipView.as_view(), name="payroll_report_slip"),
+    path("payroll-slips/export/", views.PayrollSlipBatchExportView.as_view(), name="payroll_slip_batch_export"),
 
     #partner
     path("partners/", views.PartnerListView.as_view(), name="partner_list"),
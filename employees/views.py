@@ -19,13 +19,14 @@ from django.urls import reverse, reverse_lazy
 from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
 from core import mixins
-from core.utils import build_url
-from django.http import JsonResponse, HttpResponse
+from core.utils import build_url, stream_zip
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect, get_object_or_404
 from decimal import Decimal
 from django.views.decorators.http import require_POST
 from django.utils.text import slugify
 from core.views import PDFView
+from core.pdf_service import ENGINE_WEASYPRINT, get_or_render_pdf
 from django.contrib.staticfiles import finders
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
@@ -35,6 +36,10 @@ from . import forms
 from . import tables
 from core import choices
 from .functions import generate_employee_id
+from .services.payroll_run import run_payroll
+from .services.attendance_overview import STATUS_EMPTY, decode_row, get_attendance_overview, invalidate_attendance_overview
+from .services.attendance_register import save_attendance_for_date
+from .services.payroll_slips import batch_slip_contexts, get_month_payrolls, slip_context, slip_filename
 from .models import Department, Partner
 from .models import Designation, EmployeeAttendanceRegister
 from .models import Employee, Payroll, PayrollPayment, AdvancePayrollPayment, EmployeeLeaveRequest, EmployeeLeaveBalance
@@ -265,16 +270,13 @@ def save_bulk_attendance(request):
     """Saves attendance for multiple employees sent via AJAX."""
     try:
         data = json.loads(request.body)
-        attendance_date = data.get('date')
+        attendance_date = datetime.strptime(data.get('date'), "%Y-%m-%d").date()
         records = data.get('records') 
 
-        for emp_id, status in records.items():
-            EmployeeAttendanceRegister.objects.update_or_create(
-                employee_id=emp_id,
-                date=attendance_date,
-                defaults={'status': status}
-            )
-        return JsonResponse({'status': 'success', 'message': 'Attendance saved successfully!'})
+        result = save_attendance_for_date(attendance_date, records, request.user)
+        # Bulk writes skip the register signals, so drop the cached overview here
+        invalidate_attendance_overview(attendance_date.year, attendance_date.month)
+        return JsonResponse({'status': 'success', 'message': f'Attendance saved successfully! ({result.summary()})', 'changes': result.as_dict()})
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
@@ -412,11 +414,12 @@ def share_employee_appointment(request, pk):
 
             html_string = render_to_string(template_name, context)
             base_url = request.build_absolute_uri('/')
-            html = HTML(string=html_string, base_url=base_url)
-
-            pdf_file = html.write_pdf(stylesheets=[
-                CSS(string='@page { size: A4; margin: 0mm; } body { margin: 0; padding: 0; }')
-            ])
+            pdf_file = get_or_render_pdf(
+                html_string,
+                {"stylesheets": ["@page { size: A4; margin: 0mm; } body { margin: 0; padding: 0; }"]},
+                engine=ENGINE_WEASYPRINT,
+                base_url=base_url,
+            )
             
             # Cache for 1 hour to prevent redundant generation
             cache.set(cache_key, pdf_file, 3600)
@@ -689,6 +692,7 @@ class EmployeeListView(mixins.HybridListView):
     template_name = "employees/employee/employee_list.html"
     model = Employee
     table_class = tables.EmployeeTable
+    search_index = "employee"
     permissions = ("admin_staff", "ceo","cfo","coo","hr","cmo")
     filterset_fields = {'branch': ['exact'] ,'department': ['exact'], 'designation': ['exact'], 'gender': ['exact'], 'employment_type': ['exact'], 'status':['exact']}
     search_fields = ("user__email", "employee_id", "first_name", "last_name", "marital_status", "mobile", "whatsapp")
@@ -749,6 +753,7 @@ class EmployeeListView(mixins.HybridListView):
 class NonActiveEmployeeListView(mixins.HybridListView):
     model = Employee
     table_class = tables.NonActiveEmployeeTable
+    search_index = "employee"
     permissions = ("admin_staff", "ceo","cfo","coo","hr","cmo")
     filterset_fields = {
         'branch': ['exact'],
@@ -1006,6 +1011,44 @@ class PayrollCreateView(mixins.HybridCreateView):
     exclude = None
 
 
+class PayrollRunView(mixins.HybridView):
+    """
+    Whole-branch payroll for a month. GET returns a dry-run preview of every
+    payslip; POST creates the payrolls and their vouchers in one go.
+    """
+    permissions = ("admin_staff", "ceo", "cfo", "coo", "hr", "cmo")
+
+    def get_run_params(self, data):
+        today = timezone.now().date()
+        branch = Branch.objects.filter(pk=data.get("branch")).first() if data.get("branch") else getattr(self.request.user, "branch", None)
+        try:
+            year = int(data.get("year", today.year))
+            month = int(data.get("month", today.month))
+        except (TypeError, ValueError):
+            year, month = today.year, today.month
+        if not 1 <= month <= 12:
+            month = today.month
+        return branch, year, month
+
+    def run(self, data, dry_run):
+        branch, year, month = self.get_run_params(data)
+        if not branch:
+            return JsonResponse({"success": False, "message": "Select a branch to run payroll for."}, status=400)
+        employee_ids = [int(pk) for pk in data.getlist("employees") if pk.isdigit()]
+        try:
+            result = run_payroll(branch, year, month, creator=self.request.user, dry_run=dry_run, employee_ids=employee_ids)
+        except Exception as e:
+            logger.exception("Payroll run failed for branch %s %s/%s", branch.pk, month, year)
+            return JsonResponse({"success": False, "message": str(e)}, status=400)
+        return JsonResponse({"success": True, "message": result.summary(), **result.as_dict()})
+
+    def get(self, request, *args, **kwargs):
+        return self.run(request.GET, dry_run=True)
+
+    def post(self, request, *args, **kwargs):
+        return self.run(request.POST, dry_run=request.POST.get("dry_run") in ("1", "true"))
+
+
 class PayrollDetailView(mixins.HybridDetailView):
     model = Payroll
 
@@ -1282,6 +1325,14 @@ class AdvancePayrollPaymentDeleteView(mixins.HybridDeleteView):
     model = AdvancePayrollPayment
 
 
+def payroll_report_queryset(queryset, hide_zero="false"):
+    """Employees annotated with their payroll totals, largest pending due first."""
+    queryset = queryset.with_payroll_totals()
+    if hide_zero == "true":
+        queryset = queryset.exclude(payroll_balance=0)
+    return queryset.order_by("-pending_due", "first_name")
+
+
 class PayrollReportView(mixins.HybridListView):
     title = "Payroll Report"
     template_name = "employees/payroll/payroll_report.html"
@@ -1306,42 +1357,8 @@ class PayrollReportView(mixins.HybridListView):
         return context
 
     def get_queryset(self):
-        return super().get_queryset().filter(is_active=True, status="Appointed")
-
-    def get_table(self, **kwargs):
-        hide_zero = self.request.GET.get("hide_zero", "false")
-        data = []
-        for employee in self.get_queryset():
-            total_due_amount = Payroll.objects.filter(is_active=True, employee=employee).aggregate(Sum("net_salary"))["net_salary__sum"]
-            total_paid_amount = PayrollPayment.objects.filter(is_active=True, employee=employee).aggregate(Sum("amount_paid"))["amount_paid__sum"]
-            total_advance_amount = AdvancePayrollPayment.objects.filter(is_active=True, employee=employee).aggregate(Sum("amount_paid"))["amount_paid__sum"]
-
-            total_due = total_due_amount if total_due_amount else 0
-            total_paid = total_paid_amount if total_paid_amount else 0
-            pending_due = (total_due - total_paid) if total_due > total_paid else 0
-            advance_paid = total_advance_amount if total_advance_amount else 0
-
-            if hide_zero == "true" and (total_due - total_paid) == 0:
-                continue
-
-            data.append(
-                {
-                    "employee": employee.fullname,
-                    "total_due": mark_safe(f"<span>{float(total_due)}</span>"),
-                    "total_paid": mark_safe(f"<span class='text-success'>{float(total_paid)}</span>"),
-                    "pending_due": mark_safe(f"<span class='text-danger'>{float(pending_due)}</span>"),
-                    "advance_paid": mark_safe(f"<span class='text-info'>{float(advance_paid)}</span>"),
-                    "view_details": mark_safe(
-                        f"<a href='{reverse('employees:payroll_report_detail', kwargs={'pk': employee.pk})}' class='btn btn-sm btn-light btn-outline-info'>View Details</a>"
-                    ),
-                    "view_slip": mark_safe(
-                        f"<a href='{reverse('employees:payroll_report_slip', kwargs={'pk': employee.pk})}' class='btn btn-sm btn-light btn-outline-info'>View Slip</a>"
-                    ),
-                }
-            )
-
-        sorted_data = sorted(data, key=lambda x: x["pending_due"], reverse=True)
-        return self.table_class(sorted_data, request=self.request)
+        queryset = super().get_queryset().filter(is_active=True, status="Appointed")
+        return payroll_report_queryset(queryset, self.request.GET.get("hide_zero", "false"))
     
 
 class InactivePayrollReportView(mixins.HybridListView):
@@ -1364,39 +1381,8 @@ class InactivePayrollReportView(mixins.HybridListView):
         return context
 
     def get_queryset(self):
-        return super().get_queryset().exclude(status="Appointed")
-
-    def get_table(self, **kwargs):
-        hide_zero = self.request.GET.get("hide_zero", "false")
-        data = []
-        for employee in self.get_queryset():
-            total_due_amount = Payroll.objects.filter(is_active=True, employee=employee).aggregate(Sum("net_salary"))["net_salary__sum"]
-            total_paid_amount = PayrollPayment.objects.filter(is_active=True, employee=employee).aggregate(Sum("amount_paid"))["amount_paid__sum"]
-            total_advance_amount = AdvancePayrollPayment.objects.filter(is_active=True, employee=employee).aggregate(Sum("amount_paid"))["amount_paid__sum"]
-
-            total_due = total_due_amount if total_due_amount else 0
-            total_paid = total_paid_amount if total_paid_amount else 0
-            pending_due = (total_due - total_paid) if total_due > total_paid else 0
-            advance_paid = total_advance_amount if total_advance_amount else 0
-            if hide_zero == "true" and (total_due - total_paid) == 0:
-                continue
-            data.append(
-                {
-                    "employee": employee.fullname(),
-                    "total_due": mark_safe(f"<span>{float(total_due)}</span>"),
-                    "total_paid": mark_safe(f"<span class='text-success'>{float(total_paid)}</span>"),
-                    "pending_due": mark_safe(f"<span class='text-danger'>{float(pending_due)}</span>"),
-                    "advance_paid": mark_safe(f"<span class='text-info'>{float(advance_paid)}</span>"),
-                    "view_details": mark_safe(
-                        f"<a href='{reverse('payroll:payroll_report_detail', kwargs={'pk': staff.pk})}' class='btn btn-sm btn-light btn-outline-info'>View Details</a>"
-                    ),
-                    "view_slip": mark_safe(
-                        f"<a href='{reverse('payroll:payroll_report_slip', kwargs={'pk': staff.pk})}' class='btn btn-sm btn-light btn-outline-info'>View Slip</a>"
-                    ),
-                }
-            )
-        sorted_data = sorted(data, key=lambda x: x["pending_due"], reverse=True)
-        return self.table_class(sorted_data)
+        queryset = super().get_queryset().exclude(status="Appointed")
+        return payroll_report_queryset(queryset, self.request.GET.get("hide_zero", "false"))
 
 
 class PayrollReportDetailView(mixins.HybridTemplateView):
@@ -1532,55 +1518,57 @@ class PayrollReportSlipView(mixins.HybridTemplateView):
 
         total_paid = payroll_payments.aggregate(Sum("amount_paid"))["amount_paid__sum"] or 0
         total_advance = advance_payments.aggregate(Sum("amount_paid"))["amount_paid__sum"] or 0
-        total_paid_all = total_paid + total_advance
+        total_due = payroll_qs.aggregate(Sum("net_salary"))["net_salary__sum"] or 0
 
-        selected_month_net_salary = latest_payroll.net_salary if latest_payroll else 0
-        month_balance = max(selected_month_net_salary - total_paid_all, 0)
+        context.update(slip_context(employee, latest_payroll, payroll_payments, advance_payments, total_paid, total_advance, total_due, now().date()))
+        context["payroll_list"] = payroll_list
+        return context
 
-        total_due = payroll_qs.aggregate(Sum("net_salary"))["net_salary__sum"] or 0
-        pending_due = max(total_due - total_paid_all, 0)
 
-        paid_leave = full_day_leave = half_day_leave = total_leave = 0.0
-        if latest_payroll:
-            absences = float(latest_payroll.absences or 0)
-            total_leave = absences
-            if employee.employment_type == "PROBATION":
-                full_day_leave = absences
-            else:
-                if absences <= 1:
-                    paid_leave = absences
-                else:
-                    paid_leave = 1
-                    remaining = absences - 1
-                    full_day_leave = int(remaining)
-                    if remaining - full_day_leave >= 0.5:
-                        half_day_leave = 1
+class PayrollSlipBatchExportView(mixins.CustomLoginRequiredMixin, PDFView):
+    """Every active payroll slip of a month (optionally one branch) as a streamed zip: ?year=&month=&branch="""
+    template_name = "employees/payroll/payroll_report_slip.html"
+    permissions = ("admin_staff", "ceo", "cfo", "coo", "hr", "cmo")
 
-        context.update({
-            "employee": employee,
-            "latest_payroll": latest_payroll,
-            "payroll_list": payroll_list,
-            "payment_lists": payroll_payments,
-            "advance_payment_lists": advance_payments,
-            "total_due": float(total_due),
-            "total_paid": float(total_paid),
-            "total_advance": float(total_advance),
-            "total_paid_all": float(total_paid_all),
-            "pending_due": float(pending_due),
-            "month_balance": float(month_balance),
-            "current_date": now().date(),
-            "paid_leave": paid_leave,
-            "full_day_leave": full_day_leave,
-            "half_day_leave": half_day_leave,
-            "total_leave": total_leave,
-        })
+    def get(self, request, *args, **kwargs):
+        today = now().date()
+        try:
+            year = int(request.GET.get("year") or today.year)
+            month = int(request.GET.get("month") or today.month)
+        except ValueError:
+            messages.error(request, "Invalid year or month.")
+            return redirect(request.META.get("HTTP_REFERER", reverse("employees:payroll_report")))
+        if not 1 <= month <= 12:
+            messages.error(request, "Invalid year or month.")
+            return redirect(request.META.get("HTTP_REFERER", reverse("employees:payroll_report")))
+
+        payrolls = list(get_month_payrolls(year, month, request.GET.get("branch") or None))
+        if not payrolls:
+            messages.error(request, f"No payroll found for {calendar.month_name[month]} {year}.")
+            return redirect(request.META.get("HTTP_REFERER", reverse("employees:payroll_report")))
+
+        self.slip_contexts = batch_slip_contexts(payrolls)
+        documents = self.iter_batch({"payroll_id": payroll.pk} for payroll in payrolls)
+        files = ((slip_filename(payroll), content) for payroll, content in zip(payrolls, documents))
+
+        response = StreamingHttpResponse(stream_zip(files), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="payroll_slips_{year}_{month:02d}.zip"'
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.slip_contexts[kwargs["payroll_id"]])
+        context["is_pdf"] = True
         return context
 
-    
+
 class PartnerListView(mixins.HybridListView):
     model = Partner
     table_class = tables.PartnerTable
     filterset_fields ={'partner_id': ['icontains'], }
+
+    def get_queryset(self):
+        return super().get_queryset().with_shares()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1592,6 +1580,9 @@ class PartnerDetailView(mixins.HybridDetailView):
     model = Partner
     permissions = ("branch_staff", "admin_staff", "ceo", "cfo", "coo", "hr", "cmo", "teacher",)
 
+    def get_queryset(self):
+        return Partner.objects.with_shares()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["is_partner"] = True
@@ -1835,7 +1826,7 @@ class EmployeeLeaveReport(mixins.HybridListView):
     def get_queryset(self):
         return super().get_queryset().select_related(
             'leave_balance', 'department', 'designation', 'branch'
-        ).prefetch_related('leave_requests')
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1849,9 +1840,12 @@ class EmployeeLeaveReportDetailView(mixins.HybridDetailView):
     permissions = ("admin_staff", "ceo", "cfo", "coo", "hr", "cmo",)
     template_name = "employees/employee_leave_request/report/report_detail.html"
 
+    def get_queryset(self):
+        return Employee.objects.with_leave_counts().select_related('leave_balance')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        employee = self.get_object()
+        employee = self.object
         
         leave_history = employee.leave_requests.filter(is_active=True).order_by('-start_date')
 
@@ -1915,94 +1909,18 @@ class EmployeeAttendanceOverview(mixins.HybridTemplateView):
                 Q(last_name__icontains=search_query)
             )
 
-        attendance_qs = EmployeeAttendanceRegister.objects.filter(
-            date__range=[start_date, end_date],
-            employee__in=employees
-        )
-        attendance_map = {
-            (att.employee_id, att.date): att.status 
-            for att in attendance_qs
-        }
-
-        leave_qs = EmployeeLeaveRequest.objects.filter(
-            employee__in=employees
-        ).filter(
-            Q(start_date__lte=end_date) & Q(end_date__gte=start_date)
-        ).exclude(status='rejected') # Optional: Exclude rejected if you don't want to see them
-
-        # Map leaves to dates: {(employee_id, date_obj): 'approved'/'pending'}
-        leave_map = {}
-        for leave in leave_qs:
-            # Calculate range overlap with current month
-            s = max(leave.start_date, start_date)
-            e = min(leave.end_date, end_date)
-            delta = (e - s).days + 1
-            
-            for i in range(delta):
-                day = s + timedelta(days=i)
-                # Store status + type (e.g., "approved_wfh", "pending_sick")
-                leave_map[(leave.employee_id, day)] = {
-                    'status': leave.status,
-                    'type': leave.leave_type
-                }
-
-        # 5. Construct the Matrix
+        # Packed per-(branch, month) rows from the cache; filters only pick rows out of it
+        overview_branch = int(branch_id) if branch_id and branch_id.isdigit() else None
+        overview = get_attendance_overview(year, month, overview_branch)
+        employees = list(employees)
+        if any(emp.id not in overview["rows"] for emp in employees):
+            # Employee set changed since the overview was cached
+            overview = get_attendance_overview(year, month, overview_branch, refresh=True)
         attendance_matrix = []
-        
         for emp in employees:
-            row_data = []
-            present_count = 0
-            absent_count = 0
-            leave_count = 0
-
-            for single_date in date_list:
-                cell_data = {'date': single_date, 'day_name': single_date.strftime('%a')}
-                
-                # Check Attendance Register First (Priority)
-                att_status = attendance_map.get((emp.id, single_date))
-                
-                # Check Leave Request Second
-                leave_info = leave_map.get((emp.id, single_date))
-
-                if att_status == 'present':
-                    cell_data['status'] = 'present'
-                    cell_data['label'] = 'P'
-                    present_count += 1
-                elif att_status == 'absent':
-                    cell_data['status'] = 'absent'
-                    cell_data['label'] = 'A'
-                    absent_count += 1
-                elif leave_info:
-                    # Logic for Leaves
-                    l_status = leave_info['status'] # approved/pending
-                    l_type = leave_info['type']     # sick/wfh/etc
-                    
-                    if l_status == 'approved':
-                        cell_data['status'] = 'leave_approved'
-                        cell_data['label'] = 'L' if l_type != 'wfh' else 'WFH'
-                        leave_count += 1
-                    elif l_status == 'pending':
-                        cell_data['status'] = 'leave_pending'
-                        cell_data['label'] = '?'
-                    elif l_status == 'rejected':
-                        cell_data['status'] = 'leave_rejected'
-                        cell_data['label'] = 'X'
-                else:
-                    # No record found
-                    cell_data['status'] = 'empty'
-                    cell_data['label'] = '-'
-
-                row_data.append(cell_data)
-
-            attendance_matrix.append({
-                'employee': emp,
-                'days': row_data,
-                'stats': {
-                    'present': present_count,
-                    'absent': absent_count,
-                    'leaves': leave_count
-                }
-            })
+            row = overview["rows"].get(emp.id, STATUS_EMPTY * num_days)
+            days, stats = decode_row(row, date_list)
+            attendance_matrix.append({'employee': emp, 'days': days, 'stats': stats})
 
         # 6. Pass Context
         context.update({
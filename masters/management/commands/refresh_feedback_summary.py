@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from masters.services.feedback_report import month_start, months_to_refresh, refresh_feedback_summary
+
+
+class Command(BaseCommand):
+    help = 'Materialize monthly feedback counts into FeedbackSummary (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', action='append', help='Month to refresh as YYYY-MM (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Rebuild every closed month, not just missing ones and the last one')
+
+    def handle(self, *args, **options):
+        if options['month']:
+            months = [month_start(value) for value in options['month']]
+            if None in months:
+                raise CommandError("Months must be given as YYYY-MM.")
+        else:
+            months = months_to_refresh(include_all=options['all'])
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Refreshing feedback summaries..."))
+        for month in months:
+            rows = refresh_feedback_summary(month)
+            self.stdout.write(f"  {month:%B %Y}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(months)} month(s)."))
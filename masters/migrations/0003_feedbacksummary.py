@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 15:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('branches', '0001_initial'), ('masters', '0002_tax_state_historicaltax_historicalstate_and_more')]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the feedback was given in')),
+                ('feedback_type', models.CharField(max_length=100)),
+                ('total_feedbacks', models.PositiveIntegerField(default=0)),
+                ('total_students', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0, help_text='Sum of answer values, for exact averages')),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('refreshed', models.DateTimeField(auto_now=True)),
+                (
+                    'branch',
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='branches.branch'
+                    ),
+                ),
+                (
+                    'course',
+                    models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='masters.course'),
+                ),
+            ],
+            options={
+                'verbose_name': 'Feedback Summary',
+                'verbose_name_plural': 'Feedback Summaries',
+                'ordering': ('-month',),
+                'indexes': [models.Index(fields=['month', 'feedback_type'], name='masters_fee_month_d3ff4b_idx')],
+            },
+        ),
+    ]
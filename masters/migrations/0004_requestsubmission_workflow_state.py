@@ -0,0 +1,105 @@
+# Generated by Django 4.2 on 2026-10-18 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+USERTYPE_FLOW_CHOICES = [
+    ('mentor', 'Mentor'),
+    ('sales_head', 'Sales Head'),
+    ('ceo', 'CEO'),
+    ('cfo', 'CFO'),
+    ('coo', 'COO'),
+    ('hr', 'HR'),
+    ('cmo', 'CMO'),
+    ('branch_staff', 'Branch Staff'),
+]
+
+
+def backfill_workflow_state(apps, schema_editor):
+    """Copy each submission's latest history step onto the submission row."""
+    RequestSubmission = apps.get_model('masters', 'RequestSubmission')
+    RequestSubmissionStatusHistory = apps.get_model('masters', 'RequestSubmissionStatusHistory')
+
+    returned = set(RequestSubmissionStatusHistory.objects.filter(usertype='hr', next_usertype='branch_staff').values_list('submission_id', flat=True))
+    latest = {}
+    for submission_id, user_id, usertype, next_usertype, date in (
+        RequestSubmissionStatusHistory.objects.order_by('submission_id', 'date').values_list('submission_id', 'user_id', 'usertype', 'next_usertype', 'date').iterator()
+    ):
+        latest[submission_id] = (user_id, usertype, next_usertype, date)
+
+    submissions = []
+    for submission in RequestSubmission.objects.filter(pk__in=latest.keys()).iterator():
+        user_id, usertype, next_usertype, date = latest[submission.pk]
+        submission.current_usertype = next_usertype or None
+        submission.last_actor_id = user_id
+        submission.last_actor_usertype = usertype
+        submission.last_transition_at = date
+        submission.returned_by_hr = submission.pk in returned
+        submissions.append(submission)
+    RequestSubmission.objects.bulk_update(
+        submissions, ['current_usertype', 'last_actor', 'last_actor_usertype', 'last_transition_at', 'returned_by_hr'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('employees', '0001_initial'), ('masters', '0003_feedbacksummary')]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestsubmission',
+            name='last_actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='employees.employee'),
+        ),
+        migrations.AddField(
+            model_name='requestsubmission',
+            name='last_actor_usertype',
+            field=models.CharField(blank=True, choices=USERTYPE_FLOW_CHOICES, max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestsubmission',
+            name='last_transition_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='requestsubmission',
+            name='returned_by_hr',
+            field=models.BooleanField(default=False, help_text='HR has passed the request back to branch staff'),
+        ),
+        migrations.AddField(
+            model_name='historicalrequestsubmission',
+            name='last_actor',
+            field=models.ForeignKey(
+                blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='employees.employee'
+            ),
+        ),
+        migrations.AddField(
+            model_name='historicalrequestsubmission',
+            name='last_actor_usertype',
+            field=models.CharField(blank=True, choices=USERTYPE_FLOW_CHOICES, max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalrequestsubmission',
+            name='last_transition_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalrequestsubmission',
+            name='returned_by_hr',
+            field=models.BooleanField(default=False, help_text='HR has passed the request back to branch staff'),
+        ),
+        migrations.AddIndex(
+            model_name='requestsubmission',
+            index=models.Index(fields=['current_usertype', 'is_active', '-last_transition_at'], name='masters_req_current_22c79f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestsubmission',
+            index=models.Index(fields=['returned_by_hr', 'status'], name='masters_req_returne_af847f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestsubmission',
+            index=models.Index(fields=['last_actor', '-last_transition_at'], name='masters_req_last_ac_5e83c9_idx'),
+        ),
+        migrations.RunPython(backfill_workflow_state, migrations.RunPython.noop),
+    ]
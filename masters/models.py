@@ -107,6 +107,12 @@ class PdfBook(BaseModel):
     
     def get_absolute_url(self):
         return reverse_lazy("masters:pdf_book_detail", kwargs={"pk": self.pk})
+
+    def get_file_url(self):
+        return reverse_lazy("masters:pdf_book_file", kwargs={"pk": self.pk})
+
+    def get_thumbnail_url(self):
+        return reverse_lazy("masters:pdf_book_thumbnail", kwargs={"pk": self.pk})
     
     def get_update_url(self):
         return reverse_lazy("masters:pdf_book_update", kwargs={"pk": self.pk})
@@ -486,7 +492,7 @@ class BranchActivity(BaseModel):
     
     def __str__(self):
         return f"{self.branch} - {self.activity} ({self.point} pts)"
-    
+
     @staticmethod
     def get_list_url():
         return reverse_lazy("masters:branch_activity_list")
@@ -540,6 +546,11 @@ class RequestSubmission(BaseModel):
     updated_by = models.ForeignKey("employees.Employee", on_delete=models.SET_NULL, null=True, blank=True, related_name="updated_submissions")
     is_request_closed_by_users = models.CharField(max_length=80, choices=CHOICES, default='false', verbose_name="Request Close By User")
     is_request_completed = models.CharField(max_length=80, choices=CHOICES, default='false', verbose_name="Request Completed")
+    # Latest workflow step, copied from RequestSubmissionStatusHistory as each step is recorded
+    last_actor = models.ForeignKey("employees.Employee", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_actor_usertype = models.CharField(max_length=30, choices=USERTYPE_FLOW_CHOICES, null=True, blank=True)
+    last_transition_at = models.DateTimeField(null=True, blank=True)
+    returned_by_hr = models.BooleanField(default=False, help_text="HR has passed the request back to branch staff")
 
     def __str__(self):
         return f"{self.title}"
@@ -548,6 +559,11 @@ class RequestSubmission(BaseModel):
         ordering = ['-updated']
         verbose_name = "Request Submission"
         verbose_name_plural = "Request Submissions"
+        indexes = [
+            models.Index(fields=["current_usertype", "is_active", "-last_transition_at"]),
+            models.Index(fields=["returned_by_hr", "status"]),
+            models.Index(fields=["last_actor", "-last_transition_at"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.request_id:
@@ -642,6 +658,18 @@ class RequestSubmissionStatusHistory(BaseModel):
     def __str__(self):
         return f"{self.submission.title} - {self.usertype} - {self.status}"
 
+    def workflow_state(self):
+        """RequestSubmission fields that mirror this step while it is the latest one."""
+        state = {
+            "current_usertype": self.next_usertype or None,
+            "last_actor_id": self.user_id,
+            "last_actor_usertype": self.usertype,
+            "last_transition_at": self.date,
+        }
+        if self.usertype == "hr" and self.next_usertype == "branch_staff":
+            state["returned_by_hr"] = True
+        return state
+
 
 class LeaveRequest(BaseModel):
     student = models.ForeignKey("admission.Admission", on_delete=models.CASCADE, null=True)
@@ -772,6 +800,40 @@ class Feedback(BaseModel):
         return reverse_lazy("masters:feedback_delete", kwargs={"pk": self.pk})
 
 
+class FeedbackSummary(models.Model):
+    """
+    Feedback counts per month, student branch, course and question type,
+    materialized nightly by refresh_feedback_summary so reports on closed
+    months read a few rows instead of scanning every answer. Rows with
+    feedback_type "all" count each student once across question types.
+    """
+
+    ALL_TYPES = "all"
+
+    month = models.DateField(help_text="First day of the month the feedback was given in")
+    feedback_type = models.CharField(max_length=100)
+    branch = models.ForeignKey("branches.Branch", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    course = models.ForeignKey("masters.Course", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    total_feedbacks = models.PositiveIntegerField(default=0)
+    total_students = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0, help_text="Sum of answer values, for exact averages")
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    refreshed = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-month",)
+        verbose_name = "Feedback Summary"
+        verbose_name_plural = "Feedback Summaries"
+        indexes = [models.Index(fields=["month", "feedback_type"])]
+
+    def __str__(self):
+        return f"{self.month:%B %Y} - {self.feedback_type} - {self.total_feedbacks} feedbacks"
+
+
 class PlacementHistory(BaseModel):
     student = models.ForeignKey("admission.Admission", on_delete=models.CASCADE)
     company_name = models.CharField(max_length=200)
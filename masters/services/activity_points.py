@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Sum
+
+from masters.models import BranchActivity
+
+CACHE_KEY = "branch_activity_lifetime_totals"
+CACHE_TIMEOUT = 60 * 15
+
+
+def build_lifetime_totals():
+    """{(branch_id, activity_id): all-time points} from one grouped query."""
+    rows = BranchActivity.objects.filter(is_active=True).order_by().values("branch", "activity").annotate(total=Sum("point"))
+    return {(row["branch"], row["activity"]): row["total"] or 0 for row in rows}
+
+
+def get_lifetime_totals():
+    """Cached build_lifetime_totals, dropped on every BranchActivity save and delete."""
+    totals = cache.get(CACHE_KEY)
+    if totals is None:
+        totals = build_lifetime_totals()
+        cache.set(CACHE_KEY, totals, CACHE_TIMEOUT)
+    return totals
+
+
+def invalidate_lifetime_totals():
+    cache.delete(CACHE_KEY)
+
+
+def month_points(month):
+    """
+    {(branch_id, activity_id): (points, id)} for one month from one query. The
+    newest entry wins when a cell has several, as .first() did before.
+    """
+    cells = {}
+    rows = BranchActivity.objects.filter(is_active=True, month=month).order_by("created").values_list("branch", "activity", "point", "pk")
+    for branch_id, activity_id, point, pk in rows:
+        cells[(branch_id, activity_id)] = (point, pk)
+    return cells
+
+
+def month_totals(month):
+    """{branch_id: points} summing every active entry of the month, not only the newest per cell."""
+    rows = BranchActivity.objects.filter(is_active=True, month=month).order_by().values("branch").annotate(total=Sum("point"))
+    return {row["branch"]: row["total"] or 0 for row in rows}
+
+
+def dense_ranks(values):
+    """1 for the highest value, equal values share a rank."""
+    ranks = {value: rank for rank, value in enumerate(sorted(set(values), reverse=True), start=1)}
+    return [ranks[value] for value in values]
+
+
+def build_pivot(month, activities, branches):
+    """
+    Leaderboard for a month: an activities x branches matrix of month points
+    plus per-branch month and lifetime totals with rankings, from two month
+    queries and the cached lifetime totals. Cells show the newest entry, the
+    month totals add up all of them.
+    """
+    cells = month_points(month)
+    month_by_branch = month_totals(month)
+    lifetime = get_lifetime_totals()
+
+    activity_matrix = []
+    for activity in activities:
+        row = {"activity": activity, "branches": []}
+        for branch in branches:
+            points, pk = cells.get((branch.pk, activity.pk), (0, None))
+            row["branches"].append({
+                "branch": branch,
+                "points": points,
+                "total_points": lifetime.get((branch.pk, activity.pk), 0),
+                "id": pk,
+                "is_highest": False,
+            })
+        if row["branches"]:
+            max_points = max(cell["points"] for cell in row["branches"])
+            for cell in row["branches"]:
+                cell["is_highest"] = cell["points"] == max_points and max_points > 0
+        activity_matrix.append(row)
+
+    lifetime_by_branch = defaultdict(int)
+    for (branch_id, _activity_id), total in lifetime.items():
+        lifetime_by_branch[branch_id] += total
+
+    branch_totals = [
+        {"branch": branch, "month_total": month_by_branch.get(branch.pk, 0), "overall_total": lifetime_by_branch[branch.pk], "is_highest": False}
+        for branch in branches
+    ]
+    for total, rank, overall_rank in zip(
+        branch_totals,
+        dense_ranks([total["month_total"] for total in branch_totals]),
+        dense_ranks([total["overall_total"] for total in branch_totals]),
+    ):
+        total["rank"] = rank
+        total["overall_rank"] = overall_rank
+
+    leading_branch = None
+    if branch_totals:
+        max_month_total = max(total["month_total"] for total in branch_totals)
+        for total in branch_totals:
+            total["is_highest"] = total["month_total"] == max_month_total and max_month_total > 0
+        if max_month_total > 0:
+            leading_branch = max(branch_totals, key=lambda total: total["month_total"])
+
+    return {"activity_matrix": activity_matrix, "branch_totals": branch_totals, "leading_branch": leading_branch}
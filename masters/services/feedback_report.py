@@ -0,0 +1,183 @@
+from collections import defaultdict
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from masters.models import Feedback, FeedbackAnswer, FeedbackSummary
+
+RATINGS = range(1, 6)
+COUNT_FIELDS = ("total_feedbacks", "total_students", "rating_total") + tuple(f"rating_{rating}" for rating in RATINGS)
+
+
+def rating_aggregates():
+    """Counts behind every number on the report, as one set of aggregates."""
+    aggregates = {
+        "total_feedbacks": Count("id"),
+        "total_students": Count("student", distinct=True),
+        "rating_total": Sum("answer__answer_value"),
+    }
+    for rating in RATINGS:
+        aggregates[f"rating_{rating}"] = Count("id", filter=Q(answer__answer_value=rating))
+    return aggregates
+
+
+def empty_counts():
+    return dict.fromkeys(COUNT_FIELDS, 0)
+
+
+def add_counts(total, row):
+    for field in COUNT_FIELDS:
+        total[field] += row[field] or 0
+    return total
+
+
+def with_average(counts):
+    counts["avg_rating"] = counts["rating_total"] / counts["total_feedbacks"] if counts["total_feedbacks"] else 0
+    return counts
+
+
+def grouped(queryset, field):
+    """{value of field: counts} from one GROUP BY query."""
+    return {row[field]: with_average(add_counts(empty_counts(), row)) for row in queryset.order_by().values(field).annotate(**rating_aggregates())}
+
+
+class FeedbackFigures:
+    """
+    Everything the feedback report shows, independent of where it came from:
+    overall counts, counts per question type, faculty feedback per student
+    course and FAO feedback per student branch.
+    """
+
+    def __init__(self, overall, by_type, by_course, by_branch, source):
+        self.overall = with_average(overall)
+        self.by_type = by_type
+        self.by_course = by_course
+        self.by_branch = by_branch
+        self.source = source
+
+    @classmethod
+    def live(cls, feedback_qs, show_teacher=True, show_fao=True):
+        """Five grouped queries, whatever the number of staff."""
+        overall = add_counts(empty_counts(), feedback_qs.order_by().aggregate(**rating_aggregates()))
+        by_type = grouped(feedback_qs, "question__feedback_type")
+        by_course = grouped(feedback_qs.filter(question__feedback_type="faculty"), "student__course") if show_teacher else {}
+        by_branch = grouped(feedback_qs.filter(question__feedback_type="fao"), "student__branch") if show_fao else {}
+        return cls(overall, by_type, by_course, by_branch, "live")
+
+    @classmethod
+    def from_summary(cls, rows):
+        """The same figures added up from materialized FeedbackSummary rows (one query)."""
+        overall = empty_counts()
+        by_type = defaultdict(empty_counts)
+        by_course = defaultdict(empty_counts)
+        by_branch = defaultdict(empty_counts)
+        for row in rows.values("feedback_type", "branch_id", "course_id", *COUNT_FIELDS):
+            if row["feedback_type"] == FeedbackSummary.ALL_TYPES:
+                add_counts(overall, row)
+                continue
+            add_counts(by_type[row["feedback_type"]], row)
+            if row["feedback_type"] == "faculty":
+                add_counts(by_course[row["course_id"]], row)
+            elif row["feedback_type"] == "fao":
+                add_counts(by_branch[row["branch_id"]], row)
+
+        def finish(groups):
+            return {key: with_average(counts) for key, counts in groups.items()}
+
+        return cls(overall, finish(by_type), finish(by_course), finish(by_branch), "summary")
+
+    def staff_counts(self, group, key):
+        return self.by_course.get(key) if group == "course" else self.by_branch.get(key)
+
+    def feedback_type_stats(self):
+        return [
+            {"type": feedback_type, "total_feedbacks": counts["total_feedbacks"], "avg_rating": counts["avg_rating"]}
+            for feedback_type, counts in sorted(self.by_type.items(), key=lambda item: item[0] or "")
+        ]
+
+    def answer_distribution(self):
+        labels = {}
+        for value, answer in FeedbackAnswer.objects.filter(is_active=True, answer_value__in=RATINGS).order_by("answer_value", "created").values_list("answer_value", "answer"):
+            labels.setdefault(value, answer)
+        total = self.overall["total_feedbacks"]
+        distribution = []
+        for rating in RATINGS:
+            count = self.overall[f"rating_{rating}"]
+            distribution.append({
+                "value": rating,
+                "answer": labels.get(rating) if count else None,
+                "count": count,
+                "percentage": (count / total * 100) if total > 0 else 0.0,
+            })
+            if not distribution[-1]["answer"]:
+                distribution[-1]["answer"] = f'{rating} Star{"s" if rating > 1 else ""}'
+        return distribution
+
+
+def month_start(value):
+    """date(YYYY, MM, 1) from a 'YYYY-MM' string, or None."""
+    try:
+        year, month = (int(part) for part in str(value).split("-")[:2])
+        return date(year, month, 1)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_materialized(month):
+    return month < date.today().replace(day=1) and FeedbackSummary.objects.filter(month=month).exists()
+
+
+def summary_rows(month, branch_id=None):
+    rows = FeedbackSummary.objects.filter(month=month)
+    if branch_id:
+        rows = rows.filter(branch_id=branch_id)
+    return rows
+
+
+def refresh_feedback_summary(month):
+    """
+    Recompute one month's FeedbackSummary rows from the feedback table with
+    two grouped queries and swap them in atomically. Returns the row count.
+    """
+    feedbacks = Feedback.objects.filter(is_active=True, created__year=month.year, created__month=month.month).order_by()
+    rows = [
+        FeedbackSummary(
+            month=month,
+            feedback_type=row["question__feedback_type"],
+            branch_id=row["student__branch"],
+            course_id=row["student__course"],
+            **{field: row[field] or 0 for field in COUNT_FIELDS},
+        )
+        for row in feedbacks.values("question__feedback_type", "student__branch", "student__course").annotate(**rating_aggregates())
+    ]
+    rows += [
+        FeedbackSummary(
+            month=month,
+            feedback_type=FeedbackSummary.ALL_TYPES,
+            branch_id=row["student__branch"],
+            course_id=row["student__course"],
+            **{field: row[field] or 0 for field in COUNT_FIELDS},
+        )
+        for row in feedbacks.values("student__branch", "student__course").annotate(**rating_aggregates())
+    ]
+    with transaction.atomic():
+        FeedbackSummary.objects.filter(month=month).delete()
+        FeedbackSummary.objects.bulk_create(rows)
+    return len(rows)
+
+
+def months_to_refresh(include_all=False):
+    """
+    Closed months that have feedback but no summary yet, plus the last
+    closed month (late edits land there). With include_all, every closed month.
+    """
+    current = date.today().replace(day=1)
+    last_closed = current - relativedelta(months=1)
+    months = {month for month in Feedback.objects.filter(is_active=True).dates("created", "month") if month < current}
+    if not include_all:
+        done = set(FeedbackSummary.objects.values_list("month", flat=True).distinct())
+        months = {month for month in months if month not in done}
+        months.add(last_closed)
+    return sorted(months)
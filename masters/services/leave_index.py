@@ -0,0 +1,190 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from admission.models import Attendance, AttendanceRegister
+from admission.services.attendance_matrix import invalidate_attendance_matrix
+from admission.services.student_profile import invalidate_student_profile
+from masters.models import Holiday, LeaveRequest
+
+DECISIONS = ("approved", "rejected")
+
+
+def student_ids(students):
+    """Admission querysets stay a subquery; lists of admissions or ids become ids."""
+    if isinstance(students, QuerySet):
+        return students.values("pk")
+    return [getattr(student, "pk", student) for student in students]
+
+
+def days_between(start, end):
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+class LeaveIndex:
+    """
+    The leaves of many students over a date window, loaded with one range
+    query. Each student's leaves are merged into sorted, disjoint intervals,
+    so "is this student on leave that day" is a binary search, not a query.
+    """
+
+    def __init__(self, leaves, start, end):
+        self.start = start
+        self.end = end
+        self.leaves = defaultdict(list)
+        for leave in sorted(leaves, key=lambda leave: leave.start_date):
+            self.leaves[leave.student_id].append(leave)
+
+        self.intervals = {}
+        for student_id, student_leaves in self.leaves.items():
+            merged = []
+            for leave in student_leaves:
+                leave_start, leave_end = max(leave.start_date, start), min(leave.end_date, end)
+                if merged and leave_start <= merged[-1][1] + timedelta(days=1):
+                    merged[-1][1] = max(merged[-1][1], leave_end)
+                else:
+                    merged.append([leave_start, leave_end])
+            self.intervals[student_id] = ([interval[0] for interval in merged], [interval[1] for interval in merged])
+
+    @classmethod
+    def load(cls, students, start, end, statuses=("approved",)):
+        """Active leaves of the students overlapping start..end; every status when statuses is None."""
+        leaves = LeaveRequest.objects.filter(student_id__in=student_ids(students), is_active=True, start_date__lte=end, end_date__gte=start)
+        if statuses:
+            leaves = leaves.filter(status__in=statuses)
+        return cls(leaves, start, end)
+
+    def covers(self, student_id, day):
+        if student_id not in self.intervals:
+            return False
+        starts, ends = self.intervals[student_id]
+        position = bisect_right(starts, day) - 1
+        return position >= 0 and day <= ends[position]
+
+    def days(self, student_id):
+        starts, ends = self.intervals.get(student_id, ((), ()))
+        return {day for interval_start, interval_end in zip(starts, ends) for day in days_between(interval_start, interval_end)}
+
+    def by_day(self):
+        """{(student_id, day): leave} inside the window; the later-starting leave wins on overlaps."""
+        mapping = {}
+        for student_id, student_leaves in self.leaves.items():
+            for leave in student_leaves:
+                for day in days_between(max(leave.start_date, self.start), min(leave.end_date, self.end)):
+                    mapping[(student_id, day)] = leave
+        return mapping
+
+
+def approved_leave_days(students, start, end):
+    """{student_id: set of dates between start and end covered by an approved leave}; students without leave are left out."""
+    index = LeaveIndex.load(students, start, end)
+    return {student_id: index.days(student_id) for student_id in index.intervals}
+
+
+def holiday_keys(start, end):
+    """{(date, branch_id)} of active holidays in the range; branch_id is None for holidays of every branch."""
+    keys = set()
+    for day, scope, branch_id in Holiday.objects.filter(is_active=True, date__range=(start, end)).values_list("date", "scope", "branch"):
+        keys.add((day, None if scope == "all" else branch_id))
+    return keys
+
+
+def mark_leave_absences(leaves, user=None):
+    """
+    Make sure every student has an attendance row on each day of their leave:
+    Absent, or Holiday when the register falls on a holiday. Registers are
+    matched on branch/batch/course/date like the attendance screens, and
+    missing registers and rows are created in bulk. Absence SMS is not sent
+    from here; the leave decision itself is what the parents need.
+    """
+    leaves = [leave for leave in leaves if leave.student_id]
+    if not leaves:
+        return
+    start = min(leave.start_date for leave in leaves)
+    end = max(leave.end_date for leave in leaves)
+
+    wanted = {}
+    for leave in leaves:
+        student = leave.student
+        for day in days_between(leave.start_date, leave.end_date):
+            wanted[(student.pk, day)] = (student.branch_id, student.batch_id, student.course_id, day)
+
+    registers = {}
+    for register in AttendanceRegister.objects.filter(date__range=(start, end), branch_id__in={key[0] for key in wanted.values()}).order_by("pk"):
+        registers.setdefault((register.branch_id, register.batch_id, register.course_id, register.date), register)
+    missing = [
+        AttendanceRegister(branch_id=branch_id, batch_id=batch_id, course_id=course_id, date=day, creator=user)
+        for branch_id, batch_id, course_id, day in set(wanted.values()) - set(registers)
+    ]
+    if missing:
+        for register in bulk_create_with_history(missing, AttendanceRegister, default_user=user):
+            registers[(register.branch_id, register.batch_id, register.course_id, register.date)] = register
+
+    holidays = holiday_keys(start, end)
+    existing = {
+        (attendance.student_id, attendance.register_id): attendance
+        for attendance in Attendance.objects.filter(student_id__in={student_id for student_id, _ in wanted}, register_id__in=[register.pk for register in registers.values()])
+    }
+
+    to_create, to_update = [], []
+    for (student_id, day), key in wanted.items():
+        register = registers[key]
+        is_holiday = (day, None) in holidays or (day, register.branch_id) in holidays
+        status = "Holiday" if is_holiday else "Absent"
+        attendance = existing.get((student_id, register.pk))
+        if attendance is None:
+            to_create.append(Attendance(register=register, student_id=student_id, status=status, sms_sent=is_holiday, creator=user))
+        elif attendance.status != status:
+            attendance.status = status
+            to_update.append(attendance)
+
+    if to_create:
+        bulk_create_with_history(to_create, Attendance, default_user=user)
+    if to_update:
+        bulk_update_with_history(to_update, Attendance, ["status"], default_user=user)
+
+
+def invalidate_leave_views(leaves):
+    """Drop the cached profiles and attendance matrices the leaves show up in."""
+    invalidate_student_profile(*{leave.student_id for leave in leaves})
+    months = set()
+    for leave in leaves:
+        month = leave.start_date.replace(day=1)
+        while month <= leave.end_date:
+            months.add(month)
+            month += relativedelta(months=1)
+    for month in months:
+        invalidate_attendance_matrix(month.year, month.month)
+
+
+def decide_leaves(leaves, status, approver=None, user=None):
+    """
+    Approve or reject the leaves in one go and mark their days in attendance,
+    as the single-leave status endpoint always did. Returns the updated leaves.
+    """
+    if status not in DECISIONS:
+        raise ValueError(f"Leave status must be one of {', '.join(DECISIONS)}.")
+    if isinstance(leaves, QuerySet):
+        leaves = leaves.select_related("student")
+    leaves = list(leaves)
+    if not leaves:
+        return leaves
+
+    decided = timezone.now()
+    for leave in leaves:
+        leave.status = status
+        leave.approved_by = approver
+        leave.approved_date = decided
+
+    with transaction.atomic():
+        bulk_update_with_history(leaves, LeaveRequest, ["status", "approved_by", "approved_date"], default_user=user)
+        mark_leave_absences(leaves, user)
+    invalidate_leave_views(leaves)
+    return leaves
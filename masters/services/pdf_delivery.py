@@ -0,0 +1,212 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from email.utils import formatdate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from admission.models import Admission
+from employees.models import Employee
+
+CHUNK_SIZE = 64 * 1024
+HASH_TIMEOUT = 60 * 60 * 24 * 30
+THUMBNAIL_WIDTH = 320
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def can_access(user, book):
+    """Students only get their own course's books, teachers their course's; other staff all."""
+    if user.is_superuser:
+        return True
+    course_id = book.resource.course_id
+    if user.usertype == "student":
+        return Admission.objects.filter(user=user, course_id=course_id).exists()
+    if user.usertype == "teacher":
+        return Employee.objects.filter(user=user, course_id=course_id).exists()
+    return True
+
+
+def file_stat(book):
+    """
+    (local path, size, mtime) of the book's file; path is None on storages
+    without local files. Raises Http404 when the file is missing.
+    """
+    if not book.pdf:
+        raise Http404("This book has no file.")
+    try:
+        path = book.pdf.path
+    except NotImplementedError:
+        return None, None, None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("The book's file is missing.")
+    return path, stat.st_size, int(stat.st_mtime)
+
+
+def file_hash(path, size, mtime):
+    """SHA-256 of the file, computed once per (path, size, mtime) and cached."""
+    key = "pdf_book_hash:" + hashlib.md5(f"{path}:{size}:{mtime}".encode()).hexdigest()
+    digest = cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        cache.set(key, digest, HASH_TIMEOUT)
+    return digest
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the whole
+    file (no header, or several ranges), or "invalid" when unsatisfiable.
+    """
+    if not header or "," in header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "invalid"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "invalid"
+    return start, end
+
+
+def range_matches(if_range, etag, mtime):
+    """If-Range holds either the ETag or a Last-Modified date; a stale one means "send everything"."""
+    if not if_range:
+        return True
+    if if_range.startswith(("W/", '"')):
+        return if_range == etag
+    modified = parse_http_date_safe(if_range)
+    return modified is not None and modified >= mtime
+
+
+def iter_file(path, start, length):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def sendfile_response(book, path):
+    """Hand the transfer to the web server when PDF_BOOK_SENDFILE is configured, else None."""
+    mode = getattr(settings, "PDF_BOOK_SENDFILE", "")
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type="application/pdf")
+        response["X-Accel-Redirect"] = getattr(settings, "PDF_BOOK_ACCEL_PREFIX", "/protected-media/") + book.pdf.name
+        return response
+    if mode == "x-sendfile":
+        response = HttpResponse(content_type="application/pdf")
+        response["X-Sendfile"] = path
+        return response
+    return None
+
+
+def file_response(request, book):
+    """
+    The book's PDF with ETag/Last-Modified validation, single-range support
+    and optional web server offload. Storages without local files redirect to
+    the file URL.
+    """
+    path, size, mtime = file_stat(book)
+    if path is None:
+        return HttpResponseRedirect(book.pdf.url)
+
+    etag = f'"{file_hash(path, size, mtime)}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if not_modified is not None:
+        return not_modified
+
+    response = sendfile_response(book, path)
+    if response is None:
+        byte_range = parse_range(request.headers.get("Range"), size)
+        if byte_range is not None and not range_matches(request.headers.get("If-Range"), etag, mtime):
+            byte_range = None
+        if byte_range == "invalid":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range is None:
+            response = StreamingHttpResponse(iter_file(path, 0, size), content_type="application/pdf")
+            response["Content-Length"] = str(size)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(iter_file(path, start, end - start + 1), status=206, content_type="application/pdf")
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = formatdate(mtime, usegmt=True)
+    response["Cache-Control"] = "private, max-age=3600"
+    response["Content-Disposition"] = f'inline; filename="{os.path.basename(book.pdf.name)}"'
+    return response
+
+
+def render_first_page(path):
+    """PNG bytes of the first page, via PyMuPDF or poppler's pdftoppm, whichever is installed; None otherwise."""
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+    if fitz is not None:
+        with fitz.open(path) as document:
+            page = document[0]
+            zoom = THUMBNAIL_WIDTH / page.rect.width
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, "thumb")
+        subprocess.run([pdftoppm, "-png", "-singlefile", "-f", "1", "-l", "1", "-scale-to-x", str(THUMBNAIL_WIDTH), "-scale-to-y", "-1", path, target], check=True, timeout=30)
+        with open(f"{target}.png", "rb") as handle:
+            return handle.read()
+
+
+def get_thumbnail(book):
+    """
+    (storage name, etag) of the book's first-page thumbnail, rendered on first
+    request and stored under the file's content hash, so re-uploads of the
+    same PDF share it. (None, None) when no renderer is available.
+    """
+    path, size, mtime = file_stat(book)
+    if path is None:
+        return None, None
+    digest = file_hash(path, size, mtime)
+    name = f"{getattr(settings, 'PDF_THUMBNAIL_DIR', 'pdf_thumbnails')}/{digest[:2]}/{digest}.png"
+    if not default_storage.exists(name):
+        try:
+            content = render_first_page(path)
+        except (OSError, RuntimeError, subprocess.SubprocessError, ValueError, IndexError):
+            content = None
+        if content is None:
+            return None, None
+        default_storage.save(name, ContentFile(content))
+    return name, f'"{digest}-thumb"'
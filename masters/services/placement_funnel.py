@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from admission.models import Admission
+from masters.models import PlacementHistory
+
+ELIGIBLE_STATUSES = ("completed", "internship", "placed")
+FUNNEL_STAGES = (
+    ("interviewed", "Interviewed", Q()),
+    ("attended", "Attended", Q(attended_status="true")),
+    ("selected", "Selected", Q(interview_status="accepted")),
+    ("joined", "Joined", Q(joining_status="true")),
+)
+CACHE_TIMEOUT = 60 * 10
+VERSION_KEY = "placement_funnel_version"
+
+
+def with_placement_stats(queryset):
+    """
+    Annotate admissions with their placement history counts (one grouped
+    join) and the latest company interviewed with, so rows never query
+    placementhistory_set themselves.
+    """
+    latest = PlacementHistory.objects.filter(student=OuterRef("pk")).order_by("-interview_date", "-created")
+    return queryset.annotate(
+        placement_interviews=Count("placementhistory"),
+        placement_attended=Count("placementhistory", filter=Q(placementhistory__attended_status="true")),
+        placement_joined=Count("placementhistory", filter=Q(placementhistory__joining_status="true")),
+        placement_latest_company=Subquery(latest.values("company_name")[:1]),
+    )
+
+
+def eligible_students(branch_id=None, course_id=None, batch_id=None, status=None):
+    students = Admission.objects.filter(stage_status=status) if status else Admission.objects.filter(stage_status__in=ELIGIBLE_STATUSES)
+    if branch_id:
+        students = students.filter(branch_id=branch_id)
+    if course_id:
+        students = students.filter(course_id=course_id)
+    if batch_id:
+        students = students.filter(batch_id=batch_id)
+    return students
+
+
+def build_funnel(branch_id=None, course_id=None, batch_id=None, status=None):
+    """
+    Eligible students and how many reached each placement stage, with the
+    conversion from the previous stage and from eligible. Two queries: the
+    eligible count and one aggregate of distinct students per stage.
+    """
+    students = eligible_students(branch_id, course_id, batch_id, status)
+    eligible = students.count()
+    reached = PlacementHistory.objects.filter(student__in=students.values("pk")).aggregate(
+        **{key: Count("student", distinct=True, filter=condition) for key, _label, condition in FUNNEL_STAGES}
+    )
+
+    stages = []
+    previous = eligible
+    for key, label, _condition in FUNNEL_STAGES:
+        count = reached[key] or 0
+        stages.append({
+            "key": key,
+            "label": label,
+            "count": count,
+            "conversion": round(count / previous * 100, 1) if previous else 0.0,
+            "of_eligible": round(count / eligible * 100, 1) if eligible else 0.0,
+        })
+        previous = count
+    return {"eligible": eligible, "stages": stages}
+
+
+def get_funnel(branch_id=None, course_id=None, batch_id=None, status=None):
+    """Cached build_funnel per filter combination, dropped whenever placement history changes."""
+    version = cache.get(VERSION_KEY, 0)
+    key = f"placement_funnel:{branch_id or 'all'}:{course_id or 'all'}:{batch_id or 'all'}:{status or 'eligible'}:v{version}"
+    funnel = cache.get(key)
+    if funnel is None:
+        funnel = build_funnel(branch_id, course_id, batch_id, status)
+        cache.set(key, funnel, CACHE_TIMEOUT)
+    return funnel
+
+
+def invalidate_placement_funnel():
+    if cache.add(VERSION_KEY, 1, None):
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
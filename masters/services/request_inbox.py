@@ -0,0 +1,67 @@
+from django.db.models import Count, Exists, OuterRef, Q
+
+from masters.models import RequestSubmission, RequestSubmissionStatusHistory
+
+INBOX_STATUSES = ("approved", "rejected", "pending", "processing")
+
+
+def record_transition(history):
+    """Copy a newly recorded workflow step onto its submission with one UPDATE."""
+    state = history.workflow_state()
+    RequestSubmission.objects.filter(pk=history.submission_id).update(**state)
+    if RequestSubmissionStatusHistory.submission.is_cached(history):
+        for field, value in state.items():
+            setattr(history.submission, field, value)
+
+
+def inbox(user, status=None, exclude_own=False, queryset=None):
+    """
+    Submissions currently waiting on the user's usertype, latest step first.
+    One lookup on the (current_usertype, is_active, last_transition_at) index.
+    Branch staff only see their own requests; exclude_own hides requests
+    other users created themselves. queryset narrows the base set (e.g. a
+    list view's branch and search filters).
+    """
+    submissions = RequestSubmission.objects.all() if queryset is None else queryset
+    if not getattr(user, "usertype", None):
+        return submissions.none()
+    submissions = submissions.filter(current_usertype=user.usertype, is_active=True)
+    if user.usertype == "branch_staff":
+        submissions = submissions.filter(creator=user)
+    elif exclude_own:
+        submissions = submissions.exclude(creator=user)
+    if status in INBOX_STATUSES:
+        submissions = submissions.filter(status=status)
+    return submissions.order_by("-last_transition_at", "-created")
+
+
+def inbox_counts(user, exclude_own=False):
+    """{status: count} of the user's inbox plus a 'total', in one grouped query."""
+    counts = dict(inbox(user, exclude_own=exclude_own).order_by().values_list("status").annotate(count=Count("id")))
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def involved(queryset, employee):
+    """
+    Submissions that were ever routed to the employee's usertype or that the
+    employee acted on, as EXISTS filters rather than a join plus DISTINCT.
+    """
+    history = RequestSubmissionStatusHistory.objects.filter(submission=OuterRef("pk"))
+    return queryset.filter(
+        Q(Exists(history.filter(next_usertype=employee.user.usertype))) | Q(Exists(history.filter(submitted_users=employee)))
+    )
+
+
+def inbox_item(submission):
+    return {
+        "id": submission.pk,
+        "request_id": submission.request_id,
+        "title": submission.title,
+        "status": submission.status,
+        "branch": str(submission.branch) if submission.branch_id else None,
+        "last_actor": str(submission.last_actor) if submission.last_actor_id else None,
+        "last_actor_usertype": submission.last_actor_usertype,
+        "last_transition_at": submission.last_transition_at.isoformat() if submission.last_transition_at else None,
+        "url": str(submission.get_absolute_url()),
+    }
@@ -0,0 +1,129 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from admission.models import Admission
+from masters.models import BatchSyllabusStatus
+
+CACHE_TIMEOUT = 60 * 10
+
+
+def _cache_key(course_id):
+    return f"syllabus_progress:{course_id}"
+
+
+def invalidate_syllabus_progress(course_id):
+    cache.delete(_cache_key(course_id))
+
+
+def _branch(branch):
+    return {"id": branch.id, "name": branch.name} if branch else None
+
+
+def build_course_progress(course_id):
+    """
+    The course's enrolled students (active admissions in a batch of the
+    course) and, per topic, the set of (user_id, batch_id) pairs that marked
+    it completed. Two queries for the whole course; plain values only so the
+    result can be cached.
+    """
+    admissions = (
+        Admission.objects.filter(course_id=course_id, batch__course_id=course_id, is_active=True)
+        .select_related("user__branch", "batch__branch", "course")
+        .order_by("batch_id", "pk")
+    )
+    students = []
+    batches = {}
+    for admission in admissions:
+        user = admission.user
+        batch = admission.batch
+        if batch.pk not in batches:
+            batches[batch.pk] = {"id": batch.pk, "batch_name": batch.batch_name, "branch": _branch(batch.branch)}
+        students.append({
+            "key": (user.pk, batch.pk) if user else None,
+            "batch": {"id": batch.pk, "batch_name": batch.batch_name},
+            "user": {
+                "id": user.pk,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "full_name": user.get_full_name(),
+                "branch": _branch(user.branch),
+            } if user else {
+                "id": None,
+                "first_name": "Unknown",
+                "last_name": "Student",
+                "full_name": "Unknown Student",
+                "branch": None,
+            },
+            "branch_active": bool(user and user.branch and user.branch.is_active),
+            "course": admission.course.name if admission.course else "",
+            "admission_number": admission.admission_number,
+        })
+
+    completed = defaultdict(set)
+    statuses = BatchSyllabusStatus.objects.filter(syllabus__syllabus_master__course_id=course_id, status="completed").values_list("syllabus_id", "user_id", "batch_id")
+    for syllabus_id, user_id, batch_id in statuses:
+        completed[syllabus_id].add((user_id, batch_id))
+
+    return {"students": students, "batches": batches, "completed": dict(completed)}
+
+
+def get_course_progress(course_id):
+    """Cached build_course_progress; dropped by update_syllabus_status."""
+    key = _cache_key(course_id)
+    progress = cache.get(key)
+    if progress is None:
+        progress = build_course_progress(course_id)
+        cache.set(key, progress, CACHE_TIMEOUT)
+    return progress
+
+
+def topic_progress(progress, syllabus_id):
+    """
+    Completed/pending students and batches of one topic, in the shape the
+    syllabus report renders. A student counts as completed when their own
+    (user, batch) pair is in the topic's completed set.
+    """
+    done = progress["completed"].get(syllabus_id, set())
+    completed_students, pending_students = [], []
+    per_batch = defaultdict(lambda: [0, 0])
+    for student in progress["students"]:
+        is_done = student["key"] in done
+        row = dict(student, status="completed" if is_done else "pending")
+        del row["key"], row["branch_active"]
+        (completed_students if is_done else pending_students).append(row)
+        counts = per_batch[student["batch"]["id"]]
+        counts[0] += 1
+        counts[1] += is_done
+
+    completed_batches, pending_batches = [], []
+    for batch_id, (total, done_count) in per_batch.items():
+        batch = progress["batches"][batch_id]
+        completion_percentage = round(done_count / total * 100, 1)
+        batch_data = {
+            "batch": {"id": batch["id"], "batch_name": batch["batch_name"]},
+            "branch": batch["branch"],
+            "total_students": total,
+            "completed_students": done_count,
+            "pending_students": total - done_count,
+            "completion_percentage": completion_percentage,
+        }
+        (completed_batches if done_count == total else pending_batches).append(batch_data)
+
+    return {
+        "id": syllabus_id,
+        "completed_students": completed_students,
+        "pending_students": pending_students,
+        "completed_batches": completed_batches,
+        "pending_batches": pending_batches,
+    }
+
+
+def filter_options(progress):
+    """Branches (active, of enrolled students) and batches for the report's global filters."""
+    branches = {}
+    for student in progress["students"]:
+        if student["branch_active"]:
+            branch = student["user"]["branch"]
+            branches[branch["id"]] = branch
+    return list(branches.values()), list(progress["batches"].values())
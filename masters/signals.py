@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BranchActivity, PlacementHistory, RequestSubmissionStatusHistory
+from .services.activity_points import invalidate_lifetime_totals
+from .services.placement_funnel import invalidate_placement_funnel
+from .services.request_inbox import record_transition
+
+
+@receiver(post_save, sender=BranchActivity)
+@receiver(post_delete, sender=BranchActivity)
+def refresh_activity_lifetime_totals(sender, **kwargs):
+    # Dropped rather than patched: concurrent saves would race on one cached dict
+    invalidate_lifetime_totals()
+
+
+@receiver(post_save, sender=RequestSubmissionStatusHistory)
+def update_request_workflow_state(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        record_transition(instance)
+
+
+@receiver(post_save, sender=PlacementHistory)
+@receiver(post_delete, sender=PlacementHistory)
+def refresh_placement_funnel(sender, **kwargs):
+    invalidate_placement_funnel()
@@ -1,5 +1,5 @@
 from django.urls import reverse_lazy
-from core.base import BaseTable
+from core.base import BaseTable, CustomBaseTable
 from django.utils.html import format_html
 from django_tables2 import columns
 import django_tables2 as tables
@@ -107,7 +107,7 @@ class PdfBookTable(BaseTable):
     action = columns.TemplateColumn(
         """
         <div class="btn-group">
-            <a href="{{ record.pdf.url }}" class="btn btn-sm btn-light btn-outline-info">OPEN</a>
+            <a href="{{ record.get_file_url }}" class="btn btn-sm btn-light btn-outline-info">OPEN</a>
         </div>
         """,
         orderable=False,
@@ -468,7 +468,8 @@ class MyRequestSubmissionTable(BaseTable):
         attrs = {"class": "table key-buttons border-bottom"}
 
 
-class LeaveRequestTable(BaseTable):
+class LeaveRequestTable(CustomBaseTable):
+    created = columns.DateTimeColumn(verbose_name="Created At", format="d/m/Y g:i A")
     action = columns.TemplateColumn(
         """
         <div class="d-flex text-start">
@@ -495,10 +496,11 @@ class LeaveRequestTable(BaseTable):
         orderable=False,
     )
 
-    class Meta(BaseTable.Meta):
+    class Meta:
         model = LeaveRequest
         fields = ("student", "student__branch", "student__course", "subject", "start_date", "end_date", "status", "created")
-        attrs = {"class": "table table-striped table-bordered"}
+        sequence = ("selection", "...", "action")
+        attrs = {"class": "table table-striped table-bordered", "id": "selectable-table"}
 
     def render_status(self, value, record=None):
         key = (value or "").strip().lower()
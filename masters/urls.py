@@ -8,6 +8,7 @@ urlpatterns = [
     #ajax 
     path('syllabus/update-status/', views.update_syllabus_status, name='syllabus_status_update'),
     path('leave_request/<int:pk>/status/', views.leave_request_status_update, name='leave_request_status_update'),
+    path('leave_request/bulk-status/', views.LeaveRequestBulkStatusView.as_view(), name='leave_request_bulk_status'),
     path('attendance/auto_mark_holiday/', views.auto_mark_holiday_api, name='auto_mark_holiday_api'),
     path('api/notifications/mark-read/<int:update_id>/', views.mark_notification_read, name='mark_notification_read'),
     path('api/notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
@@ -38,6 +39,8 @@ urlpatterns = [
     
     #Pdf List
     path("PDF/list/", views.PDFBookListView.as_view(), name="pdf_book_list"),
+    path("PDF/<str:pk>/file/", views.PdfBookFileView.as_view(), name="pdf_book_file"),
+    path("PDF/<str:pk>/thumbnail/", views.PdfBookThumbnailView.as_view(), name="pdf_book_thumbnail"),
     # path("PDF/<str:pk>/detail/", views.PDFBookDetailView.as_view(), name="pdf_book_detail"),
     
     #Complaint
@@ -125,6 +128,7 @@ urlpatterns = [
     path("request-submission/", views.RequestSubmissionListView.as_view(), name="request_submission_list"),
     path("my-request-submission/", views.MyRequestSubmissionListView.as_view(), name="my_request_submission_list"),
     path("shared-requests/", views.SharedRequestsListView.as_view(), name="shared_requests_list"),
+    path("api/request-inbox/", views.RequestInboxAPI.as_view(), name="request_inbox_api"),
     path("request-submission/<str:pk>/", views.RequestSubmissionDetailView.as_view(), name="request_submission_detail"),
     path("new/request-submission/", views.RequestSubmissionCreateView.as_view(), name="request_submission_create"),
     path("request-submission/<str:pk>/update/", views.RequestStatusUpdateView.as_view(), name="request_submission_update"),
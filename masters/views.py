@@ -15,6 +15,7 @@ from datetime import datetime, timedelta
 from urllib.parse import urlencode
 from reportlab.pdfgen import canvas
 from core.pdfview import PDFView
+from core.pdf_service import ENGINE_WEASYPRINT, get_or_render_pdf
 from django.views.generic.base import ContextMixin
 from dateutil.relativedelta import relativedelta
 from django.views.generic.edit import CreateView
@@ -29,7 +30,10 @@ from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import redirect, render
 from django.contrib import messages
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.utils.cache import get_conditional_response
 from django.forms import HiddenInput, MultipleChoiceField, MultipleHiddenInput, formset_factory, inlineformset_factory, model_to_dict
 
 from django.db import IntegrityError
@@ -38,6 +42,13 @@ from django.db import transaction
 from django.urls import reverse_lazy
 from core import mixins
 from admission.models import Admission, Attendance, AttendanceRegister
+from admission.services.attendance_matrix import invalidate_attendance_matrix
+from admission.services.student_profile import invalidate_student_profile
+from .services import feedback_report
+from .services.activity_points import build_pivot
+from .services import pdf_delivery, placement_funnel, request_inbox
+from .services.leave_index import DECISIONS, decide_leaves, invalidate_leave_views, mark_leave_absences
+from .services.syllabus_progress import filter_options, get_course_progress, invalidate_syllabus_progress, topic_progress
 from employees.models import Employee
 from core.choices import SYLLABUS_MONTH_CHOICE, USERTYPE_CHOICES, USERTYPE_FLOW_CHOICES, FEEDBACK_TYPE_CHOICES
 from branches.models import Branch
@@ -302,6 +313,8 @@ def update_syllabus_status(request):
         )
         status_obj.status = "completed"
         status_obj.save()
+        if syllabus.syllabus_master_id:
+            invalidate_syllabus_progress(syllabus.syllabus_master.course_id)
 
         return JsonResponse({"success": True})
 
@@ -325,42 +338,9 @@ def leave_request_status_update(request, pk):
         if status not in ["approved", "rejected"]:
             return JsonResponse({"success": False, "error": "Invalid status"})
 
-        # ✅ Update leave request status
-        leave.status = status
-        leave.approved_by = getattr(request.user, "employee", None)
-        leave.approved_date = timezone.now()
-        leave.save()
-
-        student = leave.student
-        start_date = leave.start_date
-        end_date = leave.end_date
-        current_date = start_date
-
-        while current_date <= end_date:
-            try:
-                register, _ = AttendanceRegister.objects.get_or_create(
-                    branch=student.branch,
-                    batch=student.batch,
-                    course=student.course,
-                    date=current_date,
-                )
-
-                # ✅ Mark attendance differently for approved and rejected
-                if status == "approved":
-                    Attendance.objects.update_or_create(
-                        student=student,
-                        register=register,
-                        defaults={"status": "Absent"},
-                    )
-                elif status == "rejected":
-                    Attendance.objects.update_or_create(
-                        student=student,
-                        register=register,
-                        defaults={"status": "Absent"},  # still absent, but...
-                    )
-            except Exception as e:
-                print(f"Error updating attendance for {student.fullname()} on {current_date}: {e}")
-            current_date += timedelta(days=1)
+        # Marks the leave days in attendance as well
+        user = request.user if request.user.is_authenticated else None
+        decide_leaves([leave], status, approver=getattr(user, "employee", None), user=user)
 
         return JsonResponse({"success": True})
 
@@ -369,6 +349,32 @@ def leave_request_status_update(request, pk):
         return JsonResponse({"success": False, "error": str(e)})
 
 
+class LeaveRequestBulkStatusView(mixins.CustomLoginRequiredMixin, View):
+    """Approve or reject many leave requests at once: POST {"ids": [...], "status": "approved" | "rejected"}."""
+    permissions = ("admin_staff", "mentor", "ceo", "cfo", "coo", "teacher")
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"success": False, "message": "Invalid JSON data"}, status=400)
+        if not isinstance(data, dict) or not isinstance(data.get("ids"), list):
+            return JsonResponse({"success": False, "message": "Expected an object with a list of ids."}, status=400)
+
+        status = data.get("status")
+        ids = [pk for pk in data["ids"] if str(pk).isdigit()]
+        if status not in DECISIONS or not ids:
+            return JsonResponse({"success": False, "message": "Select leave requests and a status (approved or rejected)."}, status=400)
+
+        leaves = LeaveRequest.objects.filter(pk__in=ids, is_active=True)
+        if request.user.usertype == "teacher":
+            employee = request.user.employee
+            leaves = leaves.filter(student__course=employee.course, student__branch=employee.branch)
+
+        updated = decide_leaves(leaves, status, approver=getattr(request.user, "employee", None), user=request.user)
+        return JsonResponse({"success": True, "updated": len(updated), "message": f"{len(updated)} leave request(s) {status}."})
+
+
 @csrf_exempt
 def auto_mark_holiday_api(request):
     """
@@ -455,6 +461,7 @@ def auto_mark_holiday_api(request):
                     # Bulk create attendance records
                     if attendance_objects:
                         Attendance.objects.bulk_create(attendance_objects)
+                        invalidate_student_profile(*(attendance.student_id for attendance in attendance_objects))
                         total_students += len(attendance_objects)
                         total_registers += 1
 
@@ -763,10 +770,11 @@ class PDFBookResourceDetailView(mixins.HybridDetailView):
         context = super().get_context_data(**kwargs)
         resource = self.get_object()
 
-        pdfbook_entries = PdfBook.objects.filter(resource=resource, is_active=True)
+        pdfbook_entries = PdfBook.objects.filter(resource=resource, is_active=True).order_by("name")
+        page = Paginator(pdfbook_entries, 25).get_page(self.request.GET.get("page"))
 
-        context["customer_table"] = tables.PDFBookResourceTable(pdfbook_entries)
-        context["pdfbook_entries"] = pdfbook_entries 
+        context["page_obj"] = page
+        context["pdfbook_entries"] = page.object_list
         return context
 
 
@@ -907,6 +915,37 @@ class PDFBookListView(mixins.HybridListView):
         return context
     
 
+class PdfBookFileView(mixins.CustomLoginRequiredMixin, View):
+    """Protected PDF delivery with range requests, conditional GETs and optional X-Sendfile/X-Accel-Redirect."""
+    permissions = ("superadmin", "partner", 'branch_staff', "admin_staff", 'teacher', "student", "ceo","cfo","coo","hr","cmo", "mentor")
+
+    def get(self, request, pk):
+        book = get_object_or_404(PdfBook.objects.select_related("resource"), pk=pk, is_active=True)
+        if not pdf_delivery.can_access(request.user, book):
+            return self.handle_no_permission()
+        return pdf_delivery.file_response(request, book)
+
+
+class PdfBookThumbnailView(mixins.CustomLoginRequiredMixin, View):
+    """First-page PNG of a book, rendered once per file content."""
+    permissions = ("superadmin", "partner", 'branch_staff', "admin_staff", 'teacher', "student", "ceo","cfo","coo","hr","cmo", "mentor")
+
+    def get(self, request, pk):
+        book = get_object_or_404(PdfBook.objects.select_related("resource"), pk=pk, is_active=True)
+        if not pdf_delivery.can_access(request.user, book):
+            return self.handle_no_permission()
+        name, etag = pdf_delivery.get_thumbnail(book)
+        if name is None:
+            raise Http404("No thumbnail available")
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = FileResponse(default_storage.open(name, "rb"), content_type="image/png")
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=604800"
+        return response
+
+
 class CourseSyllabusMasterView(mixins.HybridListView):
     model = Course
     table_class = tables.CourseSyllabusMasterTable
@@ -1198,12 +1237,7 @@ class SyllabusReportView(mixins.HybridListView):
         master_id = self.kwargs.get("pk")
         if master_id:
             queryset = queryset.filter(syllabus_master_id=master_id)
-        # Prefetch statuses and related user/batch
-        queryset = queryset.prefetch_related(
-            'batchsyllabusstatus_set__batch',
-            'batchsyllabusstatus_set__user',
-        )
-        return queryset
+        return queryset.select_related("syllabus_master__course")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1225,271 +1259,37 @@ class SyllabusReportView(mixins.HybridListView):
             context["table"] = {"data": syllabus_list}
             return context
 
-        # Collect all unique branches and batches for global filter
-        all_branches_set = set()
-        all_batches_set = set()
-
+        # Per-topic students and batches are loaded on demand (get_syllabus_details);
+        # the page itself only needs the topics and the global filter options.
+        all_branches = {}
+        all_batches = {}
         for syllabus in context["table"].data:
-            statuses = BatchSyllabusStatus.objects.filter(
-                syllabus=syllabus
-            ).select_related("batch", "user")
-
-            completed_students, pending_students = [], []
-            completed_batches, pending_batches = [], []
-
-            # --- COURSE from syllabus master ---
             course = syllabus.syllabus_master.course
-
-            # --- STUDENTS ---
-            all_batches = Batch.objects.filter(course=course)
-            all_students = Admission.objects.filter(
-                batch__in=all_batches,
-                course=course,
-                is_active=True,
-            ).select_related("user", "batch", "course")
-
-            for student in all_students:
-                if not student.user:  # skip admissions without user
-                    continue
-
-                # Add to global branches and batches
-                if student.user.branch and student.user.branch.is_active:
-                    all_branches_set.add(student.user.branch)
-                if student.batch:
-                    all_batches_set.add(student.batch)
-
-                status_obj = statuses.filter(user=student.user, batch=student.batch).first()
-                if status_obj and status_obj.status == "completed":
-                    completed_students.append({
-                        "syllabus": syllabus,
-                        "batch": student.batch,
-                        "user": student.user,
-                        "course": student.course,
-                        "status": "completed"
-                    })
-                else:
-                    pending_students.append({
-                        "syllabus": syllabus,
-                        "batch": student.batch,
-                        "user": student.user,
-                        "course": student.course,
-                        "status": "pending"
-                    })
-
-            # --- BATCHES ---
-            for batch in all_batches:
-                # Get all students in this batch
-                batch_students = Admission.objects.filter(
-                    batch=batch,
-                    course=course,
-                    is_active=True,
-                ).select_related("user").count()
-
-                if batch_students == 0:
-                    continue  # Skip batches with no students
-
-                # Get completed students count for this batch
-                completed_count = statuses.filter(
-                    batch=batch,
-                    status="completed"
-                ).count()
-
-                # Get pending students count for this batch
-                pending_count = batch_students - completed_count
-
-                # Calculate completion percentage
-                completion_percentage = (completed_count / batch_students * 100) if batch_students > 0 else 0
-
-                batch_data = {
-                    "batch": batch,
-                    "batch_name": batch.batch_name,
-                    "branch": batch.branch,
-                    "total_students": batch_students,
-                    "completed_students": completed_count,
-                    "pending_students": pending_count,
-                    "completion_percentage": round(completion_percentage, 1),
-                }
-
-                # Determine if batch is completed or pending
-                if completion_percentage == 100:
-                    completed_batches.append(batch_data)
-                else:
-                    pending_batches.append(batch_data)
-
-            # --- BRANCHES & BATCHES for filtering ---
-            all_users = [
-                s["user"] for s in completed_students + pending_students
-                if s["user"]
-            ]
-
-            branches = sorted(
-                {u.branch for u in all_users if hasattr(u, "branch") and u.branch and u.branch.is_active},
-                key=lambda b: b.name
-            )
-
-            batches = sorted(
-                {
-                    s["batch"] for s in completed_students + pending_students
-                    if s["batch"]
-                },
-                key=lambda b: b.id
-            )
+            if course and course.pk not in all_batches:
+                branches, batches = filter_options(get_course_progress(course.pk))
+                all_branches.update((branch["id"], branch) for branch in branches)
+                all_batches[course.pk] = batches
 
             syllabus_list.append({
                 "id": syllabus.id,
                 "order_id": syllabus.order_id,
                 "title": syllabus.title,
                 "course": course,
-                "completed_students": completed_students,
-                "pending_students": pending_students,
-                "completed_batches": completed_batches,
-                "pending_batches": pending_batches,
-                "branches": branches,
-                "batches": batches,
                 "status_choices": status_choices,
             })
 
         # Add global filter data to context
-        context["all_branches"] = sorted(all_branches_set, key=lambda b: b.name)
-        context["all_batches"] = sorted(all_batches_set, key=lambda b: b.batch_name)
+        context["all_branches"] = sorted(all_branches.values(), key=lambda b: b["name"])
+        context["all_batches"] = sorted((batch for batches in all_batches.values() for batch in batches), key=lambda b: b["batch_name"])
         context["table"] = {"data": syllabus_list}
         return context
 
     def get_syllabus_details(self, syllabus_id):
         """AJAX endpoint to get syllabus details when accordion is opened"""
-        try:
-            syllabus = Syllabus.objects.prefetch_related(
-                'batchsyllabusstatus_set__batch',
-                'batchsyllabusstatus_set__user',
-            ).get(id=syllabus_id)
-            
-            statuses = BatchSyllabusStatus.objects.filter(
-                syllabus=syllabus
-            ).select_related("batch", "user")
-
-            completed_students, pending_students = [], []
-            completed_batches, pending_batches = [], []
-
-            # --- COURSE from syllabus master ---
-            course = syllabus.syllabus_master.course
-
-            # --- STUDENTS ---
-            all_batches = Batch.objects.filter(course=course)
-            all_students = Admission.objects.filter(
-                batch__in=all_batches,
-                course=course,
-                is_active=True,
-            ).select_related("user", "batch", "course").prefetch_related("user__branch")
-
-            for student in all_students:
-                status_obj = statuses.filter(user=student.user, batch=student.batch).first()
-                if status_obj and status_obj.status == "completed":
-                    completed_students.append({
-                        "batch": {
-                            "id": student.batch.id,
-                            "batch_name": student.batch.batch_name
-                        } if student.batch else None,
-                        "user": {
-                            "id": student.user.id,
-                            "first_name": student.user.first_name,
-                            "last_name": student.user.last_name,
-                            "full_name": student.user.get_full_name(),
-                            "branch": {
-                                "id": student.user.branch.id,
-                                "name": student.user.branch.name
-                            } if student.user and student.user.branch else None
-                        } if student.user else {
-                            "id": None,
-                            "first_name": "Unknown",
-                            "last_name": "Student",
-                            "full_name": "Unknown Student",
-                            "branch": None
-                        },
-                        "course": student.course.name if student.course else "",
-                        "admission_number": student.admission_number,
-                        "status": "completed"
-                    })
-                else:
-                    pending_students.append({
-                        "batch": {
-                            "id": student.batch.id,
-                            "batch_name": student.batch.batch_name
-                        } if student.batch else None,
-                        "user": {
-                            "id": student.user.id,
-                            "first_name": student.user.first_name,
-                            "last_name": student.user.last_name,
-                            "full_name": student.user.get_full_name(),
-                            "branch": {
-                                "id": student.user.branch.id,
-                                "name": student.user.branch.name
-                            } if student.user and student.user.branch else None
-                        } if student.user else {
-                            "id": None,
-                            "first_name": "Unknown",
-                            "last_name": "Student",
-                            "full_name": "Unknown Student",
-                            "branch": None
-                        },
-                        "course": student.course.name if student.course else "",
-                        "admission_number": student.admission_number,
-                        "status": "pending"
-                    })
-
-            # --- BATCHES ---
-            for batch in all_batches:
-                # Get all students in this batch
-                batch_students = Admission.objects.filter(
-                    batch=batch,
-                    course=course,
-                    is_active=True,
-                ).select_related("user").count()
-
-                if batch_students == 0:
-                    continue  # Skip batches with no students
-
-                # Get completed students count for this batch
-                completed_count = statuses.filter(
-                    batch=batch,
-                    status="completed"
-                ).count()
-
-                # Get pending students count for this batch
-                pending_count = batch_students - completed_count
-
-                # Calculate completion percentage
-                completion_percentage = (completed_count / batch_students * 100) if batch_students > 0 else 0
-
-                batch_data = {
-                    "batch": {
-                        "id": batch.id,
-                        "batch_name": batch.batch_name
-                    },
-                    "branch": {
-                        "id": batch.branch.id,
-                        "name": batch.branch.name
-                    } if batch.branch else None,
-                    "total_students": batch_students,
-                    "completed_students": completed_count,
-                    "pending_students": pending_count,
-                    "completion_percentage": round(completion_percentage, 1),
-                }
-
-                # Determine if batch is completed or pending
-                if completion_percentage == 100:
-                    completed_batches.append(batch_data)
-                else:
-                    pending_batches.append(batch_data)
-
-            return {
-                "id": syllabus.id,
-                "completed_students": completed_students,
-                "pending_students": pending_students,
-                "completed_batches": completed_batches,
-                "pending_batches": pending_batches,
-            }
-        except Syllabus.DoesNotExist:
+        syllabus = Syllabus.objects.select_related("syllabus_master").filter(id=syllabus_id).first()
+        if not syllabus or not syllabus.syllabus_master or not syllabus.syllabus_master.course_id:
             return None
+        return topic_progress(get_course_progress(syllabus.syllabus_master.course_id), syllabus.pk)
 
     def dispatch(self, request, *args, **kwargs):
         # Handle AJAX request for syllabus details
@@ -2984,75 +2784,11 @@ class BranchActivityTableView(mixins.HybridTemplateView):
         activities = Activity.objects.filter(is_active=True).order_by('name')
         branches = Branch.objects.filter(is_active=True).order_by('name')
 
-        activity_matrix = []
-        for activity in activities:
-            row = {'activity': activity, 'branches': []}
-            for branch in branches:
-                branch_activity = BranchActivity.objects.filter(
-                    branch=branch,
-                    activity=activity,
-                    month=selected_month,
-                    is_active=True
-                ).first()
-
-                month_points = branch_activity.point if branch_activity else 0
-
-                total_points = BranchActivity.objects.filter(
-                    branch=branch,
-                    activity=activity,
-                    is_active=True
-                ).aggregate(total_points=Sum('point'))['total_points'] or 0
-
-                row['branches'].append({
-                    'branch': branch,
-                    'points': month_points,
-                    'total_points': total_points,
-                    'id': branch_activity.id if branch_activity else None,
-                    'is_highest': False 
-                })
-            activity_matrix.append(row)
-
-        for row in activity_matrix:
-            if row['branches']:
-                max_points = max(b['points'] for b in row['branches'])
-                for b in row['branches']:
-                    b['is_highest'] = (b['points'] == max_points and max_points > 0)
-
-        branch_totals = []
-        for branch in branches:
-            month_total = BranchActivity.objects.filter(
-                branch=branch,
-                month=selected_month,
-                is_active=True
-            ).aggregate(total_points=Sum('point'))['total_points'] or 0
-
-            overall_total = BranchActivity.objects.filter(
-                branch=branch,
-                is_active=True
-            ).aggregate(total_points=Sum('point'))['total_points'] or 0
-
-            branch_totals.append({
-                'branch': branch,
-                'month_total': month_total,
-                'overall_total': overall_total,
-                'is_highest': False 
-            })
-
-        leading_branch = None
-        if branch_totals:
-            max_month_total = max(b['month_total'] for b in branch_totals)
-            for b in branch_totals:
-                b['is_highest'] = (b['month_total'] == max_month_total and max_month_total > 0)
-
-            if max_month_total > 0:
-                leading_branch = max(branch_totals, key=lambda x: x['month_total'])
+        context.update(build_pivot(selected_month, activities, branches))
 
         context.update({
             'activities': activities,
             'branches': branches,
-            'activity_matrix': activity_matrix,
-            'branch_totals': branch_totals,
-            'leading_branch': leading_branch,
             'can_add': (
                 self.request.user.is_superuser or 
                 self.request.user.usertype in ["admin_staff", "ceo","cfo","coo","hr","cmo"]
@@ -3182,50 +2918,21 @@ class RequestSubmissionListView(mixins.HybridListView):
             return qs.none()
 
         assigned_only = self.request.GET.get('assigned', '').lower() == 'true'
+        status = self.request.GET.get("status", "").lower()
 
         if assigned_only:
-            latest_status_subquery = RequestSubmissionStatusHistory.objects.filter(
-                submission=OuterRef('pk')
-            ).order_by('-date')
-
-            qs = qs.annotate(
-                latest_next_usertype=Subquery(latest_status_subquery.values('next_usertype')[:1])
-            ).filter(
-                latest_next_usertype=usertype,
-                is_active=True
-            )
-
-            if usertype != "branch_staff":
-                qs = qs.exclude(creator=user_profile.user)
-
-            status = self.request.GET.get("status", "").lower()
-            if status in ["approved", "rejected", "pending", "processing"]:
-                qs = qs.filter(status=status)
-
-            return qs.distinct()
+            return request_inbox.inbox(user, status=status, exclude_own=True, queryset=qs)
 
         if usertype == "branch_staff":
             qs = qs.filter(creator=user_profile.user)
 
-            status = self.request.GET.get("status", "").lower()
             if status in ["approved", "rejected", "pending"]:
                 qs = qs.filter(status=status)
         else:
-            qs = qs.filter(
-                Q(status_history__next_usertype=usertype) |
-                Q(status_history__submitted_users=user_profile)
-            ).distinct().exclude(creator=user_profile.user)
+            qs = request_inbox.involved(qs, user_profile).exclude(creator=user_profile.user)
 
-            status = self.request.GET.get("status", "").lower()
             if status in ["approved", "rejected"]:
-                hr_to_branch_staff_ids = RequestSubmissionStatusHistory.objects.filter(
-                    usertype="hr",
-                    next_usertype="branch_staff"
-                ).values_list('submission_id', flat=True)
-                qs = qs.filter(
-                    id__in=hr_to_branch_staff_ids,
-                    status=status
-                ).distinct()
+                qs = qs.filter(returned_by_hr=True, status=status)
             elif status == "processing":
                 qs = qs.filter(status="processing")
 
@@ -3350,6 +3057,23 @@ class MyRequestSubmissionListView(mixins.HybridListView):
         return context
 
 
+class RequestInboxAPI(mixins.CustomLoginRequiredMixin, View):
+    """Requests waiting on the logged-in user's usertype, with counts per status, for dashboard widgets."""
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.GET.get("limit", 20)), 100))
+        except ValueError:
+            limit = 20
+        exclude_own = request.GET.get("exclude_own", "").lower() == "true"
+        submissions = request_inbox.inbox(request.user, status=request.GET.get("status", "").lower(), exclude_own=exclude_own)
+        return JsonResponse({
+            "success": True,
+            "counts": request_inbox.inbox_counts(request.user, exclude_own=exclude_own),
+            "results": [request_inbox.inbox_item(submission) for submission in submissions.select_related("branch", "last_actor")[:limit]],
+        })
+
+
 class RequestSubmissionDetailView(mixins.HybridDetailView):
     template_name = "masters/request_submission/request_submission_detail.html"
     model = RequestSubmission
@@ -3740,16 +3464,12 @@ def download_request_submission_pdf(request, pk):
         'masters/request_submission/pdf/request_submission_pdf.html',
         context
     )
-    html = HTML(string=html_string, base_url=request.build_absolute_uri('/'))
-
-    pdf_file = html.write_pdf(stylesheets=[
-        CSS(string='''
-            @page {
-                size: A4;
-                margin: 0mm;
-            }
-        ''')
-    ])
+    pdf_file = get_or_render_pdf(
+        html_string,
+        {"stylesheets": ["@page { size: A4; margin: 0mm; }"]},
+        engine=ENGINE_WEASYPRINT,
+        base_url=request.build_absolute_uri('/'),
+    )
 
     response = HttpResponse(pdf_file, content_type='application/pdf')
     response['Content-Disposition'] = 'inline; filename="request_submission.pdf"'
@@ -4056,38 +3776,8 @@ class LeaveRequestUpdateView(mixins.HybridUpdateView):
         response = super().form_valid(form)
 
         if form.instance.status.lower() == "approved":
-            student = form.instance.student
-            start_date = form.instance.start_date
-            end_date = form.instance.end_date
-
-            print(f"Approving leave for student: {student.fullname()}, from {start_date} to {end_date}")
-
-            current_date = start_date
-            while current_date <= end_date:
-                try:
-                    # Create or get AttendanceRegister
-                    register, created = AttendanceRegister.objects.get_or_create(
-                        branch=student.branch,
-                        batch=student.batch,
-                        date=current_date,
-                        course=student.course,
-                    )
-                    register.save() 
-                    print(f"AttendanceRegister for {current_date}: {'Created' if created else 'Exists'} | ID: {register.id}")
-
-                    # Create or update Attendance
-                    attendance, att_created = Attendance.objects.update_or_create(
-                        student=student,
-                        register=register,
-                        defaults={"status": "Absent"}
-                    )
-                    attendance.save() 
-                    print(f"Attendance for {student.fullname()} on {current_date}: {'Created' if att_created else 'Updated'} | ID: {attendance.id} | Status: {attendance.status}")
-
-                except Exception as e:
-                    print(f"Error marking attendance for {student.fullname()} on {current_date}: {e}")
-
-                current_date += timedelta(days=1)
+            mark_leave_absences([form.instance], self.request.user)
+            invalidate_leave_views([form.instance])
 
         return response
 
@@ -4673,13 +4363,16 @@ class FeedbackReportView(mixins.HybridListView):
         # Filters from GET
         branch_id = self.request.GET.get('branch')  # branch filter (optional)
         employee_type = self.request.GET.get('employee_type', 'all')  # 'faculty', 'fao', 'all' (default 'all')
+        month = feedback_report.month_start(self.request.GET.get('month'))  # 'YYYY-MM' (optional)
 
-        # Base feedback queryset filtered by branch (student's branch)
+        # Base feedback queryset filtered by branch (student's branch) and month
         feedback_qs = Feedback.objects.filter(is_active=True).select_related(
             'student', 'question', 'answer', 'student__branch', 'student__course'
         )
         if branch_id:
             feedback_qs = feedback_qs.filter(student__branch_id=branch_id)
+        if month:
+            feedback_qs = feedback_qs.filter(created__year=month.year, created__month=month.month)
 
         # Available branches and the dropdown options now reflect feedback type choices
         context['branches'] = Branch.objects.filter(is_active=True)
@@ -4691,24 +4384,30 @@ class FeedbackReportView(mixins.HybridListView):
         ]
         context['selected_branch'] = branch_id
         context['selected_employee_type'] = employee_type
-
-        # Overall stats (based on filtered feedback_qs)
-        total_feedbacks = feedback_qs.count()
-        total_students = feedback_qs.values('student').distinct().count()
-        overall_avg_rating = feedback_qs.aggregate(avg_rating=Avg('answer__answer_value'))['avg_rating'] or 0
+        context['selected_month'] = f"{month:%Y-%m}" if month else ""
 
         # Decide which sections to show
         show_teacher = employee_type in (None, '', 'all', 'faculty')
         show_fao = employee_type in (None, '', 'all', 'fao')
 
+        # Closed months come from the nightly summary table, everything else from grouped queries
+        if month and feedback_report.is_materialized(month):
+            figures = feedback_report.FeedbackFigures.from_summary(feedback_report.summary_rows(month, branch_id))
+        else:
+            figures = feedback_report.FeedbackFigures.live(feedback_qs, show_teacher, show_fao)
+
+        total_feedbacks = figures.overall['total_feedbacks']
+        total_students = figures.overall['total_students']
+        overall_avg_rating = figures.overall['avg_rating']
+
         # Compute stats (only compute what we'll show)
-        teacher_stats = self.get_teacher_stats(feedback_qs, branch_id) if show_teacher else []
-        fao_stats = self.get_fao_stats(feedback_qs, branch_id) if show_fao else []
+        teacher_stats = self.get_teacher_stats(figures, branch_id) if show_teacher else []
+        fao_stats = self.get_fao_stats(figures, branch_id) if show_fao else []
 
         staff_type_stats = self.get_staff_type_stats(teacher_stats, fao_stats, total_students)
         total_staff = len(teacher_stats) + len(fao_stats)
-        feedback_type_stats = self.get_feedback_type_stats(feedback_qs)
-        answer_distribution = self.get_answer_distribution(feedback_qs, total_feedbacks)
+        feedback_type_stats = figures.feedback_type_stats()
+        answer_distribution = figures.answer_distribution()
         recent_feedbacks = feedback_qs.order_by('-created')[:10]
 
         # Prepare JSON-ready chart data for JS
@@ -4760,132 +4459,51 @@ class FeedbackReportView(mixins.HybridListView):
             'fao_chart_data': fao_chart_data,
             'show_teacher': show_teacher,
             'show_fao': show_fao,
+            'stats_source': figures.source,
             'title': 'Staff Feedback Analytics Report',
             'is_feedback_report': True,
         })
 
         return context
 
-    def get_feedback_type_stats(self, feedback_qs):
-        type_data = feedback_qs.values('question__feedback_type').annotate(
-            total_feedbacks=Count('id'),
-            avg_rating=Avg('answer__answer_value')
-        ).order_by('question__feedback_type')
-
-        feedback_type_stats = []
-        for stat in type_data:
-            feedback_type_stats.append({
-                'type': stat['question__feedback_type'],
-                'total_feedbacks': stat['total_feedbacks'],
-                'avg_rating': stat['avg_rating'] or 0
+    def get_staff_stats(self, staff, figures, group, key):
+        stats = []
+        empty = feedback_report.with_average(feedback_report.empty_counts())
+        for employee in staff:
+            counts = figures.staff_counts(group, getattr(employee, key)) or empty
+            stats.append({
+                'employee': employee,
+                'name': employee.fullname() if hasattr(employee, 'fullname') else str(employee),
+                'total_feedbacks': counts['total_feedbacks'],
+                'total_students': counts['total_students'],
+                'avg_rating': counts['avg_rating'],
+                'rating_1': counts['rating_1'],
+                'rating_2': counts['rating_2'],
+                'rating_3': counts['rating_3'],
+                'rating_4': counts['rating_4'],
+                'rating_5': counts['rating_5'],
             })
-        return feedback_type_stats
-
-    def get_answer_distribution(self, feedback_qs, total_feedbacks):
-        answers_data = feedback_qs.values('answer__answer_value', 'answer__answer').annotate(count=Count('id')).order_by('answer__answer_value')
-        answer_distribution = []
-        for rating in range(1, 6):
-            rating_data = next((item for item in answers_data if item['answer__answer_value'] == rating), None)
-            if rating_data:
-                percentage = (rating_data['count'] / total_feedbacks * 100) if total_feedbacks > 0 else 0
-                answer_distribution.append({
-                    'value': rating,
-                    'answer': rating_data['answer__answer'],
-                    'count': rating_data['count'],
-                    'percentage': percentage
-                })
-            else:
-                answer_distribution.append({
-                    'value': rating,
-                    'answer': f'{rating} Star{"s" if rating > 1 else ""}',
-                    'count': 0,
-                    'percentage': 0.0
-                })
-        return answer_distribution
+        return stats
 
-    def get_teacher_stats(self, feedback_qs, branch_id):
+    def get_teacher_stats(self, figures, branch_id):
         """
         Teachers are determined by Employee with usertype 'teacher'.
         Feedback considered: question__feedback_type == 'faculty' and student.course == teacher.course
         """
-        teachers = Employee.objects.filter(user__usertype='teacher', is_active=True)
+        teachers = Employee.objects.filter(user__usertype='teacher', is_active=True).select_related('user', 'course', 'branch')
         if branch_id:
             teachers = teachers.filter(branch_id=branch_id)
+        return self.get_staff_stats(teachers, figures, 'course', 'course_id')
 
-        stats = []
-        for teacher in teachers:
-            teacher_feedback = feedback_qs.filter(
-                question__feedback_type='faculty',
-                student__course_id=teacher.course_id
-            )
-            # If you need teacher branch match, enable below:
-            # if teacher.branch_id:
-            #     teacher_feedback = teacher_feedback.filter(student__branch_id=teacher.branch_id)
-
-            agg = teacher_feedback.aggregate(
-                total_feedbacks=Count('id'),
-                total_students=Count('student', distinct=True),
-                avg_rating=Avg('answer__answer_value'),
-                rating_1=Count('id', filter=Q(answer__answer_value=1)),
-                rating_2=Count('id', filter=Q(answer__answer_value=2)),
-                rating_3=Count('id', filter=Q(answer__answer_value=3)),
-                rating_4=Count('id', filter=Q(answer__answer_value=4)),
-                rating_5=Count('id', filter=Q(answer__answer_value=5))
-            )
-
-            stats.append({
-                'employee': teacher,
-                'name': teacher.fullname() if hasattr(teacher, 'fullname') else str(teacher),
-                'total_feedbacks': agg['total_feedbacks'] or 0,
-                'total_students': agg['total_students'] or 0,
-                'avg_rating': agg['avg_rating'] or 0,
-                'rating_1': agg['rating_1'] or 0,
-                'rating_2': agg['rating_2'] or 0,
-                'rating_3': agg['rating_3'] or 0,
-                'rating_4': agg['rating_4'] or 0,
-                'rating_5': agg['rating_5'] or 0,
-            })
-        return stats
-
-    def get_fao_stats(self, feedback_qs, branch_id):
+    def get_fao_stats(self, figures, branch_id):
         """
         FAO staff usertype 'fao'.
         Feedback considered: question__feedback_type == 'fao' and student.branch == fao.branch
         """
-        fao_staff = Employee.objects.filter(user__usertype='fao', is_active=True)
+        fao_staff = Employee.objects.filter(user__usertype='fao', is_active=True).select_related('user', 'course', 'branch')
         if branch_id:
             fao_staff = fao_staff.filter(branch_id=branch_id)
-
-        stats = []
-        for fao in fao_staff:
-            fao_feedback = feedback_qs.filter(
-                question__feedback_type='fao',
-                student__branch_id=fao.branch_id
-            )
-            agg = fao_feedback.aggregate(
-                total_feedbacks=Count('id'),
-                total_students=Count('student', distinct=True),
-                avg_rating=Avg('answer__answer_value'),
-                rating_1=Count('id', filter=Q(answer__answer_value=1)),
-                rating_2=Count('id', filter=Q(answer__answer_value=2)),
-                rating_3=Count('id', filter=Q(answer__answer_value=3)),
-                rating_4=Count('id', filter=Q(answer__answer_value=4)),
-                rating_5=Count('id', filter=Q(answer__answer_value=5))
-            )
-
-            stats.append({
-                'employee': fao,
-                'name': fao.get_full_name() if hasattr(fao, 'get_full_name') else str(fao),
-                'total_feedbacks': agg['total_feedbacks'] or 0,
-                'total_students': agg['total_students'] or 0,
-                'avg_rating': agg['avg_rating'] or 0,
-                'rating_1': agg['rating_1'] or 0,
-                'rating_2': agg['rating_2'] or 0,
-                'rating_3': agg['rating_3'] or 0,
-                'rating_4': agg['rating_4'] or 0,
-                'rating_5': agg['rating_5'] or 0,
-            })
-        return stats
+        return self.get_staff_stats(fao_staff, figures, 'branch', 'branch_id')
 
     def get_staff_type_stats(self, teacher_stats, fao_stats, total_students):
         staff_type_stats = []
@@ -4966,7 +4584,7 @@ class PlacementReportView(mixins.HybridListView):
         if batch_id:
             queryset = queryset.filter(batch_id=batch_id)
 
-        return queryset
+        return placement_funnel.with_placement_stats(queryset)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4991,8 +4609,9 @@ class PlacementReportView(mixins.HybridListView):
                 str(user.employee.course.id) if user.employee.course else None
             )
 
-            branch_id = branch_id or context['teacher_branch_id']
-            course_id = course_id or context['teacher_course_id']
+            # get_queryset ignores the branch/course filters for teachers, so the funnel does too
+            branch_id = context['teacher_branch_id']
+            course_id = context['teacher_course_id']
 
         context['branches'] = Branch.objects.filter(is_active=True)
         context['courses'] = Course.objects.filter(is_active=True)
@@ -5021,6 +4640,8 @@ class PlacementReportView(mixins.HybridListView):
             stage_status__in=['completed', 'internship', 'placed']
         ).count()
 
+        context['funnel'] = placement_funnel.get_funnel(branch_id, course_id, batch_id, status)
+
         context['filters_applied'] = any(
             x in self.request.GET for x in ['branch', 'course', 'batch', 'status']
         )
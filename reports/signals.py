@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from admission.models import Admission, Attendance, AttendanceRegister, FeeReceipt, FeeStructure, PaymentMethod
+from admission.services.academic_statistics import apply_admission_change, invalidate_snapshot
+from admission.services.student_profile import invalidate_all_student_profiles, invalidate_student_profile
+from masters.models import Holiday, LeaveRequest, PlacementHistory
+
+STATISTICS_FIELDS = ("is_active", "stage_status", "branch_id", "course_id", "care_of_id")
+
+
+def loaded_statistics_key(instance):
+    """(known, key) for the admission as it was loaded; unknown when it was not fully loaded from the database."""
+    loaded = getattr(instance, "_loaded_values", {})
+    if not all(field in loaded for field in STATISTICS_FIELDS):
+        return False, None
+    return True, instance.statistics_key(loaded)
+
+
+@receiver(post_save, sender=Admission)
+def update_academic_statistics(sender, instance, created=False, raw=False, **kwargs):
+    known, old_key = (True, None) if created else loaded_statistics_key(instance)
+    if raw or not known:
+        invalidate_snapshot()
+    else:
+        apply_admission_change(old_key, instance.statistics_key())
+    instance._loaded_values = {field: getattr(instance, field) for field in STATISTICS_FIELDS}
+
+
+@receiver(post_delete, sender=Admission)
+def remove_from_academic_statistics(sender, instance, **kwargs):
+    known, old_key = loaded_statistics_key(instance)
+    if known:
+        apply_admission_change(old_key, None)
+    else:
+        invalidate_snapshot()
+
+
+@receiver(post_save, sender=Admission)
+@receiver(post_delete, sender=Admission)
+def drop_admission_profile(sender, instance, **kwargs):
+    invalidate_student_profile(instance.pk)
+
+
+@receiver(post_save, sender=FeeReceipt)
+@receiver(post_delete, sender=FeeReceipt)
+@receiver(post_save, sender=FeeStructure)
+@receiver(post_delete, sender=FeeStructure)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+@receiver(post_save, sender=PlacementHistory)
+@receiver(post_delete, sender=PlacementHistory)
+def drop_student_profile(sender, instance, **kwargs):
+    invalidate_student_profile(instance.student_id)
+
+
+@receiver(post_save, sender=PaymentMethod)
+@receiver(post_delete, sender=PaymentMethod)
+def drop_payment_profile(sender, instance, **kwargs):
+    # A receipt deleted together with its methods drops the profile itself
+    invalidate_student_profile(*FeeReceipt.objects.filter(pk=instance.fee_receipt_id).values_list("student_id", flat=True))
+
+
+@receiver(post_save, sender=AttendanceRegister)
+def drop_register_profiles(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate_student_profile(*Attendance.objects.filter(register=instance).values_list("student_id", flat=True))
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def drop_profiles_for_holiday(sender, instance, **kwargs):
+    invalidate_all_student_profiles()
+
+
+@receiver(m2m_changed, sender=Holiday.branch.through)
+def drop_profiles_for_holiday_branches(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_all_student_profiles()
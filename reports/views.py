@@ -24,6 +24,7 @@ from accounting.models import Account, GroupMaster
 from reports import tables, filters, forms
 
 from admission.models import Admission
+from admission.services import academic_statistics
 from masters.models import Course
 from employees.models import Employee
 User = get_user_model()
@@ -1453,77 +1454,12 @@ class AcademicStatisticsReportView(mixins.OpenView):
         context = super().get_context_data(**kwargs)
         context["report_title"] = "Academic Overview"
 
-        # 1. BASE ACTIVE STUDENTS
-        students = Admission.objects.filter(
-            is_active=True,
-            stage_status="active"
-        )
-        context["total_students"] = students.count()
         context["pusher_key"] = settings.PUSHER_KEY
 
-        # --------------------------------------------------
-        # 2. TELECALLER STATS (TOP 6 ACTIVE TELECALLERS)
-        # --------------------------------------------------
-        telecaller_stats = Employee.objects.filter(
-            user__is_active=True,
-            status="Appointed"
-        ).filter(
-            Q(user__usertype="tele_caller") |
-            Q(is_also_tele_caller="Yes")
-        ).annotate(
-            active_count=Count(
-                'user__admission',
-                filter=Q(
-                    user__admission__is_active=True,
-                    user__admission__stage_status='active'
-                ),
-                distinct=True
-            )
-        ).filter(
-            active_count__gt=0
-        ).select_related(
-            'user', 'branch'
-        ).order_by('-active_count')[:6]
-
-        context["telecaller_stats"] = telecaller_stats
-
-        # --------------------------------------------------
-        # 3. BRANCH-WISE STATS
-        # --------------------------------------------------
-        active_courses = Course.objects.filter(
-            is_active=True
-        ).order_by('name')
-
-        branch_stats_data = []
-        all_branches = Branch.objects.filter(is_active=True)
-
-        for branch in all_branches:
-            branch_students = students.filter(branch=branch)
-
-            branch_courses = active_courses.annotate(
-                branch_course_count=Count(
-                    'admission',
-                    filter=Q(
-                        admission__branch=branch,
-                        admission__is_active=True,
-                        admission__stage_status='active'
-                    ),
-                    distinct=True
-                )
-            ).order_by('name')
-
-            branch_stats_data.append({
-                "branch_obj": branch,
-                "total": branch_students.count(),
-                "courses": branch_courses,
-            })
-
-        branch_stats_data.sort(
-            key=lambda x: x["total"],
-            reverse=True
-        )
-
-        context["branch_stats"] = branch_stats_data
+        # Branch x course counts and the telecaller top 6 come from a cached
+        # snapshot kept current by Admission signals; changes are pushed to
+        # open screens over Pusher instead of reloading the page.
+        context.update(academic_statistics.dashboard_context())
 
         return context
 
@@ -48,10 +48,14 @@
                 confirmModal.hide();
                 setModalLoading(false);
 
-                document.getElementById("feeRefreshSuccessMessage").innerText =
-                    data.message || "Fee structure refreshed successfully.";
+                const messageEl = document.getElementById("feeRefreshSuccessMessage");
+                messageEl.innerText = data.message || "Fee structure refreshed successfully.";
 
                 successModal.show();
+
+                if (data.status_url) {
+                    pollJob(data.status_url, messageEl);
+                }
             })
             .catch(() => {
                 setModalLoading(false);
@@ -60,6 +64,24 @@
         });
     });
 
+    // ⏳ BACKGROUND JOB PROGRESS
+    function pollJob(url, messageEl) {
+        fetch(url, { headers: { "Accept": "application/json" } })
+            .then(res => res.json())
+            .then(job => {
+                if (job.status === "completed") {
+                    messageEl.innerText = `${job.processed} students fee structure refreshed` +
+                        (job.failed ? ` (${job.failed} failed).` : ".");
+                } else if (job.status === "failed") {
+                    messageEl.innerText = `Fee refresh stopped: ${job.error || "unknown error"}`;
+                } else {
+                    messageEl.innerText = `Refreshing fee structures... ${job.processed}/${job.total} (${job.progress}%)`;
+                    setTimeout(() => pollJob(url, messageEl), 2000);
+                }
+            })
+            .catch(() => {});
+    }
+
     // 🔄 MODAL BUTTON LOADING
     function setModalLoading(isLoading) {
         if (!confirmBtn) return;